@@ -0,0 +1,32 @@
+"""Shared fixtures for the tests under tests/; run them with python -m pytest from this directory"""
+import os
+import shutil
+
+import pytest
+
+from finance_db import Money
+from finance_service import FinanceService
+
+# The sample database shipped with the app, still at schema version 0
+SAMPLE_DATABASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "finance_tracker.db")
+
+
+@pytest.fixture
+def service(tmp_path):
+    """A FinanceService over a new, empty database"""
+    service = FinanceService.open(str(tmp_path / "finance.db"))
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def sample_path(tmp_path):
+    """Path of a scratch copy of the sample database"""
+    path = str(tmp_path / "sample.db")
+    shutil.copyfile(SAMPLE_DATABASE, path)
+    return path
+
+
+def add(service, table, date, amount, label="Other", description=""):
+    """Add one record with a dollar amount given as a string; returns its id"""
+    return service.add_transaction(table, date, Money.parse(amount), label, description)
@@ -0,0 +1,331 @@
+"""Throughput benchmarks for the Personal Finance Tracker database.
+
+Run them with `python finance_cli.py benchmark`. Every run builds scratch
+databases in a temporary directory, one per PRAGMA_PROFILES entry, fills
+them with the same synthetic history and times the operations the app
+performs: single-record adds, bulk imports, dashboard aggregates, full-table
+aggregation, and writes made while a long export is reading.
+
+`python finance_cli.py benchmark --storage` instead compares how much space
+and scan time the descriptions take stored inline on every record (schema 7)
+and interned in the descriptions table (the current schema), and
+`--snapshot` times the same aggregates over the raw rows, monthly_summary
+and a finance_snapshot.ColumnarSnapshot.
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from finance_db import (
+    DEFAULT_LABELS,
+    DEFAULT_PRAGMA_PROFILE,
+    MIGRATIONS,
+    Money,
+    connect,
+    create_tables,
+    insert_batches,
+    migrate_database,
+    migrate_intern_descriptions,
+    register_descriptions,
+    register_labels,
+    transaction_insert_sql,
+    transaction_select_sql,
+)
+from finance_service import FinanceService
+
+BENCH_CATEGORIES = DEFAULT_LABELS["expenses"]
+BENCH_WORDS = ["coffee", "rent", "groceries", "fuel", "cinema", "electricity", "pharmacy",
+               "books", "shoes", "haircut", "lunch", "train", "internet", "gift"]
+
+# Schema versions compared by run_storage_benchmark, and the SQL that reads
+# and writes records under the older, inline-text one
+STORAGE_LAYOUTS = {
+    "inline": MIGRATIONS.index(migrate_intern_descriptions),
+    "interned": len(MIGRATIONS),
+}
+INLINE_INSERT_SQL = """
+    INSERT INTO expenses (date, amount_cents, category_id, description)
+    VALUES (?, ?, (SELECT id FROM categories WHERE name = ?), ?)
+"""
+INLINE_SELECT_SQL = """
+    SELECT t.id, t.date, t.amount_cents, l.name, t.description
+    FROM expenses AS t JOIN categories AS l ON l.id = t.category_id
+"""
+# Synthetic rows are generated and committed this many at a time
+STORAGE_CHUNK_SIZE = 100000
+
+
+def synthetic_expenses(count, years=5, seed=1):
+    """Return `count` (date, amount_cents, category, description) rows spread over `years`"""
+    rng = random.Random(seed)
+    first = date.today() - timedelta(days=365 * years)
+    return [
+        ((first + timedelta(days=rng.randrange(365 * years))).isoformat(),
+         rng.randrange(100, 50000),
+         rng.choice(BENCH_CATEGORIES),
+         " ".join(rng.sample(BENCH_WORDS, 3)))
+        for _ in range(count)
+    ]
+
+
+def timed(func, *args):
+    """Call func(*args) and return (seconds taken, its result)"""
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def bench_bulk_insert(service, rows):
+    def insert():
+        with service.pool.writer() as conn, conn:
+            insert_batches(conn, "expenses", rows)
+    seconds, _ = timed(insert)
+    return len(rows) / seconds
+
+
+def bench_single_inserts(service, count):
+    """Add records one commit at a time, as the Add Expense form does"""
+    today = date.today().isoformat()
+    
+    def insert():
+        for index in range(count):
+            service.add_transaction("expenses", today, Money(1250), "Food", f"benchmark {index}")
+    seconds, _ = timed(insert)
+    return count / seconds
+
+
+def bench_dashboard_queries(service, repeat):
+    """Run the dashboard's aggregate queries `repeat` times"""
+    today = date.today()
+    
+    def query():
+        for _ in range(repeat):
+            service.recent_monthly_totals(6, today)
+            service.expenses_by_category(today.year, today.month)
+            service.annual_report(today.year)
+    seconds, _ = timed(query)
+    return repeat * 3 / seconds
+
+
+def bench_table_scan(service, repeat):
+    """Aggregate the whole expenses table, as a custom report over raw rows would"""
+    def scan():
+        for _ in range(repeat):
+            with service.pool.reader() as conn:
+                conn.execute(
+                    "SELECT category_id, substr(date, 1, 7), SUM(amount_cents) FROM expenses GROUP BY 1, 2"
+                ).fetchall()
+    seconds, _ = timed(scan)
+    return repeat / seconds
+
+
+def bench_write_during_read(service, writes, chunk_pause=0.002):
+    """Commit `writes` records while another thread streams the whole table.
+    
+    Returns (writes per second, slowest commit in milliseconds). Under a
+    rollback journal each commit has to wait for the reader to finish.
+    """
+    reading = threading.Event()
+    done = threading.Event()
+    
+    def read():
+        with service.pool.reader() as conn:
+            while not done.is_set():
+                cursor = conn.execute(transaction_select_sql("expenses"))
+                reading.set()
+                while cursor.fetchmany(2000) and not done.is_set():
+                    time.sleep(chunk_pause)  # Stands in for writing each chunk to a file
+    
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    reading.wait()
+    
+    today = date.today().isoformat()
+    slowest = 0.0
+    started = time.perf_counter()
+    try:
+        for index in range(writes):
+            seconds, _ = timed(service.add_transaction, "expenses", today, Money(500), "Food", f"concurrent {index}")
+            slowest = max(slowest, seconds)
+        elapsed = time.perf_counter() - started
+    finally:
+        done.set()
+        thread.join()
+    return writes / elapsed, slowest * 1000
+
+
+def fill_storage_database(path, layout, rows, pragmas):
+    """Create a database at the STORAGE_LAYOUTS schema `layout` holding `rows` synthetic expenses"""
+    conn = connect(path, pragmas)
+    create_tables(conn)
+    migrate_database(conn, STORAGE_LAYOUTS[layout])
+    sql = INLINE_INSERT_SQL if layout == "inline" else transaction_insert_sql("expenses")
+    for start in range(0, rows, STORAGE_CHUNK_SIZE):
+        chunk = synthetic_expenses(min(STORAGE_CHUNK_SIZE, rows - start), seed=start + 1)
+        with conn:
+            register_labels(conn, "expenses", (row[2] for row in chunk))
+            if layout == "interned":
+                register_descriptions(conn, (row[3] for row in chunk))
+            conn.executemany(sql, chunk)
+    # Fold the WAL into the file so its size is the size of the data
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+
+def bench_export_scan(path, layout, pragmas, repeat):
+    """Read every record with its category and description, as an export does, on a fresh connection"""
+    sql = INLINE_SELECT_SQL if layout == "inline" else transaction_select_sql("expenses")
+    conn = connect(path, pragmas, read_only=True)
+    
+    def scan():
+        count = 0
+        for _ in range(repeat):
+            cursor = conn.execute(sql)
+            while True:
+                chunk = cursor.fetchmany(5000)
+                if not chunk:
+                    break
+                count += len(chunk)
+        return count
+    try:
+        seconds, count = timed(scan)
+    finally:
+        conn.close()
+    return count / seconds
+
+
+def table_bytes(path, table):
+    """Bytes of pages used by `table` itself, or None if SQLite was built without dbstat"""
+    conn = connect(path, "sqlite", read_only=True)
+    try:
+        return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (table,)).fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
+def run_storage_benchmark(layout, rows=100000, repeat=3, pragmas=DEFAULT_PRAGMA_PROFILE, directory=None):
+    """Measure one STORAGE_LAYOUTS entry on a fresh database; returns (metric, value, unit) tuples"""
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        path = os.path.join(scratch, f"storage_{layout}.db")
+        seconds, _ = timed(fill_storage_database, path, layout, rows, pragmas)
+        size = os.path.getsize(path)
+        results = [
+            ("Database size", size / 2 ** 20, "MB"),
+            ("Bytes per record", size / max(rows, 1), "bytes"),
+        ]
+        expenses = table_bytes(path, "expenses")
+        if expenses is not None:
+            results.append(("Expenses table size", expenses / 2 ** 20, "MB"))
+        results.append(("Fill", rows / seconds, "rows/s"))
+        results.append(("Export scan", bench_export_scan(path, layout, pragmas, repeat), "rows/s"))
+    return results
+
+
+# Sources compared by run_snapshot_benchmark
+SNAPSHOT_SOURCES = ["rows", "summary", "snapshot"]
+
+
+def queries_per_second(func, repeat):
+    seconds, _ = timed(lambda: [func() for _ in range(repeat)])
+    return repeat / seconds
+
+
+def run_snapshot_benchmark(rows=100000, repeat=20, directory=None):
+    """Time aggregates over each SNAPSHOT_SOURCES entry; returns {source: [(metric, value, unit)]}.
+    
+    value is None where a source cannot answer the question: monthly_summary
+    knows nothing finer than a month.
+    """
+    from finance_snapshot import ColumnarSnapshot
+    
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        service = FinanceService.open(os.path.join(scratch, "bench_snapshot.db"), cache_size=0)
+        try:
+            with service.pool.writer() as conn, conn:
+                insert_batches(conn, "expenses", synthetic_expenses(rows))
+            snapshot = ColumnarSnapshot(os.path.join(scratch, "snapshot"))
+            build, _ = timed(snapshot.refresh, service)
+            with service.pool.writer() as conn, conn:
+                insert_batches(conn, "expenses", synthetic_expenses(1000, years=1, seed=2))
+            refresh, _ = timed(snapshot.refresh, service)
+            
+            # synthetic_expenses spreads records over the last five years
+            today = date.today()
+            first_year, months = today.year - 5, 6 * 12
+            first_day, last_year_start = date(first_year, 1, 1), date(today.year, 1, 1)
+            days = (date(today.year + 1, 1, 1) - first_day).days
+            span = (first_day.isoformat(), date(today.year + 1, 1, 1).isoformat())
+            
+            def rows_query(sql, params=span):
+                def query():
+                    with service.pool.reader() as conn:
+                        return conn.execute(sql, params).fetchall()
+                return query
+            
+            workloads = [
+                ("Monthly totals, 6 years", {
+                    "rows": rows_query("SELECT substr(date, 1, 7), SUM(amount_cents) FROM expenses "
+                                       "WHERE date >= ? AND date < ? GROUP BY 1"),
+                    "summary": lambda: service.monthly_totals(first_year, 1, months),
+                    "snapshot": lambda: snapshot.monthly_totals("expenses", first_year, 1, months),
+                }),
+                ("Category totals, 6 years", {
+                    "rows": rows_query("SELECT category_id, SUM(amount_cents) FROM expenses "
+                                       "WHERE date >= ? AND date < ? GROUP BY 1"),
+                    "summary": lambda: service.expenses_by_category(first_year, 1, months),
+                    "snapshot": lambda: snapshot.label_totals("expenses", first_year, 1, months),
+                }),
+                ("Daily totals, this year", {
+                    "rows": rows_query("SELECT date, SUM(amount_cents) FROM expenses "
+                                       "WHERE date >= ? AND date < ? GROUP BY 1",
+                                       (last_year_start.isoformat(), span[1])),
+                    "snapshot": lambda: snapshot.daily_totals("expenses", last_year_start, 366),
+                }),
+                ("Daily totals, 6 years", {
+                    "rows": rows_query("SELECT date, SUM(amount_cents) FROM expenses "
+                                       "WHERE date >= ? AND date < ? GROUP BY 1"),
+                    "snapshot": lambda: snapshot.daily_totals("expenses", first_day, days),
+                }),
+            ]
+            results = {source: [] for source in SNAPSHOT_SOURCES}
+            for metric, queries in workloads:
+                for source in SNAPSHOT_SOURCES:
+                    value = queries_per_second(queries[source], repeat) if source in queries else None
+                    results[source].append((metric, value, "queries/s"))
+            for source in SNAPSHOT_SOURCES:
+                snapshot_only = source == "snapshot"
+                results[source].append(("Snapshot build", build if snapshot_only else None, "s"))
+                results[source].append(("Refresh after 1,000 adds", refresh * 1000 if snapshot_only else None, "ms"))
+                results[source].append(("Snapshot size", snapshot.size() / 2 ** 20 if snapshot_only else None, "MB"))
+        finally:
+            service.close()
+    return results
+
+
+def run_benchmark(pragmas, rows=100000, inserts=500, repeat=200, directory=None):
+    """Benchmark one PRAGMA_PROFILES entry on a fresh database; returns (metric, value, unit) tuples"""
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        path = os.path.join(scratch, f"bench_{pragmas}.db")
+        # Uncached, so the aggregates measure SQLite rather than the result cache
+        service = FinanceService.open(path, pragmas, cache_size=0)
+        try:
+            results = [
+                ("Bulk insert", bench_bulk_insert(service, synthetic_expenses(rows)), "rows/s"),
+                ("Single-record adds", bench_single_inserts(service, inserts), "rows/s"),
+                ("Dashboard aggregates", bench_dashboard_queries(service, repeat), "queries/s"),
+                ("Cached dashboard aggregates", bench_dashboard_queries(FinanceService(service.pool), repeat),
+                 "queries/s"),
+                ("Full-table aggregate", bench_table_scan(service, max(1, repeat // 20)), "queries/s"),
+            ]
+            writes_per_sec, slowest_ms = bench_write_during_read(service, max(1, inserts // 5))
+            results.append(("Adds during export", writes_per_sec, "rows/s"))
+            results.append(("Slowest add during export", slowest_ms, "ms"))
+        finally:
+            service.close()
+    return results
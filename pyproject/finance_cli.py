@@ -0,0 +1,325 @@
+"""Command-line interface to the Personal Finance Tracker database.
+
+Runs batch jobs (imports, exports, reports) without the GUI, e.g. from cron:
+
+    python finance_cli.py import statement.csv
+    python finance_cli.py report monthly --year 2025 --month 4 --output april.xlsx
+    python finance_cli.py report range --start 2021-07-01 --end 2025-06-30 --by quarter
+    python finance_cli.py summary --months 12
+    python finance_cli.py snapshot
+    python finance_cli.py benchmark --rows 200000
+    python finance_cli.py benchmark --storage --rows 5000000
+
+The database, profile and read-only mode are chosen by the --db, --profile
+and --read-only flags, the environment or a config file; see finance_config.
+Only the data and service layers are imported, never tkinter or matplotlib.
+"""
+import argparse
+import calendar
+import sqlite3
+import sys
+from datetime import datetime
+
+from finance_config import add_database_arguments, database_from_args
+from finance_db import (
+    DEFAULT_PRAGMA_PROFILE,
+    IMPORT_BATCH_SIZE,
+    IMPORT_CHUNK_SIZE,
+    PRAGMA_PROFILES,
+    RANGE_GRANULARITIES,
+    Money,
+    iter_import_chunks,
+    period_label,
+)
+from finance_export import (
+    write_all_data,
+    write_annual_report,
+    write_monthly_report,
+    write_range_report,
+    write_table_export,
+)
+from finance_service import FinanceService
+
+# Subcommand names for each transaction table
+KIND_TABLES = {"expense": "expenses", "income": "income"}
+
+
+def parse_date(value):
+    """argparse type for YYYY-MM-DD dates"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD")
+
+
+def parse_money(value):
+    """argparse type for amounts"""
+    try:
+        return Money.parse(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid amount '{value}'")
+
+
+def cmd_add(service, args):
+    table = KIND_TABLES[args.kind]
+    row_id = service.add_transaction(table, args.date, args.amount, args.label, args.description)
+    print(f"Added {args.kind} #{row_id}: {args.date} ${args.amount:,.2f} {args.label}")
+    return 0
+
+
+def cmd_import(service, args):
+    def show_progress(table, done):
+        if args.verbose:
+            print(f"Importing {table}... {done:,} rows", file=sys.stderr)
+    
+    result = service.bulk_import(iter_import_chunks(args.file, args.chunk_size),
+                                 batch_size=args.batch_size, progress=show_progress)
+    
+    imported = result["imported"]
+    print(f"Imported {imported.get('expenses', 0):,} expense and {imported.get('income', 0):,} income records "
+          f"in {result['seconds']:.2f}s ({result['rows_per_sec']:,.0f} rows/sec)")
+    for table, row_number, message in result["errors"]:
+        print(f"{table} row {row_number}: {message}", file=sys.stderr)
+    if result["error_count"] > len(result["errors"]):
+        print(f"... and {result['error_count'] - len(result['errors']):,} more", file=sys.stderr)
+    
+    if not imported:
+        print("No valid data found in file", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_export(service, args):
+    if args.data == "all":
+        stats = write_all_data(service, args.output)
+    else:
+        stats = write_table_export(service, args.data, args.output)
+    print(f"Exported {args.data} to {args.output}: {stats.describe()}")
+    return 0
+
+
+def cmd_report(service, args):
+    if args.type == "monthly":
+        if args.month is None:
+            print("error: monthly reports need --month", file=sys.stderr)
+            return 2
+        if args.output:
+            write_monthly_report(service, args.month, args.year, args.output)
+            print(f"Report saved to {args.output}")
+            return 0
+        
+        report = service.monthly_report(args.month, args.year)
+        total_expense = report.total_expenses
+        total_income = report.total_income
+        
+        print(f"Monthly Report: {calendar.month_name[args.month]} {args.year}")
+        print(f"Total Income:   ${total_income:>12,.2f}")
+        print(f"Total Expenses: ${total_expense:>12,.2f}")
+        print(f"Net Savings:    ${total_income - total_expense:>12,.2f}")
+        for title, items in (("Expenses by Category", report.expenses), ("Income by Source", report.income)):
+            if items:
+                print(f"\n{title}")
+                for item in sorted(items, key=lambda item: item.amount, reverse=True):
+                    print(f"  {item.label:<20} ${item.amount:>12,.2f}")
+        return 0
+    
+    if args.type == "range":
+        if not (args.start and args.end):
+            print("error: range reports need --start and --end", file=sys.stderr)
+            return 2
+        if args.start > args.end:
+            print("error: --start is after --end", file=sys.stderr)
+            return 2
+        if args.output:
+            write_range_report(service, args.start, args.end, args.by, args.output)
+            print(f"Report saved to {args.output}")
+            return 0
+        
+        totals = service.range_totals(args.start, args.end, args.by)
+        print(f"Report: {args.start} to {args.end} by {args.by}")
+        print(f"{'Period':<22}{'Income':>14}{'Expenses':>14}{'Savings':>14}")
+        for period, income, expense, savings in zip(totals.periods, totals.income,
+                                                    totals.expenses, totals.savings):
+            print(f"{period_label(period, args.by):<22}"
+                  f"{Money(income):>14,.2f}{Money(expense):>14,.2f}{Money(savings):>14,.2f}")
+        print(f"{'Total':<22}{Money(sum(totals.income)):>14,.2f}"
+              f"{Money(sum(totals.expenses)):>14,.2f}{Money(sum(totals.savings)):>14,.2f}")
+        return 0
+    
+    # Annual
+    if args.output:
+        write_annual_report(service, args.year, args.output)
+        print(f"Report saved to {args.output}")
+        return 0
+    
+    totals = service.annual_report(args.year)
+    print(f"Annual Report: {args.year}")
+    print_totals(totals)
+    return 0
+
+
+def cmd_summary(service, args):
+    totals = service.recent_monthly_totals(args.months, datetime.now())
+    print_totals(totals)
+    
+    # Budget status for the current month
+    budget = service.get_budget()
+    if budget:
+        expenses = Money(totals.expenses[-1])
+        print(f"\nBudget: ${budget:,.2f}, spent ${expenses:,.2f} this month "
+              f"({expenses.cents / budget.cents * 100:.1f}%)")
+    else:
+        print("\nNo budget set")
+    
+    invalid = service.invalid_dates()
+    if invalid:
+        print(f"\nwarning: {len(invalid):,} records have a date that is not YYYY-MM-DD "
+              f"and cannot be placed in date range reports:", file=sys.stderr)
+        for table, row_id, date in invalid[:10]:
+            print(f"  {table} #{row_id}: {date!r}", file=sys.stderr)
+    return 0
+
+
+def cmd_snapshot(service, args):
+    # Imported here so the other commands don't need NumPy
+    from finance_snapshot import ColumnarSnapshot, snapshot_directory
+    
+    snapshot = ColumnarSnapshot(args.dir or snapshot_directory(service.pool.path))
+    added = snapshot.refresh(service, rebuild=args.rebuild)
+    print(f"Snapshot {snapshot.directory}: added {added['expenses']:,} expense and {added['income']:,} income "
+          f"records, {snapshot.size() / 2 ** 20:,.1f} MB")
+    
+    expenses, income = snapshot.yearly_totals("expenses"), snapshot.yearly_totals("income")
+    print(f"\n{'Year':<8}{'Income':>15}{'Expenses':>15}{'Savings':>15}")
+    for year in sorted(expenses.keys() | income.keys()):
+        year_income, year_expenses = Money(income.get(year, 0)), Money(expenses.get(year, 0))
+        print(f"{year:<8}{year_income:>15,.2f}{year_expenses:>15,.2f}{year_income - year_expenses:>15,.2f}")
+    return 0
+
+
+def cmd_benchmark(args):
+    # Imported here so the other commands don't load the benchmark code
+    from finance_bench import STORAGE_LAYOUTS, run_benchmark, run_snapshot_benchmark, run_storage_benchmark
+    
+    if args.snapshot:
+        print(f"Benchmarking aggregates with {args.rows:,} rows...", file=sys.stderr)
+        results = run_snapshot_benchmark(args.rows, max(1, args.repeat // 10), args.dir)
+        columns = list(results)
+    else:
+        # --storage compares layouts under one profile, picked with the global --pragmas
+        columns = list(STORAGE_LAYOUTS) if args.storage else args.compare or sorted(PRAGMA_PROFILES)
+        results = {}
+        for column in columns:
+            print(f"Benchmarking '{column}' with {args.rows:,} rows...", file=sys.stderr)
+            if args.storage:
+                results[column] = run_storage_benchmark(column, args.rows,
+                                                        pragmas=args.pragmas or DEFAULT_PRAGMA_PROFILE,
+                                                        directory=args.dir)
+            else:
+                results[column] = run_benchmark(column, args.rows, args.inserts, args.repeat, args.dir)
+    
+    print(f"{'':<28}" + "".join(f"{column:>14}" for column in columns))
+    for index, (metric, _, unit) in enumerate(results[columns[0]]):
+        values = "".join(f"{'-':>14}" if results[column][index][1] is None else f"{results[column][index][1]:>14,.1f}"
+                         for column in columns)
+        print(f"{metric:<28}{values}  {unit}")
+    return 0
+
+
+def print_totals(totals):
+    """Print a month-by-month table of income, expenses and savings with a total row"""
+    print(f"{'Month':<10}{'Income':>14}{'Expenses':>14}{'Savings':>14}")
+    for (year, month), income, expense, savings in zip(totals.months, totals.income,
+                                                        totals.expenses, totals.savings):
+        print(f"{calendar.month_abbr[month]} {year:<6}"
+              f"{Money(income):>14,.2f}{Money(expense):>14,.2f}{Money(savings):>14,.2f}")
+    print(f"{'Total':<10}{Money(sum(totals.income)):>14,.2f}"
+          f"{Money(sum(totals.expenses)):>14,.2f}{Money(sum(totals.savings)):>14,.2f}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="finance_cli", description="Personal Finance Tracker command-line tool")
+    add_database_arguments(parser)
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    add = commands.add_parser("add", help="add an expense or income record")
+    add.add_argument("kind", choices=sorted(KIND_TABLES))
+    add.add_argument("amount", type=parse_money)
+    add.add_argument("label", help="expense category or income source")
+    add.add_argument("-d", "--description", default="")
+    add.add_argument("--date", type=parse_date, default=datetime.now().strftime("%Y-%m-%d"),
+                     help="YYYY-MM-DD (default: today)")
+    add.set_defaults(func=cmd_add)
+    
+    import_ = commands.add_parser("import", help="import a CSV or Excel file")
+    import_.add_argument("file")
+    import_.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    import_.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    import_.add_argument("-v", "--verbose", action="store_true", help="report progress on stderr")
+    import_.set_defaults(func=cmd_import)
+    
+    export = commands.add_parser("export", help="export records to an Excel, CSV or Parquet file")
+    export.add_argument("data", choices=["expenses", "income", "all"])
+    export.add_argument("output", help="file to write; its extension (.xlsx, .csv or .parquet) picks the format")
+    export.set_defaults(func=cmd_export)
+    
+    report = commands.add_parser("report", help="print or save a monthly, annual or date range report")
+    report.add_argument("type", choices=["monthly", "annual", "range"])
+    report.add_argument("--year", type=int, default=datetime.now().year)
+    report.add_argument("--month", type=int, choices=range(1, 13), metavar="1-12")
+    report.add_argument("--start", type=parse_date, help="first day of a range report (YYYY-MM-DD)")
+    report.add_argument("--end", type=parse_date, help="last day of a range report (YYYY-MM-DD)")
+    report.add_argument("--by", choices=RANGE_GRANULARITIES, default="month",
+                        help="period of each row of a range report (default: month)")
+    report.add_argument("-o", "--output", help="save the report as an Excel file instead of printing it")
+    report.set_defaults(func=cmd_report)
+    
+    summary = commands.add_parser("summary", help="print recent monthly totals and budget status")
+    summary.add_argument("--months", type=int, default=6)
+    summary.set_defaults(func=cmd_summary)
+    
+    snapshot = commands.add_parser("snapshot", help="refresh the columnar snapshot and print yearly trends")
+    snapshot.add_argument("--dir", help="snapshot directory (default: <database>.snapshot)")
+    snapshot.add_argument("--rebuild", action="store_true", help="rebuild the snapshot from scratch")
+    snapshot.set_defaults(func=cmd_snapshot)
+    
+    benchmark = commands.add_parser("benchmark", help="time database operations on scratch databases")
+    benchmark.add_argument("--compare", action="append", choices=sorted(PRAGMA_PROFILES),
+                           help="pragma profile to include; repeat to compare several (default: all)")
+    benchmark.add_argument("--rows", type=int, default=100000, help="synthetic history size")
+    benchmark.add_argument("--inserts", type=int, default=500, help="single-record adds to time")
+    benchmark.add_argument("--repeat", type=int, default=200, help="rounds of dashboard queries")
+    benchmark.add_argument("--dir", help="where to create the scratch databases (default: system temp)")
+    kind = benchmark.add_mutually_exclusive_group()
+    kind.add_argument("--storage", action="store_true",
+                      help="compare inline and interned description storage instead of pragma profiles")
+    kind.add_argument("--snapshot", action="store_true",
+                      help="compare aggregates over raw rows, monthly_summary and the columnar snapshot")
+    benchmark.set_defaults(func=cmd_benchmark, standalone=True)
+    
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "standalone", False):
+        # Works on its own scratch databases, not on --db
+        return args.func(args)
+    
+    try:
+        service = FinanceService.from_config(database_from_args(args))
+    except (ValueError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    
+    try:
+        return args.func(service, args)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
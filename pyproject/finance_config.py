@@ -0,0 +1,150 @@
+"""Where the Personal Finance Tracker keeps its database, and how it opens it.
+
+Each setting is taken from the first of these that gives it:
+
+1. command-line flags (--db, --profile, --read-only, --pragmas)
+2. environment variables (FINANCE_TRACKER_DB, FINANCE_TRACKER_PROFILE, ...)
+3. the config file, in the selected profile's section and then [database]
+4. the defaults: finance_tracker.db, or finance_tracker_<profile>.db for a
+   profile, next to the program rather than in the working directory
+
+The config file is finance_tracker.ini next to the program or in the home
+directory, or wherever FINANCE_TRACKER_CONFIG points:
+
+    [database]
+    profile = household
+
+    [profile household]
+    path = D:/Finance/household.db
+
+    [profile business]
+    path = /mnt/fast/business.db
+    pragmas = wal
+
+    [profile archive-2019]
+    path = /archive/finance_2019.db
+    read_only = yes
+
+Relative paths in the file are relative to the file itself.
+"""
+import configparser
+import os
+from typing import NamedTuple, Optional
+
+from finance_db import DEFAULT_PRAGMA_PROFILE, PRAGMA_PROFILES
+
+PROGRAM_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE_NAME = "finance_tracker.ini"
+
+# Environment variables, by setting
+ENVIRONMENT = {
+    "path": "FINANCE_TRACKER_DB",
+    "profile": "FINANCE_TRACKER_PROFILE",
+    "read_only": "FINANCE_TRACKER_READ_ONLY",
+    "pragmas": "FINANCE_TRACKER_PRAGMAS",
+}
+CONFIG_ENV = "FINANCE_TRACKER_CONFIG"
+
+TRUE_WORDS = {"1", "yes", "true", "on"}
+FALSE_WORDS = {"0", "no", "false", "off", ""}
+
+
+class DatabaseConfig(NamedTuple):
+    """Resolved database settings; profile is None when none was selected"""
+    path: str
+    profile: Optional[str]
+    read_only: bool
+    pragmas: str
+
+
+def parse_flag(value, source):
+    word = str(value).strip().lower()
+    if word in TRUE_WORDS:
+        return True
+    if word in FALSE_WORDS:
+        return False
+    raise ValueError(f"{source}: expected yes or no, not '{value}'")
+
+
+def find_config_file(environ):
+    """Return the path of the config file to read, or None if there is none"""
+    if environ.get(CONFIG_ENV):
+        return environ[CONFIG_ENV]
+    for directory in (PROGRAM_DIR, os.path.expanduser("~")):
+        path = os.path.join(directory, CONFIG_FILE_NAME)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def read_config_file(path):
+    """Return the [database] settings and a dict of profile sections from the file at `path`"""
+    parser = configparser.ConfigParser()
+    if not parser.read(path, encoding="utf-8"):
+        raise ValueError(f"Cannot read config file {path}")
+
+    def settings(section):
+        values = dict(parser[section])
+        if "path" in values:
+            # Relative to the config file, not to wherever the program was started
+            values["path"] = os.path.join(os.path.dirname(os.path.abspath(path)),
+                                          os.path.expanduser(values["path"]))
+        return values
+
+    database = settings("database") if parser.has_section("database") else {}
+    profiles = {
+        section.split(None, 1)[1].strip(): settings(section)
+        for section in parser.sections() if section.startswith("profile ")
+    }
+    return database, profiles
+
+
+def resolve_database(path=None, profile=None, read_only=None, pragmas=None, environ=None):
+    """Combine flags (None when not given), environment and config file into a DatabaseConfig"""
+    if environ is None:
+        environ = os.environ
+    flags = {"path": path, "profile": profile, "read_only": read_only, "pragmas": pragmas}
+
+    config_path = find_config_file(environ)
+    database, profiles = read_config_file(config_path) if config_path else ({}, {})
+
+    def setting(name, section):
+        if flags[name] is not None:
+            return flags[name]
+        if environ.get(ENVIRONMENT[name]):
+            return environ[ENVIRONMENT[name]]
+        return section.get(name)
+
+    profile = setting("profile", database) or None
+    section = {**database, **profiles.get(profile, {})} if profile else database
+
+    # Every profile has its own database, so [database] path is not inherited
+    path = setting("path", profiles.get(profile, {}) if profile else database)
+    if not path:
+        name = f"finance_tracker_{profile}.db" if profile else "finance_tracker.db"
+        path = os.path.join(PROGRAM_DIR, name)
+
+    read_only = setting("read_only", section)
+    read_only = parse_flag(read_only, "read_only") if read_only is not None else False
+
+    pragmas = setting("pragmas", section) or DEFAULT_PRAGMA_PROFILE
+    if pragmas not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown pragma profile '{pragmas}', expected one of {', '.join(sorted(PRAGMA_PROFILES))}")
+
+    return DatabaseConfig(os.path.expanduser(path), profile, read_only, pragmas)
+
+
+def add_database_arguments(parser):
+    """Add the --db, --profile, --read-only and --pragmas flags to an argparse parser"""
+    parser.add_argument("--db", help="database file (default: from the environment or config file, "
+                                     "else finance_tracker.db next to the program)")
+    parser.add_argument("--profile", help="named database profile, e.g. household or business")
+    parser.add_argument("--read-only", action="store_const", const=True, default=None,
+                        help="open the database read-only, without taking write locks")
+    parser.add_argument("--pragmas", choices=sorted(PRAGMA_PROFILES),
+                        help=f"SQLite connection settings (default: {DEFAULT_PRAGMA_PROFILE})")
+
+
+def database_from_args(args):
+    """Resolve the DatabaseConfig for parsed add_database_arguments flags"""
+    return resolve_database(args.db, args.profile, args.read_only, args.pragmas)
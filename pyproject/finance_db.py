@@ -0,0 +1,1199 @@
+"""Data layer for the Personal Finance Tracker.
+
+Schema and migrations, the SQL behind the dashboard, reports and
+transaction browser, and the import engine; finance_service runs the
+queries. Nothing here imports tkinter or matplotlib, so the GUI and the
+command-line tool share it; pandas and openpyxl are imported inside the
+functions that need them.
+"""
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import total_ordering
+from itertools import islice
+from pathlib import Path
+
+
+# Queries run by the dashboard and reports; kept here so the query plan check covers them.
+# Aggregates read the monthly_summary table, whose month bounds are YYYY-MM keys.
+MONTHLY_TOTALS_SQL = """
+    SELECT kind, month, SUM(total_cents) FROM monthly_summary
+    WHERE month >= ? AND month < ? GROUP BY kind, month
+"""
+EXPENSE_CATEGORY_SQL = """
+    SELECT c.name, SUM(s.total_cents) FROM monthly_summary AS s JOIN categories AS c ON c.id = s.label_id
+    WHERE s.kind = 'expenses' AND s.month >= ? AND s.month < ? GROUP BY s.label_id
+"""
+INCOME_SOURCE_SQL = """
+    SELECT l.name, SUM(s.total_cents) FROM monthly_summary AS s JOIN sources AS l ON l.id = s.label_id
+    WHERE s.kind = 'income' AND s.month >= ? AND s.month < ? GROUP BY s.label_id
+"""
+# Scrollbar seeks: the months of a table with their record counts, newest
+# first, then an OFFSET bounded to the one month that holds the position
+MONTH_COUNTS_SQL = "SELECT month, SUM(row_count) FROM monthly_summary WHERE kind = ? GROUP BY month ORDER BY month DESC"
+TRANSACTION_KEY_AT_SQL = """
+    SELECT date, id FROM {table} WHERE date >= ? AND date < ? ORDER BY date DESC, id DESC LIMIT 1 OFFSET ?
+"""
+TRANSACTION_COUNT_SQL = "SELECT COALESCE(SUM(row_count), 0) FROM monthly_summary WHERE kind = ?"
+LABEL_USAGE_SQL = "SELECT usage_count FROM {labels} WHERE name = ?"
+TRANSACTION_TOTALS_SQL = """
+    SELECT COALESCE(SUM(row_count), 0), COALESCE(SUM(total_cents), 0) FROM monthly_summary WHERE kind = ?
+"""
+
+# Numeric columns of the records added after a given id, for finance_snapshot:
+# id, months since year 0, days since 1970-01-01, cents and label id.
+# Dates that do not parse get month and day -1.
+SNAPSHOT_ROWS_SQL = """
+    SELECT id,
+        COALESCE(CAST(strftime('%Y', date) AS INTEGER) * 12 + CAST(strftime('%m', date) AS INTEGER) - 1, -1),
+        COALESCE(CAST(julianday(date) - 2440587.5 AS INTEGER), -1),
+        amount_cents, {label}_id
+    FROM {table} WHERE id > ? ORDER BY id
+"""
+
+# Daily totals per category or source id between two ISO dates, inclusive,
+# for range reports; finance_service rolls the days up into weeks, months or
+# quarters. Grouping in (date, label) order streams straight off the covering
+# idx_{table}_date_label index, so the query needs no sort or table lookups.
+RANGE_TOTALS_SQL = """
+    SELECT date, {label}_id, SUM(amount_cents) FROM {table}
+    WHERE date >= ? AND date <= ? GROUP BY date, {label}_id
+"""
+
+# Records whose date is not a real zero-padded YYYY-MM-DD date. Range queries
+# compare dates as text, so they cannot place these reliably.
+INVALID_DATES_SQL = "SELECT id, date FROM {table} WHERE date IS NULL OR date(date) IS NOT date ORDER BY id"
+
+# Label of each transaction table: its name in the UI and reports, and the
+# registry table its {label}_id column references
+TRANSACTION_LABELS = {"expenses": "category", "income": "source"}
+LABEL_TABLES = {"expenses": "categories", "income": "sources"}
+
+# Labels every new database starts with
+DEFAULT_LABELS = {
+    "expenses": ["Food", "Housing", "Transportation", "Entertainment", "Utilities",
+                 "Shopping", "Health", "Education", "Personal", "Other"],
+    "income": ["Salary", "Freelance", "Investments", "Gift", "Refund", "Other"],
+}
+
+# Period lengths of range reports, finest first
+RANGE_GRANULARITIES = ["day", "week", "month", "quarter"]
+
+# Matching ids are streamed from a search to the grid in chunks of this many
+SEARCH_CHUNK_SIZE = 2000
+
+@total_ordering
+class Money:
+    """Exact monetary amount held as a whole number of cents"""
+    
+    __slots__ = ("cents",)
+    
+    def __init__(self, cents=0):
+        self.cents = cents
+    
+    @classmethod
+    def parse(cls, value):
+        """Convert user input, a float or a Decimal to Money, rounding half up to the cent"""
+        if isinstance(value, str):
+            value = value.strip().replace("$", "").replace(",", "")
+        try:
+            cents = (Decimal(str(value)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount: {value!r}")
+        return cls(int(cents))
+    
+    def to_decimal(self):
+        return Decimal(self.cents).scaleb(-2)
+    
+    def __str__(self):
+        # Integer formatting only, so Treeview rows never go through float
+        dollars, cents = divmod(abs(self.cents), 100)
+        return f"{'-' if self.cents < 0 else ''}{dollars}.{cents:02d}"
+    
+    def __format__(self, format_spec):
+        if not format_spec:
+            return str(self)
+        return format(self.to_decimal(), format_spec)
+    
+    def __repr__(self):
+        return f"Money({self.cents})"
+    
+    def __float__(self):
+        return self.cents / 100
+    
+    def __bool__(self):
+        return self.cents != 0
+    
+    def __hash__(self):
+        return hash(self.cents)
+    
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.cents == other.cents
+    
+    def __lt__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.cents < other.cents
+    
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents + other.cents)
+        if other == 0:
+            return self  # Lets sum() start from 0
+        return NotImplemented
+    
+    __radd__ = __add__
+    
+    def __sub__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.cents - other.cents)
+    
+    def __neg__(self):
+        return Money(-self.cents)
+
+
+def shift_month(year, month, offset):
+    """Return the (year, month) pair that lies `offset` months from the given month"""
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+
+def month_start(year, month):
+    """Return the ISO date of the first day of the month"""
+    return f"{year}-{month:02d}-01"
+
+
+def month_key(year, month):
+    """Return the YYYY-MM key used by the monthly_summary table"""
+    return f"{year}-{month:02d}"
+
+
+def month_key_end(key):
+    """Return the lowest string above every date whose first seven characters are the month key `key`"""
+    if not key:
+        return "\0"
+    return key[:-1] + chr(ord(key[-1]) + 1)
+
+
+def period_start(day, granularity):
+    """Return the first day of the day, week (from Monday), month or quarter containing `day`"""
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "quarter":
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    raise ValueError(f"Unknown granularity '{granularity}', expected one of {', '.join(RANGE_GRANULARITIES)}")
+
+
+def period_label(start, granularity):
+    """Return how reports name the period of `granularity` that begins on `start`"""
+    if granularity == "week":
+        return f"Week of {start.isoformat()}"
+    if granularity == "month":
+        return start.strftime("%b %Y")
+    if granularity == "quarter":
+        return f"{start.year} Q{(start.month - 1) // 3 + 1}"
+    return start.isoformat()
+
+
+def range_periods(first_day, last_day, granularity):
+    """Return the start of every period of `granularity` that overlaps first_day..last_day, in order"""
+    periods = []
+    start = period_start(first_day, granularity)
+    while start <= last_day:
+        periods.append(start)
+        if granularity in ("day", "week"):
+            start += timedelta(days=1 if granularity == "day" else 7)
+        else:
+            year, month = shift_month(start.year, start.month, 1 if granularity == "month" else 3)
+            start = start.replace(year=year, month=month)
+    return periods
+
+
+def transaction_page_sql(table, seek=None):
+    """Return the keyset page query for `table`, newest transactions first.
+
+    seek is None for the first page, otherwise the row-value operator applied
+    to the (date, id) cursor: "<" or "<=" for older rows, ">" for newer rows
+    (which are then returned oldest first).
+    """
+    order = "ASC" if seek == ">" else "DESC"
+    where = f"WHERE (t.date, t.id) {seek} (?, ?) " if seek else ""
+    return f"{transaction_select_sql(table)} {where}ORDER BY t.date {order}, t.id {order} LIMIT ?"
+
+
+def transaction_select_sql(table):
+    """SELECT of (id, date, amount_cents, label name, description) rows from `table` aliased as t"""
+    label = TRANSACTION_LABELS[table]
+    return (f"SELECT t.id, t.date, t.amount_cents, l.name, d.text FROM {table} AS t "
+            f"JOIN {LABEL_TABLES[table]} AS l ON l.id = t.{label}_id "
+            f"LEFT JOIN descriptions AS d ON d.id = t.description_id")
+
+
+def transaction_insert_sql(table):
+    """INSERT of a (date, amount_cents, label name, description) row.
+
+    The label and the description must already be registered; see
+    register_labels and register_descriptions.
+    """
+    label = TRANSACTION_LABELS[table]
+    return (f"INSERT INTO {table} (date, amount_cents, {label}_id, description_id) "
+            f"VALUES (?, ?, (SELECT id FROM {LABEL_TABLES[table]} WHERE name = ?), "
+            f"(SELECT id FROM descriptions WHERE text = ?))")
+
+
+def register_labels(conn, table, names):
+    """Add any of `names` missing from the label registry of `table`; returns how many were new"""
+    cursor = conn.executemany(f"INSERT OR IGNORE INTO {LABEL_TABLES[table]} (name) VALUES (?)",
+                              [(name,) for name in dict.fromkeys(names)])
+    return cursor.rowcount
+
+
+def register_descriptions(conn, texts):
+    """Add any of `texts` missing from the descriptions table; None is stored as a NULL reference"""
+    conn.executemany("INSERT OR IGNORE INTO descriptions (text) VALUES (?)",
+                     [(text,) for text in dict.fromkeys(texts) if text is not None])
+
+
+def prune_descriptions(conn, description_ids):
+    """Delete the given descriptions if no expense or income refers to them any more"""
+    conn.executemany("""
+        DELETE FROM descriptions WHERE id = ?
+            AND NOT EXISTS (SELECT 1 FROM expenses WHERE description_id = descriptions.id)
+            AND NOT EXISTS (SELECT 1 FROM income WHERE description_id = descriptions.id)
+    """, [(description_id,) for description_id in description_ids if description_id is not None])
+
+
+# Keep descriptions_fts in step with the descriptions table. A description's
+# text never changes once stored, so there is no update trigger.
+SEARCH_TRIGGERS = [
+    ("insert", "AFTER INSERT ON descriptions", """
+        INSERT INTO descriptions_fts (rowid, text) VALUES (NEW.id, NEW.text);
+    """),
+    ("delete", "AFTER DELETE ON descriptions", """
+        INSERT INTO descriptions_fts (descriptions_fts, rowid, text) VALUES ('delete', OLD.id, OLD.text);
+    """),
+]
+
+
+def create_search_triggers(conn):
+    """Create the triggers that maintain the full-text search index"""
+    for name, event, body in SEARCH_TRIGGERS:
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_descriptions_search_{name} {event} BEGIN {body} END")
+
+
+def create_transaction_search_triggers(conn):
+    """Create the schema 6 and 7 triggers that kept one {table}_fts index per transaction table"""
+    add = """
+        INSERT INTO {table}_fts (rowid, description) VALUES (NEW.id, NEW.description);
+    """
+    remove = """
+        INSERT INTO {table}_fts ({table}_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+    """
+    triggers = [
+        ("insert", "AFTER INSERT ON {table}", add),
+        ("delete", "AFTER DELETE ON {table}", remove),
+        ("update", "AFTER UPDATE OF description ON {table}", remove + add),
+    ]
+    for table in TRANSACTION_LABELS:
+        for name, event, body in triggers:
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_search_{name} {event} BEGIN {body} END"
+                .format(table=table)
+            )
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query that matches every word as a prefix"""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def search_transaction_sql(table, start_date=None, end_date=None, label=None):
+    """Return the ranked full-text search query for `table` and its filter placeholders.
+
+    The index covers each distinct description once; records sharing a
+    description rank together, newest first. The filters are written with a
+    unary + so they cannot use an index: otherwise SQLite may drive the join
+    from idx_{table}_{label}_date and re-run the MATCH for every record in
+    the range, instead of going from the matches to idx_{table}_description.
+    """
+    sql = ("SELECT t.id FROM descriptions_fts "
+           f"JOIN {table} AS t ON t.description_id = descriptions_fts.rowid "
+           "WHERE descriptions_fts MATCH ?")
+    if start_date:
+        sql += " AND +t.date >= ?"
+    if end_date:
+        sql += " AND +t.date <= ?"
+    if label:
+        sql += f" AND +t.{TRANSACTION_LABELS[table]}_id = (SELECT id FROM {LABEL_TABLES[table]} WHERE name = ?)"
+    return sql + " ORDER BY descriptions_fts.rank, t.date DESC, t.id DESC"
+
+
+def create_tables(conn):
+    """Create the original tables if they do not exist.
+
+    Later schema changes are applied on top of these by migrate_database.
+    """
+    # Create expenses table if not exists
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            amount REAL,
+            category TEXT,
+            description TEXT
+        )
+    ''')
+    
+    # Create income table if not exists
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS income (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            amount REAL,
+            source TEXT,
+            description TEXT
+        )
+    ''')
+    
+    # Create settings table if not exists
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    conn.commit()
+
+
+# Connection settings by profile name. "sqlite" keeps SQLite's own defaults
+# (rollback journal, fsync on every commit) and is there to benchmark against.
+PRAGMA_PROFILES = {
+    "sqlite": {},
+    "wal": {
+        # Readers work from a snapshot, so reports and exports never block a write
+        "journal_mode": "WAL",
+        # Sync at checkpoints instead of every commit; a power cut can lose the
+        # last few commits but cannot corrupt the database
+        "synchronous": "NORMAL",
+        "cache_size": -32000,  # In KiB, so about 32 MB of page cache per connection
+        "mmap_size": 256 * 1024 * 1024,
+        # temp_store is left at its default: with an in-memory statement
+        # journal, each import batch's savepoint gets slower as a large
+        # import transaction grows
+    },
+}
+DEFAULT_PRAGMA_PROFILE = "wal"
+
+# Prepared statements kept per connection; Python's default is 128
+STATEMENT_CACHE_SIZE = 512
+
+# Seconds a connection waits on another's lock before "database is locked"
+BUSY_TIMEOUT = 5.0
+
+
+def connect(path, pragmas=DEFAULT_PRAGMA_PROFILE, read_only=False):
+    """Open a connection to `path` with the settings of the named PRAGMA_PROFILES entry.
+
+    The connection may be handed between threads but must only be used by
+    one at a time, which ConnectionPool takes care of.
+    """
+    if read_only:
+        # SQLite itself refuses writes, and the file is never created. as_uri
+        # percent-encodes characters such as ? and # in the path
+        conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True, timeout=BUSY_TIMEOUT,
+                               cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE_SIZE,
+                               check_same_thread=False)
+    for name, value in PRAGMA_PROFILES[pragmas].items():
+        # The journal mode is a property of the file, set by the writer
+        if not (read_only and name == "journal_mode"):
+            conn.execute(f"PRAGMA {name} = {value}")
+    # Every transaction must name a registered category or source
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def open_database(path, pragmas=DEFAULT_PRAGMA_PROFILE):
+    """Connect to the database at `path`, creating it if needed, and bring it up to the current schema"""
+    conn = connect(path, pragmas)
+    create_tables(conn)
+    migrate_database(conn)
+    return conn
+
+
+class ConnectionPool:
+    """One writer and `readers` read-only connections to a database file.
+
+    Connections are checked out with `with pool.reader() as conn` or
+    `with pool.writer() as conn` and may be used from any thread while held.
+    Only one thread holds the writer at a time; with the WAL profile readers
+    never wait for it. reader() blocks while every reader is checked out, so
+    size the pool above the number of threads that hold one for long.
+    
+    A read_only pool has no writer at all: the file must already exist at the
+    current schema version, and it is never locked for writing.
+    """
+    
+    def __init__(self, path, readers=2, pragmas=DEFAULT_PRAGMA_PROFILE, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self.closed = False
+        self.write_lock = threading.Lock()
+        self.idle = queue.LifoQueue()
+        if read_only:
+            if not os.path.isfile(path):
+                raise sqlite3.OperationalError(f"{path} does not exist")
+            self.write_conn = None
+            conn = connect(path, pragmas, read_only=True)
+            self.idle.put(conn)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < len(MIGRATIONS):
+                self.close()
+                raise sqlite3.OperationalError(
+                    f"{path} is at schema version {version}; open it once without read-only mode to upgrade it"
+                )
+            readers -= 1
+        else:
+            # Opened first, so the readers find the schema migrated and the journal mode set
+            self.write_conn = open_database(path, pragmas)
+        for _ in range(readers):
+            self.idle.put(connect(path, pragmas, read_only=True))
+    
+    @contextmanager
+    def reader(self):
+        if self.closed:
+            raise sqlite3.ProgrammingError("Cannot use a closed connection pool")
+        conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            if self.closed:
+                conn.close()
+            else:
+                self.idle.put(conn)
+    
+    @contextmanager
+    def writer(self, timeout=BUSY_TIMEOUT):
+        """Hold the writer connection, waiting up to `timeout` seconds for another thread to release it"""
+        if self.closed:
+            raise sqlite3.ProgrammingError("Cannot use a closed connection pool")
+        if self.read_only:
+            raise sqlite3.OperationalError("database is open read-only")
+        if not self.write_lock.acquire(timeout=timeout):
+            raise sqlite3.OperationalError("database is locked by another write")
+        try:
+            yield self.write_conn
+        finally:
+            self.write_lock.release()
+    
+    def close(self, timeout=BUSY_TIMEOUT):
+        """Close the idle connections now and the busy ones as they are returned.
+
+        The writer is closed once any write in progress finishes, or after
+        `timeout` seconds regardless.
+        """
+        self.closed = True
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+        if self.write_conn is None:
+            return
+        locked = self.write_lock.acquire(timeout=timeout)
+        try:
+            self.write_conn.close()
+        finally:
+            if locked:
+                self.write_lock.release()
+
+
+def parse_dates(values):
+    """Parse a Series of dates as spreadsheets and older versions of the app wrote them.
+
+    ISO dates, with or without a time of day, are read first; other strings
+    are then tried one at a time in whatever format each is in, month first
+    when ambiguous. Returns a datetime Series with NaT for values that are
+    not dates.
+    """
+    import pandas as pd
+    
+    dates = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    missing = dates.isna()
+    if missing.any():
+        # Numbers are not retried: they would be read as nanoseconds since 1970
+        text = values[missing].map(lambda value: isinstance(value, str))
+        retry = text.index[text.to_numpy(dtype=bool)]
+        if len(retry):
+            dates[retry] = pd.to_datetime(values[retry], errors="coerce", format="mixed")
+    return dates
+
+
+def migrate_normalize_dates(conn):
+    """Rewrite transaction dates as zero-padded YYYY-MM-DD so they sort and range-compare as text.
+
+    Dates with a time of day, as older versions of the importer stored Excel
+    dates, lose the time. Records whose date cannot be read at all are left
+    as they are; invalid_dates lists them.
+    """
+    import pandas as pd
+    
+    for table in ("expenses", "income"):
+        rows = conn.execute(INVALID_DATES_SQL.format(table=table)).fetchall()
+        if not rows:
+            continue
+        ids = pd.Series([row_id for row_id, _ in rows])
+        dates = parse_dates(pd.Series([date for _, date in rows], dtype=object))
+        valid = dates.notna()
+        conn.executemany(f"UPDATE {table} SET date=? WHERE id=?",
+                         zip(dates[valid].dt.strftime("%Y-%m-%d"), ids[valid].tolist()))
+
+
+def migrate_normalize_timestamps(conn):
+    """Normalize the dates that the first version of migrate_normalize_dates skipped.
+
+    It only read YYYY-MM-DD, so dates with a time of day survived it and
+    fell outside date ranges that end on their day. The summary triggers
+    move any record whose month changes.
+    """
+    migrate_normalize_dates(conn)
+
+
+def migrate_add_indexes(conn):
+    """Index transactions by date and by category/source"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date_amount ON expenses (date, amount)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses (category, date, amount)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_income_date_amount ON income (date, amount)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_income_source_date ON income (source, date, amount)")
+
+
+def migrate_amounts_to_cents(conn):
+    """Store amounts as INTEGER cents instead of REAL dollars"""
+    for table, label in (("expenses", "category"), ("income", "source")):
+        conn.execute(f"""
+            CREATE TABLE {table}_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT,
+                amount_cents INTEGER NOT NULL DEFAULT 0,
+                {label} TEXT,
+                description TEXT
+            )
+        """)
+        # Round in two steps so values like 0.285 * 100 = 28.4999... still land on 29
+        conn.execute(f"""
+            INSERT INTO {table}_new (id, date, amount_cents, {label}, description)
+            SELECT id, date, CAST(ROUND(ROUND(COALESCE(amount, 0) * 100, 4)) AS INTEGER), {label}, description
+            FROM {table}
+        """)
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    
+    conn.execute("CREATE INDEX idx_expenses_date_amount ON expenses (date, amount_cents)")
+    conn.execute("CREATE INDEX idx_expenses_category_date ON expenses (category, date, amount_cents)")
+    conn.execute("CREATE INDEX idx_income_date_amount ON income (date, amount_cents)")
+    conn.execute("CREATE INDEX idx_income_source_date ON income (source, date, amount_cents)")
+
+
+# Keep monthly_summary in step with every insert, delete and update of a transaction
+SUMMARY_ADD_SQL = """
+        INSERT INTO monthly_summary (month, kind, label_id, total_cents, row_count)
+        VALUES (substr(NEW.date, 1, 7), '{table}', NEW.{label}_id, NEW.amount_cents, 1)
+        ON CONFLICT (month, kind, label_id) DO UPDATE SET
+            total_cents = total_cents + excluded.total_cents,
+            row_count = row_count + 1;
+"""
+SUMMARY_REMOVE_SQL = """
+        UPDATE monthly_summary
+        SET total_cents = total_cents - OLD.amount_cents, row_count = row_count - 1
+        WHERE month = substr(OLD.date, 1, 7) AND kind = '{table}' AND label_id = OLD.{label}_id;
+        DELETE FROM monthly_summary
+        WHERE month = substr(OLD.date, 1, 7) AND kind = '{table}' AND label_id = OLD.{label}_id
+            AND row_count <= 0;
+"""
+SUMMARY_TRIGGERS = [
+    ("insert", "AFTER INSERT ON {table}", SUMMARY_ADD_SQL),
+    ("delete", "AFTER DELETE ON {table}", SUMMARY_REMOVE_SQL),
+    ("update", "AFTER UPDATE OF date, amount_cents, {label}_id ON {table}", SUMMARY_REMOVE_SQL + SUMMARY_ADD_SQL),
+]
+
+# Recomputes monthly_summary from the raw transactions
+SUMMARY_SOURCE_SQL = """
+    SELECT substr(date, 1, 7) AS month, 'expenses' AS kind, category_id AS label_id,
+        SUM(amount_cents) AS total_cents, COUNT(*) AS row_count
+    FROM expenses GROUP BY 1, 3
+    UNION ALL
+    SELECT substr(date, 1, 7), 'income', source_id, SUM(amount_cents), COUNT(*)
+    FROM income GROUP BY 1, 3
+"""
+
+# Keep each label's usage_count equal to the number of transactions filed under it
+USAGE_ADD_SQL = """
+        UPDATE {labels} SET usage_count = usage_count + 1 WHERE id = NEW.{label}_id;
+"""
+USAGE_REMOVE_SQL = """
+        UPDATE {labels} SET usage_count = usage_count - 1 WHERE id = OLD.{label}_id;
+"""
+USAGE_TRIGGERS = [
+    ("insert", "AFTER INSERT ON {table}", USAGE_ADD_SQL),
+    ("delete", "AFTER DELETE ON {table}", USAGE_REMOVE_SQL),
+    ("update", "AFTER UPDATE OF {label}_id ON {table}", USAGE_REMOVE_SQL + USAGE_ADD_SQL),
+]
+
+
+def create_summary_triggers(conn):
+    """Create the triggers that maintain monthly_summary and the label usage counts"""
+    for table, label in TRANSACTION_LABELS.items():
+        for kind, triggers in (("summary", SUMMARY_TRIGGERS), ("usage", USAGE_TRIGGERS)):
+            for name, event, body in triggers:
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{kind}_{name} {event} BEGIN {body} END"
+                    .format(table=table, label=label, labels=LABEL_TABLES[table])
+                )
+
+
+def rebuild_monthly_summary(conn):
+    """Recompute every monthly_summary row and label usage count from the expenses and income tables"""
+    conn.execute("DELETE FROM monthly_summary")
+    conn.execute(f"""
+        INSERT INTO monthly_summary (month, kind, label_id, total_cents, row_count)
+        {SUMMARY_SOURCE_SQL}
+    """)
+    for table, label in TRANSACTION_LABELS.items():
+        labels = LABEL_TABLES[table]
+        conn.execute(f"""
+            UPDATE {labels} SET usage_count = (
+                SELECT COUNT(*) FROM {table} WHERE {label}_id = {labels}.id
+            )
+        """)
+
+
+def verify_monthly_summary(conn):
+    """Compare monthly_summary and the label usage counts with the raw transactions.
+
+    Returns (month, kind, label, stored, actual) tuples for every key whose stored
+    (total_cents, row_count) differs from a fresh aggregation, and ("all", kind,
+    label, stored, actual) tuples for usage counts that are off; empty if in sync.
+    """
+    names = {
+        (kind, label_id): name
+        for kind, labels in LABEL_TABLES.items()
+        for label_id, name in conn.execute(f"SELECT id, name FROM {labels}")
+    }
+    stored = {
+        (month, kind, label_id): (total, count)
+        for month, kind, label_id, total, count in conn.execute(
+            "SELECT month, kind, label_id, total_cents, row_count FROM monthly_summary"
+        )
+    }
+    actual = {
+        (month, kind, label_id): (total, count)
+        for month, kind, label_id, total, count in conn.execute(SUMMARY_SOURCE_SQL)
+    }
+    
+    drift = []
+    for month, kind, label_id in sorted(stored.keys() | actual.keys()):
+        key = (month, kind, label_id)
+        if stored.get(key) != actual.get(key):
+            drift.append((month, kind, names.get((kind, label_id), label_id), stored.get(key), actual.get(key)))
+    
+    for table, label in TRANSACTION_LABELS.items():
+        for name, usage, count in conn.execute(f"""
+            SELECT l.name, l.usage_count, COUNT(t.id) FROM {LABEL_TABLES[table]} AS l
+            LEFT JOIN {table} AS t ON t.{label}_id = l.id GROUP BY l.id
+        """):
+            if usage != count:
+                drift.append(("all", table, name, usage, count))
+    return drift
+
+
+def migrate_add_monthly_summary(conn):
+    """Add the trigger-maintained monthly_summary table.
+
+    This is the schema 4 layout, keyed by label text; migrate_add_label_tables
+    replaces it, so the SQL here is frozen rather than shared.
+    """
+    conn.execute("""
+        CREATE TABLE monthly_summary (
+            month TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            label TEXT NOT NULL,
+            total_cents INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            PRIMARY KEY (month, kind, label)
+        ) WITHOUT ROWID
+    """)
+    add = """
+        INSERT INTO monthly_summary (month, kind, label, total_cents, row_count)
+        VALUES (substr(NEW.date, 1, 7), '{table}', COALESCE(NEW.{label}, ''), NEW.amount_cents, 1)
+        ON CONFLICT (month, kind, label) DO UPDATE SET
+            total_cents = total_cents + excluded.total_cents,
+            row_count = row_count + 1;
+    """
+    remove = """
+        UPDATE monthly_summary
+        SET total_cents = total_cents - OLD.amount_cents, row_count = row_count - 1
+        WHERE month = substr(OLD.date, 1, 7) AND kind = '{table}' AND label = COALESCE(OLD.{label}, '');
+        DELETE FROM monthly_summary
+        WHERE month = substr(OLD.date, 1, 7) AND kind = '{table}' AND label = COALESCE(OLD.{label}, '')
+            AND row_count <= 0;
+    """
+    triggers = [
+        ("insert", "AFTER INSERT ON {table}", add),
+        ("delete", "AFTER DELETE ON {table}", remove),
+        ("update", "AFTER UPDATE OF date, amount_cents, {label} ON {table}", remove + add),
+    ]
+    for table, label in TRANSACTION_LABELS.items():
+        for name, event, body in triggers:
+            conn.execute(
+                f"CREATE TRIGGER trg_{table}_summary_{name} {event} BEGIN {body} END"
+                .format(table=table, label=label)
+            )
+        conn.execute(f"""
+            INSERT INTO monthly_summary (month, kind, label, total_cents, row_count)
+            SELECT substr(date, 1, 7), '{table}', COALESCE({label}, ''), SUM(amount_cents), COUNT(*)
+            FROM {table} GROUP BY 1, 3
+        """)
+
+
+def migrate_add_keyset_indexes(conn):
+    """Index transactions by date for keyset pagination.
+
+    SQLite appends the rowid to every index, so these cover the (date, id)
+    cursor used by the transaction browser.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_income_date ON income (date)")
+
+
+def migrate_add_search_index(conn):
+    """Add FTS5 indexes over transaction descriptions, kept in sync by triggers"""
+    for table in TRANSACTION_LABELS:
+        # External content: the index stores only tokens, rows stay in the table
+        conn.execute(f"CREATE VIRTUAL TABLE {table}_fts USING fts5("
+                     f"description, content='{table}', content_rowid='id', prefix='2 3')")
+        conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+    create_transaction_search_triggers(conn)
+
+
+def migrate_add_label_tables(conn):
+    """Move categories and sources into registry tables referenced by integer id.
+
+    Rebuilds expenses and income with a {label}_id foreign key in place of the
+    label text, and monthly_summary keyed by label_id. Row ids are kept, so
+    the external-content search indexes stay valid.
+    """
+    for table, label in TRANSACTION_LABELS.items():
+        labels = LABEL_TABLES[table]
+        conn.execute(f"""
+            CREATE TABLE {labels} (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                usage_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        register_labels(conn, table, DEFAULT_LABELS[table])
+        conn.execute(f"INSERT OR IGNORE INTO {labels} (name) SELECT DISTINCT COALESCE({label}, '') FROM {table}")
+        
+        conn.execute(f"""
+            CREATE TABLE {table}_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT,
+                amount_cents INTEGER NOT NULL DEFAULT 0,
+                {label}_id INTEGER NOT NULL REFERENCES {labels} (id),
+                description TEXT
+            )
+        """)
+        conn.execute(f"""
+            INSERT INTO {table}_new (id, date, amount_cents, {label}_id, description)
+            SELECT t.id, t.date, t.amount_cents, l.id, t.description
+            FROM {table} AS t JOIN {labels} AS l ON l.name = COALESCE(t.{label}, '')
+        """)
+        # Dropping the table drops its indexes and triggers too
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        
+        conn.execute(f"CREATE INDEX idx_{table}_date ON {table} (date)")
+        conn.execute(f"CREATE INDEX idx_{table}_date_amount ON {table} (date, amount_cents)")
+    conn.execute("CREATE INDEX idx_expenses_category_date ON expenses (category_id, date, amount_cents)")
+    conn.execute("CREATE INDEX idx_income_source_date ON income (source_id, date, amount_cents)")
+    
+    conn.execute("DROP TABLE monthly_summary")
+    conn.execute("""
+        CREATE TABLE monthly_summary (
+            month TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            label_id INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            PRIMARY KEY (month, kind, label_id)
+        ) WITHOUT ROWID
+    """)
+    create_summary_triggers(conn)
+    create_transaction_search_triggers(conn)
+    rebuild_monthly_summary(conn)
+
+
+def migrate_intern_descriptions(conn):
+    """Store each distinct description once and refer to it by id.
+
+    Rebuilds expenses and income with a description_id column in place of the
+    description text, and replaces the per-table search indexes with a single
+    one over the descriptions table. Row ids, labels and amounts are copied
+    unchanged, so monthly_summary and the usage counts stay valid.
+    """
+    conn.execute("""
+        CREATE TABLE descriptions (
+            id INTEGER PRIMARY KEY,
+            text TEXT NOT NULL UNIQUE
+        )
+    """)
+    for table, label in TRANSACTION_LABELS.items():
+        conn.execute(f"""
+            INSERT OR IGNORE INTO descriptions (text)
+            SELECT description FROM {table} WHERE description IS NOT NULL ORDER BY id
+        """)
+        conn.execute(f"DROP TABLE {table}_fts")
+        
+        conn.execute(f"""
+            CREATE TABLE {table}_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT,
+                amount_cents INTEGER NOT NULL DEFAULT 0,
+                {label}_id INTEGER NOT NULL REFERENCES {LABEL_TABLES[table]} (id),
+                description_id INTEGER REFERENCES descriptions (id)
+            )
+        """)
+        conn.execute(f"""
+            INSERT INTO {table}_new (id, date, amount_cents, {label}_id, description_id)
+            SELECT t.id, t.date, t.amount_cents, t.{label}_id, d.id
+            FROM {table} AS t LEFT JOIN descriptions AS d ON d.text = t.description
+        """)
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        
+        conn.execute(f"CREATE INDEX idx_{table}_date ON {table} (date)")
+        conn.execute(f"CREATE INDEX idx_{table}_date_amount ON {table} (date, amount_cents)")
+        conn.execute(f"CREATE INDEX idx_{table}_{label}_date ON {table} ({label}_id, date, amount_cents)")
+        # Finds the records of a search hit and tells prune_descriptions whether a text is still used
+        conn.execute(f"CREATE INDEX idx_{table}_description ON {table} (description_id)")
+    
+    conn.execute("CREATE VIRTUAL TABLE descriptions_fts USING fts5("
+                 "text, content='descriptions', content_rowid='id', prefix='2 3')")
+    conn.execute("INSERT INTO descriptions_fts (descriptions_fts) VALUES ('rebuild')")
+    create_search_triggers(conn)
+    create_summary_triggers(conn)
+
+
+def migrate_add_range_indexes(conn):
+    """Cover the label in the (date, amount) indexes for range reports.
+    
+    RANGE_TOTALS_SQL groups by date and label; without the label in the index
+    every record in the range costs a table lookup and the groups a sort.
+    The new index serves every query the old one did.
+    """
+    for table, label in TRANSACTION_LABELS.items():
+        conn.execute(f"DROP INDEX idx_{table}_date_amount")
+        conn.execute(f"CREATE INDEX idx_{table}_date_label ON {table} (date, {label}_id, amount_cents)")
+
+
+# Schema migrations in the order they are applied. PRAGMA user_version holds the
+# number of migrations already applied, so only append to this list.
+MIGRATIONS = [
+    migrate_normalize_dates,
+    migrate_add_indexes,
+    migrate_amounts_to_cents,
+    migrate_add_monthly_summary,
+    migrate_add_keyset_indexes,
+    migrate_add_search_index,
+    migrate_add_label_tables,
+    migrate_intern_descriptions,
+    migrate_add_range_indexes,
+    migrate_normalize_timestamps,
+]
+
+
+def migrate_database(conn, target=None):
+    """Apply any pending schema migrations, each in its own transaction.
+
+    target stops at an earlier schema version, for benchmarks that compare
+    layouts. Returns the resulting schema version.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:target], start=version + 1):
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = number
+    return version
+
+
+def invalid_dates(conn):
+    """Return (table, id, date) for every record whose date is not a valid YYYY-MM-DD.
+
+    migrate_normalize_dates leaves these as it finds them. Monthly figures
+    count them under the first seven characters of the date; date range
+    reports cannot place them.
+    """
+    return [
+        (table, row_id, date)
+        for table in TRANSACTION_LABELS
+        for row_id, date in conn.execute(INVALID_DATES_SQL.format(table=table))
+    ]
+
+
+def explain_query_plans(conn):
+    """Run EXPLAIN QUERY PLAN over the dashboard and report queries.
+
+    Returns (name, plan details, full_scan) tuples, where full_scan is True if
+    any step walks a whole table or a whole index: a covering index scan still
+    costs time in proportion to the table. Full-text index lookups are not
+    scans.
+    """
+    month_range = ("2000-01", "2000-02")
+    queries = [
+        ("Monthly totals", MONTHLY_TOTALS_SQL, month_range),
+        ("Expenses by category", EXPENSE_CATEGORY_SQL, month_range),
+        ("Income by source", INCOME_SOURCE_SQL, month_range),
+        ("Expenses page", transaction_page_sql("expenses", "<"), ("2000-01-01", 0, 25)),
+        ("Income page", transaction_page_sql("income", "<"), ("2000-01-01", 0, 25)),
+        ("Expenses scroll position", TRANSACTION_KEY_AT_SQL.format(table="expenses"), ("2000-01", "2000-02", 0)),
+        ("Expenses search", search_transaction_sql("expenses"), ('"rent"*',)),
+        ("Expenses search by date and category",
+         search_transaction_sql("expenses", "2000-01-01", "2000-12-31", "Other"),
+         ('"rent"*', "2000-01-01", "2000-12-31", "Other")),
+        ("Category in use", LABEL_USAGE_SQL.format(labels="categories"), ("Other",)),
+        ("Expenses range", RANGE_TOTALS_SQL.format(table="expenses", label="category"),
+         ("2000-01-01", "2000-12-31")),
+    ]
+    
+    report = []
+    for name, sql, params in queries:
+        details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        full_scan = any(detail.startswith("SCAN") and "VIRTUAL TABLE" not in detail for detail in details)
+        report.append((name, details, full_scan))
+    return report
+
+
+# Spreadsheet columns accepted for each table, in insert order
+IMPORT_COLUMNS = {
+    "expenses": ["Date", "Amount", "Category", "Description"],
+    "income": ["Date", "Amount", "Source", "Description"],
+}
+IMPORT_SHEETS = [("expenses", "Expenses"), ("income", "Income")]
+IMPORT_BATCH_SIZE = 5000
+# Rows read from a file at a time when streaming; bounds import memory use
+IMPORT_CHUNK_SIZE = 20000
+# Skipped rows beyond this are counted but not kept
+IMPORT_MAX_ERRORS = 1000
+
+
+def prepare_import_frame(df, table, first_row=2):
+    """Validate and coerce an import DataFrame a column at a time.
+
+    Returns (rows, row_numbers, errors): insert-ready (date, cents, label,
+    description) tuples, the spreadsheet row number of each of them, and
+    (row number, message) pairs for rows that were skipped. `first_row` is the
+    spreadsheet row number of the first record.
+    """
+    import numpy as np
+    import pandas as pd
+    
+    date_column, amount_column, label_column, description_column = IMPORT_COLUMNS[table]
+    
+    # Completely empty rows (e.g. trailing formatted cells) are ignored
+    blank = df[IMPORT_COLUMNS[table]].isna().all(axis=1)
+    
+    # Not one format for the whole column: it would be guessed from the first row
+    dates = parse_dates(df[date_column])
+    amounts = pd.to_numeric(df[amount_column], errors="coerce")
+    
+    # Round half away from zero to whole cents, after trimming float noise
+    scaled = (amounts * 100).round(4)
+    cents = np.sign(scaled) * np.floor(scaled.abs() + 0.5)
+    
+    labels = df[label_column].fillna("").astype(str).str.strip()
+    descriptions = df[description_column].fillna("").astype(str)
+    
+    bad_date = dates.isna()
+    bad_amount = ~np.isfinite(cents)
+    valid = ~(bad_date | bad_amount)
+    invalid = ~valid & ~blank
+    
+    errors = []
+    row_numbers = np.arange(first_row, first_row + len(df))
+    valid_mask = valid.to_numpy()
+    for row_number, no_date, no_amount in zip(row_numbers[invalid.to_numpy()],
+                                              bad_date[invalid].to_numpy(),
+                                              bad_amount[invalid].to_numpy()):
+        reasons = [reason for reason, bad in (("invalid date", no_date), ("invalid amount", no_amount)) if bad]
+        errors.append((int(row_number), ", ".join(reasons)))
+    
+    rows = list(zip(
+        dates[valid].dt.strftime("%Y-%m-%d"),
+        cents[valid].astype("int64").tolist(),
+        labels[valid],
+        descriptions[valid],
+    ))
+    return rows, row_numbers[valid_mask].tolist(), errors
+
+
+def insert_batches(conn, table, rows, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Insert prepared rows with executemany in batches of `batch_size`.
+
+    Must run inside an open transaction. A batch that fails is retried row by
+    row so one bad record does not discard its neighbours. `progress` is called
+    with the number of rows handled so far. Returns (inserted, errors) where
+    errors are (index into rows, message) pairs.
+    """
+    sql = transaction_insert_sql(table)
+    inserted = 0
+    errors = []
+    for offset in range(0, len(rows), batch_size):
+        batch = rows[offset:offset + batch_size]
+        # Outside the savepoint, so a failed batch retried row by row still finds them
+        register_labels(conn, table, (row[2] for row in batch))
+        register_descriptions(conn, (row[3] for row in batch))
+        conn.execute("SAVEPOINT import_batch")
+        try:
+            conn.executemany(sql, batch)
+            inserted += len(batch)
+        except sqlite3.Error:
+            conn.execute("ROLLBACK TO import_batch")
+            for index, row in enumerate(batch, start=offset):
+                try:
+                    conn.execute(sql, row)
+                    inserted += 1
+                except sqlite3.Error as e:
+                    errors.append((index, str(e)))
+        conn.execute("RELEASE import_batch")
+        
+        if progress:
+            progress(offset + len(batch))
+    return inserted, errors
+
+
+def iter_csv_chunks(file_path, chunksize=IMPORT_CHUNK_SIZE):
+    """Yield (table, DataFrame) chunks from a CSV file, picking the table from its header"""
+    import pandas as pd
+    
+    columns = pd.read_csv(file_path, nrows=0).columns
+    for table, required_columns in IMPORT_COLUMNS.items():
+        if all(col in columns for col in required_columns):
+            yield from ((table, chunk) for chunk in
+                        pd.read_csv(file_path, usecols=required_columns, chunksize=chunksize))
+            return
+
+
+def iter_xlsx_chunks(file_path, chunksize=IMPORT_CHUNK_SIZE):
+    """Yield (table, DataFrame) chunks from the Expenses and Income sheets of an xlsx file.
+
+    The workbook is opened read-only, so rows are parsed as they are iterated
+    rather than loading whole sheets.
+    """
+    import pandas as pd
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for table, sheet_name in IMPORT_SHEETS:
+            if sheet_name not in workbook.sheetnames:
+                continue
+            rows = workbook[sheet_name].iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header or not all(col in header for col in IMPORT_COLUMNS[table]):
+                continue
+            while True:
+                batch = list(islice(rows, chunksize))
+                if not batch:
+                    break
+                yield table, pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def iter_import_chunks(file_path, chunksize=IMPORT_CHUNK_SIZE):
+    """Yield (table, DataFrame) chunks of bounded size from a CSV or Excel file"""
+    import pandas as pd
+    
+    lower_path = file_path.lower()
+    if lower_path.endswith(".csv"):
+        yield from iter_csv_chunks(file_path, chunksize)
+    elif lower_path.endswith((".xlsx", ".xlsm")):
+        yield from iter_xlsx_chunks(file_path, chunksize)
+    else:
+        # Legacy .xls workbooks cannot be streamed; read each sheet whole
+        xls = pd.ExcelFile(file_path)
+        for table, sheet_name in IMPORT_SHEETS:
+            if sheet_name in xls.sheet_names:
+                df = pd.read_excel(xls, sheet_name=sheet_name)
+                if all(col in df.columns for col in IMPORT_COLUMNS[table]):
+                    yield table, df
+
+
+def bulk_import(conn, chunks, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Import (table, DataFrame) chunks in a single transaction.
+
+    `chunks` may be a generator such as iter_import_chunks(), so only one chunk
+    is held in memory at a time. `progress` is called with the table and the
+    number of its rows handled so far.
+
+    Returns a dict with per-table "imported" counts, the first IMPORT_MAX_ERRORS
+    skipped rows as (table, row number, message) "errors", the total
+    "error_count", elapsed "seconds" and overall "rows_per_sec".
+    """
+    started = time.perf_counter()
+    result = {"imported": {}, "errors": [], "error_count": 0}
+    next_row = {}
+    
+    def record_errors(errors):
+        result["error_count"] += len(errors)
+        room = IMPORT_MAX_ERRORS - len(result["errors"])
+        if room > 0:
+            result["errors"].extend(errors[:room])
+    
+    conn.execute("BEGIN")
+    try:
+        for table, df in chunks:
+            # Spreadsheet row numbers continue across chunks of the same table
+            first_row = next_row.get(table, 2)
+            next_row[table] = first_row + len(df)
+            
+            rows, row_numbers, errors = prepare_import_frame(df, table, first_row)
+            record_errors([(table, row_number, message) for row_number, message in errors])
+            
+            chunk_progress = None
+            if progress:
+                handled_before = first_row - 2 + len(df) - len(rows)
+                chunk_progress = lambda done: progress(table, handled_before + done)
+            
+            inserted, insert_errors = insert_batches(conn, table, rows, batch_size, chunk_progress)
+            result["imported"][table] = result["imported"].get(table, 0) + inserted
+            record_errors([(table, row_numbers[index], message) for index, message in insert_errors])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    result["seconds"] = time.perf_counter() - started
+    total = sum(result["imported"].values())
+    result["rows_per_sec"] = total / result["seconds"] if result["seconds"] > 0 else 0
+    return result
@@ -0,0 +1,307 @@
+"""Excel reports and exports for the Personal Finance Tracker.
+
+Every figure is read through FinanceService, so the GUI and the
+command-line tool write identical files. pandas, openpyxl and pyarrow are
+imported inside the functions that need them.
+
+Table exports stream: records are read from the database in chunks of
+EXPORT_CHUNK_SIZE and each chunk is written out before the next is read,
+so memory use does not grow with the size of the tables. The file format
+follows the extension of the output path; see EXPORT_FORMATS.
+"""
+import calendar
+import csv
+import os
+import sys
+import time
+from itertools import chain
+from typing import NamedTuple, Optional
+
+from finance_db import Money, period_label
+
+# Sheet columns of an exported transaction, by table
+EXPORT_COLUMNS = {
+    "expenses": ['Date', 'Amount', 'Category', 'Description'],
+    "income": ['Date', 'Amount', 'Source', 'Description'],
+}
+
+# Records read from the database and written out per step
+EXPORT_CHUNK_SIZE = 10000
+
+# File types a table export can write, by extension
+EXPORT_FORMATS = {
+    ".xlsx": "Excel workbook",
+    ".csv": "CSV file",
+    ".parquet": "Parquet file",
+}
+
+
+class ExportStats(NamedTuple):
+    """Size and speed of one export.
+    
+    peak_rss is the process peak (high-water mark) when the export ended
+    and baseline_rss the peak when it started, so their difference is how
+    far the export raised it; both are None where the platform does not
+    report them.
+    """
+    rows: int
+    seconds: float
+    peak_rss: Optional[int]
+    baseline_rss: Optional[int] = None
+    
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+    
+    def describe(self):
+        text = f"{self.rows:,} rows in {self.seconds:.1f}s ({self.rows_per_second:,.0f} rows/sec)"
+        if self.peak_rss is not None:
+            if self.baseline_rss is not None:
+                text += f", memory +{(self.peak_rss - self.baseline_rss) / 2 ** 20:,.0f} MB"
+            text += f", process peak {self.peak_rss / 2 ** 20:,.0f} MB"
+        return text
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes, or None if unavailable"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def export_format(file_path):
+    """Return the EXPORT_FORMATS extension of `file_path`, or raise ValueError"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Cannot export to '{extension or file_path}' files, "
+                         f"expected one of {', '.join(EXPORT_FORMATS)}")
+    return extension
+
+
+def transaction_records(transactions):
+    """Rows of (date, amount, label, description) with float amounts for a sheet"""
+    return [(t.date, float(t.amount), t.label, t.description) for t in transactions]
+
+
+def record_chunks(service, table, progress=None):
+    """Yield transaction_records of `table`, newest first, EXPORT_CHUNK_SIZE records at a time.
+    
+    `progress` is called with the table and the number of records read so far.
+    """
+    done = 0
+    for chunk in service.transaction_chunks(table, EXPORT_CHUNK_SIZE, newest_first=True):
+        done += len(chunk)
+        if progress:
+            progress(table, done)
+        yield transaction_records(chunk)
+
+
+def stream_xlsx(file_path, sheets, skip_empty=False):
+    """Write (sheet name, columns, row chunks) sheets to a workbook; returns the rows written.
+    
+    openpyxl's write-only mode sends each row to disk as it is appended
+    instead of building the worksheet in memory. With skip_empty, sheets
+    without rows are left out.
+    """
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    rows = 0
+    for name, columns, chunks in sheets:
+        chunks = iter(chunks)
+        first = next(chunks, [])
+        if skip_empty and not first:
+            continue
+        sheet = workbook.create_sheet(name)
+        sheet.append(columns)
+        for chunk in chain([first], chunks):
+            for row in chunk:
+                sheet.append(row)
+            rows += len(chunk)
+    workbook.save(file_path)
+    return rows
+
+
+def stream_csv(file_path, columns, chunks):
+    """Write a header and row chunks to a UTF-8 CSV file; returns the rows written"""
+    rows = 0
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def stream_parquet(file_path, columns, chunks):
+    """Write (date, amount, label, description) row chunks to a Parquet file, one row group per chunk"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export needs the pyarrow package") from None
+    
+    date, amount, label, description = columns
+    schema = pa.schema([(date, pa.string()), (amount, pa.float64()),
+                        (label, pa.string()), (description, pa.string())])
+    rows = 0
+    with pq.ParquetWriter(file_path, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)],
+                schema=schema
+            ))
+            rows += len(chunk)
+    return rows
+
+
+def stream_table(file_path, columns, chunks):
+    """Write one table's row chunks in the format of file_path's extension; returns the rows written"""
+    extension = export_format(file_path)
+    if extension == ".xlsx":
+        return stream_xlsx(file_path, [("Sheet1", columns, chunks)])
+    if extension == ".csv":
+        return stream_csv(file_path, columns, chunks)
+    return stream_parquet(file_path, columns, chunks)
+
+
+def write_monthly_report(service, month, year, file_path):
+    """Write a month's summary, expenses and income to an Excel workbook"""
+    import pandas as pd
+    
+    # Get the month's transactions, oldest first
+    expenses = service.month_transactions("expenses", month, year)
+    incomes = service.month_transactions("income", month, year)
+    
+    # Get totals
+    totals = service.monthly_totals(year, month, 1)
+    
+    # Create Excel writer
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        # Create summary sheet
+        summary_data = {
+            'Metric': ['Total Income', 'Total Expenses', 'Net Savings'],
+            'Amount': [
+                float(Money(totals.income[0])),
+                float(Money(totals.expenses[0])),
+                float(Money(totals.savings[0]))
+            ]
+        }
+        
+        summary_df = pd.DataFrame(summary_data)
+        summary_df.to_excel(writer, sheet_name='Summary', index=False)
+        
+        # Create expenses sheet
+        if expenses:
+            expense_df = pd.DataFrame(
+                [(t.date, t.label, float(t.amount), t.description) for t in expenses],
+                columns=['Date', 'Category', 'Amount', 'Description']
+            )
+            expense_df.to_excel(writer, sheet_name='Expenses', index=False)
+        
+        # Create income sheet
+        if incomes:
+            income_df = pd.DataFrame(
+                [(t.date, t.label, float(t.amount), t.description) for t in incomes],
+                columns=['Date', 'Source', 'Amount', 'Description']
+            )
+            income_df.to_excel(writer, sheet_name='Income', index=False)
+
+
+def write_annual_report(service, year, file_path):
+    """Write a year's monthly summary and category/source totals to an Excel workbook"""
+    import pandas as pd
+    
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        # Create monthly summary sheet
+        totals = service.annual_report(year)
+        monthly_data = [
+            [calendar.month_name[month], income / 100, expense / 100, savings / 100]
+            for (_, month), income, expense, savings
+            in zip(totals.months, totals.income, totals.expenses, totals.savings)
+        ]
+        
+        # Create monthly summary dataframe
+        monthly_df = pd.DataFrame(monthly_data, columns=['Month', 'Income', 'Expenses', 'Savings'])
+        monthly_df.to_excel(writer, sheet_name='Monthly Summary', index=False)
+        
+        # Create expense categories sheet
+        category_data = [(item.label, float(item.amount)) for item in service.expenses_by_category(year, 1, 12)]
+        
+        if category_data:
+            category_df = pd.DataFrame(category_data, columns=['Category', 'Total Amount'])
+            category_df.to_excel(writer, sheet_name='Expense Categories', index=False)
+        
+        # Create income sources sheet
+        source_data = [(item.label, float(item.amount)) for item in service.income_by_source(year, 1, 12)]
+        
+        if source_data:
+            source_df = pd.DataFrame(source_data, columns=['Source', 'Total Amount'])
+            source_df.to_excel(writer, sheet_name='Income Sources', index=False)
+
+
+def write_range_report(service, start_date, end_date, granularity, file_path):
+    """Write per-period totals and category/source totals between two dates to an Excel workbook"""
+    import pandas as pd
+    
+    totals = service.range_totals(start_date, end_date, granularity)
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        period_data = [
+            [period_label(period, granularity), income / 100, expense / 100, savings / 100]
+            for period, income, expense, savings
+            in zip(totals.periods, totals.income, totals.expenses, totals.savings)
+        ]
+        period_df = pd.DataFrame(period_data, columns=['Period', 'Income', 'Expenses', 'Savings'])
+        period_df.to_excel(writer, sheet_name='Summary', index=False)
+        
+        category_data = [(item.label, float(item.amount)) for item in totals.expenses_by_category]
+        if category_data:
+            category_df = pd.DataFrame(category_data, columns=['Category', 'Total Amount'])
+            category_df.to_excel(writer, sheet_name='Expense Categories', index=False)
+        
+        source_data = [(item.label, float(item.amount)) for item in totals.income_by_source]
+        if source_data:
+            source_df = pd.DataFrame(source_data, columns=['Source', 'Total Amount'])
+            source_df.to_excel(writer, sheet_name='Income Sources', index=False)
+
+
+def write_table_export(service, data_type, file_path, progress=None) -> ExportStats:
+    """Stream every expense or income record to an Excel, CSV or Parquet file; see record_chunks for progress"""
+    export_format(file_path)
+    baseline = peak_rss()
+    started = time.perf_counter()
+    rows = stream_table(file_path, EXPORT_COLUMNS[data_type], record_chunks(service, data_type, progress))
+    return ExportStats(rows, time.perf_counter() - started, peak_rss(), baseline)
+
+
+def write_all_data(service, file_path, progress=None) -> ExportStats:
+    """Stream expenses, income and settings to one Excel workbook.
+    
+    For a CSV or Parquet path each table goes to its own file instead,
+    named after the path with _expenses or _income added; settings are
+    only written to workbooks.
+    """
+    extension = export_format(file_path)
+    baseline = peak_rss()
+    started = time.perf_counter()
+    
+    if extension == ".xlsx":
+        budget = service.get_budget()
+        settings = [[('Monthly Budget', float(budget) if budget else 'Not set')]]
+        rows = stream_xlsx(file_path, [
+            ('Expenses', EXPORT_COLUMNS["expenses"], record_chunks(service, "expenses", progress)),
+            ('Income', EXPORT_COLUMNS["income"], record_chunks(service, "income", progress)),
+            ('Settings', ['Setting', 'Value'], settings),
+        ], skip_empty=True) - len(settings[0])  # Count records, not settings
+    else:
+        root = os.path.splitext(file_path)[0]
+        rows = sum(
+            stream_table(f"{root}_{table}{extension}", EXPORT_COLUMNS[table], record_chunks(service, table, progress))
+            for table in EXPORT_COLUMNS
+        )
+    return ExportStats(rows, time.perf_counter() - started, peak_rss(), baseline)
@@ -0,0 +1,235 @@
+"""Report charts rendered to PNG images, and a cache of them.
+
+Drawing a matplotlib figure takes far longer than showing a finished
+image, and a report chart only changes when its numbers or its size do. The
+draw_* functions below draw the report charts onto a bare Figure, without
+pyplot or Tk, so a background worker can render them; RenderCache keeps the
+resulting PNG bytes under a hash of the drawing function, its arguments and
+the pixel size. Reports viewed before, in this session or an earlier one,
+are then shown straight from the cache.
+
+The cache holds recently used images in memory and writes every image to a
+directory next to the database, both capped in bytes; on disk the least
+recently used files are deleted first. Bump RENDER_VERSION whenever a
+draw_* function changes so images drawn by the old code are not reused.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+RENDER_VERSION = 1
+RENDER_DPI = 100
+# Bytes of PNG images kept in memory and on disk
+RENDER_MEMORY_LIMIT = 32 * 2 ** 20
+RENDER_DISK_LIMIT = 128 * 2 ** 20
+
+
+def render_cache_directory(db_path):
+    """Return the default chart cache directory of the database at db_path"""
+    return f"{db_path}.charts"
+
+
+def render_key(draw, args, width, height, dpi=RENDER_DPI):
+    """Return the cache key of the image draw(figure, *args) makes at width x height pixels"""
+    inputs = json.dumps([RENDER_VERSION, draw.__name__, args, width, height, dpi], default=str)
+    return hashlib.sha256(inputs.encode("utf-8")).hexdigest()
+
+
+def render_png(draw, args, width, height, dpi=RENDER_DPI) -> bytes:
+    """Draw draw(figure, *args) on a new width x height pixel figure and return it as PNG bytes"""
+    from matplotlib.figure import Figure
+    
+    figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    draw(figure, *args)
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+class RenderCache:
+    """PNG images by render_key, in an LRU in memory and, if `directory` is given, on disk"""
+    
+    def __init__(self, directory=None, memory_limit=RENDER_MEMORY_LIMIT, disk_limit=RENDER_DISK_LIMIT):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._images = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, draw, args, width, height, dpi=RENDER_DPI) -> bytes:
+        """Return the PNG of draw(figure, *args) at width x height, drawing it only if not cached"""
+        key = render_key(draw, args, width, height, dpi)
+        png = self.get(key)
+        if png is None:
+            png = render_png(draw, args, width, height, dpi)
+            self.put(key, png)
+        return png
+    
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return png
+        png = self.read_file(key)
+        with self._lock:
+            if png is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.remember(key, png)
+        return png
+    
+    def put(self, key, png):
+        with self._lock:
+            self.remember(key, png)
+        self.write_file(key, png)
+    
+    def remember(self, key, png):
+        # Called with the lock held
+        if key in self._images:
+            self._memory_bytes -= len(self._images.pop(key))
+        self._images[key] = png
+        self._memory_bytes += len(png)
+        while self._memory_bytes > self.memory_limit and len(self._images) > 1:
+            _, evicted = self._images.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+    
+    def describe(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (f"{self.hits:,} of {lookups:,} charts cached ({rate:.0%}), "
+                f"{self._memory_bytes / 2 ** 20:,.1f} MB in memory")
+    
+    # Disk
+    
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+    
+    def read_file(self, key) -> Optional[bytes]:
+        if not self.directory:
+            return None
+        try:
+            with open(self.path(key), "rb") as f:
+                png = f.read()
+            # The modification time orders files for eviction
+            os.utime(self.path(key))
+        except OSError:
+            return None
+        return png
+    
+    def write_file(self, key, png):
+        """Save an image and trim the directory to disk_limit; the cache works without it, so errors are ignored"""
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Written under a temporary name, so readers never see half a file
+            temporary = f"{self.path(key)}.{threading.get_ident()}.tmp"
+            with open(temporary, "wb") as f:
+                f.write(png)
+            os.replace(temporary, self.path(key))
+            with self._lock:
+                if self._disk_bytes is None:
+                    self._disk_bytes = sum(size for _, size, _ in self.disk_files())
+                else:
+                    self._disk_bytes += len(png)
+                if self._disk_bytes > self.disk_limit:
+                    self.trim_disk()
+        except OSError:
+            pass
+    
+    def disk_files(self):
+        """Return (modification time, size, path) of every cached image file"""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".png"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+    
+    def trim_disk(self):
+        # Called with the lock held; keeps the most recently used files up to three quarters of the limit
+        files = sorted(self.disk_files())
+        self._disk_bytes = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if self._disk_bytes <= self.disk_limit * 3 // 4:
+                break
+            os.remove(path)
+            self._disk_bytes -= size
+
+
+# Report charts. Each draws onto a bare Figure from plain lists, so its
+# arguments are all there is to hash.
+
+def draw_pie(figure, labels, sizes, colormap, title):
+    """Pie chart of sizes, colored from a matplotlib colormap name"""
+    import numpy as np
+    from matplotlib import colormaps
+    
+    ax = figure.add_subplot()
+    colors = colormaps[colormap](np.linspace(0, 1, len(labels)))
+    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
+    ax.axis('equal')
+    ax.set_title(title)
+    # Room for the labels around the pie
+    figure.subplots_adjust(left=0.25, right=0.75, bottom=0.1, top=0.85)
+
+
+def draw_annual_trend(figure, months, series, title):
+    """Grouped monthly bars with their values; series holds (label, dollar amounts, color)"""
+    import numpy as np
+    
+    ax = figure.add_subplot()
+    x = np.arange(len(months))
+    width = 0.3
+    for offset, (label, values, color) in zip((-width, 0, width), series):
+        bars = ax.bar(x + offset, values, width, label=label, color=color)
+        # Add value labels on top of bars
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width() / 2., height, f'${height:,.0f}',
+                    ha='center', va='bottom', fontsize=8)
+    
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Amount ($)')
+    ax.set_title(title)
+    ax.set_xticks(x)
+    ax.set_xticklabels(months)
+    ax.legend()
+    ax.tick_params(axis='x', labelrotation=45)
+    figure.tight_layout()
+
+
+def draw_range_trend(figure, periods, series, title):
+    """Bars per period while they stay readable, lines for long ranges; series as in draw_annual_trend"""
+    import numpy as np
+    
+    ax = figure.add_subplot()
+    x = np.arange(len(periods))
+    if len(x) <= 24:
+        width = 0.3
+        for offset, (label, values, color) in zip((-width, 0, width), series):
+            ax.bar(x + offset, values, width, label=label, color=color)
+    else:
+        for label, values, color in series:
+            ax.plot(x, values, label=label, color=color, linewidth=1)
+    
+    # At most about 12 period labels along the axis
+    step = max(1, len(x) // 12)
+    ax.set_xticks(x[::step])
+    ax.set_xticklabels(periods[::step])
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.set_ylabel('Amount ($)')
+    ax.set_title(title)
+    ax.legend()
+    figure.tight_layout()
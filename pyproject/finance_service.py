@@ -0,0 +1,632 @@
+"""Data access for the Personal Finance Tracker, independent of any UI.
+
+FinanceService wraps a connection pool and answers every question the
+GUI, the command-line tool and the report and export writers ask of the
+database: transactions, settings, categories and sources, and aggregates. Results come
+back as the record types below rather than raw rows, so callers never see
+SQL or column order and the queries can be cached, pooled or benchmarked
+on their own.
+
+Aggregates and settings are cached in a size-bounded LRU ResultCache. Each
+entry is keyed by the arguments and by the data version of every table the
+answer depends on; writes through the service bump those versions, so stale
+entries are never served and simply age out. Writes made by another process
+or straight on the pool are not seen, so benchmarks open the service with
+cache_size=0.
+"""
+import bisect
+import functools
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from finance_db import (
+    DEFAULT_PRAGMA_PROFILE,
+    EXPENSE_CATEGORY_SQL,
+    INCOME_SOURCE_SQL,
+    LABEL_TABLES,
+    LABEL_USAGE_SQL,
+    MONTH_COUNTS_SQL,
+    MONTHLY_TOTALS_SQL,
+    RANGE_TOTALS_SQL,
+    SEARCH_CHUNK_SIZE,
+    SNAPSHOT_ROWS_SQL,
+    TRANSACTION_COUNT_SQL,
+    TRANSACTION_KEY_AT_SQL,
+    TRANSACTION_LABELS,
+    TRANSACTION_TOTALS_SQL,
+    ConnectionPool,
+    Money,
+    bulk_import,
+    explain_query_plans,
+    invalid_dates,
+    month_key,
+    month_key_end,
+    month_start,
+    period_start,
+    prune_descriptions,
+    range_periods,
+    rebuild_monthly_summary,
+    register_descriptions,
+    register_labels,
+    search_transaction_sql,
+    shift_month,
+    transaction_insert_sql,
+    transaction_page_sql,
+    transaction_select_sql,
+    verify_monthly_summary,
+)
+
+
+class Transaction(NamedTuple):
+    """One expense or income record; label is its category or source"""
+    id: int
+    date: str
+    amount: Money
+    label: str
+    description: str
+    
+    @classmethod
+    def from_row(cls, row):
+        """Build from an (id, date, amount_cents, label, description) row"""
+        row_id, date, cents, label, description = row
+        return cls(row_id, date, Money(cents), label, description)
+    
+    @property
+    def key(self):
+        """The (date, id) keyset cursor of this record"""
+        return (self.date, self.id)
+
+
+class Label(NamedTuple):
+    """A registered expense category or income source and how many records use it"""
+    id: int
+    name: str
+    usage_count: int
+
+
+class LabelTotal(NamedTuple):
+    """Total of one expense category or income source"""
+    label: str
+    amount: Money
+
+
+class MonthlyTotals(NamedTuple):
+    """Dense per-month totals in integer cents, aligned with months.
+    
+    months holds (year, month) pairs; months without transactions are zero.
+    """
+    months: list
+    expenses: list
+    income: list
+    savings: list
+
+
+class RangeTotals(NamedTuple):
+    """Dense per-period totals in integer cents over a date range, aligned with periods.
+    
+    periods holds the datetime.date each day, week, month or quarter starts
+    on; the first and last may reach outside the range, but only records in
+    it are counted. expenses_by_category and income_by_source are LabelTotals
+    over the whole range, largest first.
+    """
+    granularity: str
+    periods: list
+    expenses: list
+    income: list
+    savings: list
+    expenses_by_category: list
+    income_by_source: list
+
+
+class MonthlyReport(NamedTuple):
+    """Expense-by-category and income-by-source totals of one month"""
+    expenses: list
+    income: list
+    
+    @property
+    def total_expenses(self):
+        return Money(sum(item.amount.cents for item in self.expenses))
+    
+    @property
+    def total_income(self):
+        return Money(sum(item.amount.cents for item in self.income))
+
+
+class CacheStats(NamedTuple):
+    """Lookups served by a ResultCache since it was created"""
+    hits: int
+    misses: int
+    size: int
+    capacity: int
+    
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def describe(self):
+        return (f"{self.hits:,} of {self.hits + self.misses:,} lookups cached ({self.hit_rate:.0%}), "
+                f"{self.size} of {self.capacity} entries")
+
+
+class ResultCache:
+    """Thread-safe LRU map of query results, holding at most `capacity` of them"""
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key, compute):
+        """Return the result cached under `key`, calling compute() to fill it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Computed without the lock, so readers on other threads are not held up
+        value = compute()
+        if self.capacity > 0:
+            with self._lock:
+                self._entries[key] = value
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return value
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, len(self._entries), self.capacity)
+
+
+# Results kept by a FinanceService's ResultCache
+AGGREGATE_CACHE_SIZE = 256
+
+# Tables whose data version cached results are keyed by
+VERSIONED_TABLES = ["expenses", "income", "settings"]
+
+
+def cached(*tables):
+    """Cache a FinanceService method's results by its arguments and the data versions of `tables`.
+    
+    Results are shared between callers, so they must not be modified.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, tuple(sorted(kwargs.items())), self.data_version(*tables))
+            return self.cache.get(key, lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorate
+
+
+class FinanceService:
+    """Queries and updates over a ConnectionPool.
+    
+    Each call checks a connection out of the pool for just as long as it
+    needs one, so one service can be shared by the Tk thread and the
+    background workers: reads run in parallel on the read-only connections
+    and writes are serialized on the writer.
+    """
+    
+    def __init__(self, pool, cache_size=AGGREGATE_CACHE_SIZE):
+        self.pool = pool
+        # Category and source names by table, read once and dropped whenever
+        # a write may have registered or removed one
+        self._label_names = {}
+        # Bumped after every committed write to a table through this service.
+        # The Tk thread and the workers both write, so the lock keeps two
+        # bumps from collapsing into one
+        self.data_versions = dict.fromkeys(VERSIONED_TABLES, 0)
+        self._versions_lock = threading.Lock()
+        self.cache = ResultCache(cache_size)
+    
+    @classmethod
+    def open(cls, path, pragmas=DEFAULT_PRAGMA_PROFILE, readers=2, read_only=False,
+             cache_size=AGGREGATE_CACHE_SIZE):
+        """Open the database at `path`, creating and migrating it unless read_only"""
+        return cls(ConnectionPool(path, readers, pragmas, read_only), cache_size)
+    
+    @classmethod
+    def from_config(cls, config, readers=2):
+        """Open the database described by a finance_config.DatabaseConfig"""
+        return cls.open(config.path, config.pragmas, readers, config.read_only)
+    
+    def data_changed(self, *tables):
+        """Mark the cached results that depend on `tables` stale; call after the write commits"""
+        with self._versions_lock:
+            for table in tables:
+                self.data_versions[table] += 1
+    
+    def data_version(self, *tables) -> tuple:
+        """Return the current data versions of `tables`"""
+        with self._versions_lock:
+            return tuple(self.data_versions[table] for table in tables)
+    
+    def cache_stats(self) -> CacheStats:
+        return self.cache.stats()
+    
+    @property
+    def read_only(self):
+        return self.pool.read_only
+    
+    def close(self):
+        self.pool.close()
+    
+    # Transactions
+    
+    def add_transaction(self, table, date, amount, label, description) -> int:
+        """Insert one expense or income record and commit; returns its id.
+        
+        amount is Money and label the category or source, which is registered
+        if it is new.
+        """
+        with self.pool.writer() as conn, conn:
+            if register_labels(conn, table, [label]):
+                self._label_names.pop(table, None)
+            register_descriptions(conn, [description])
+            cursor = conn.execute(transaction_insert_sql(table), (date, amount.cents, label, description))
+        self.data_changed(table)
+        return cursor.lastrowid
+    
+    def delete_transactions(self, table, ids) -> list:
+        """Delete the rows of `table` with the given ids in one transaction.
+        
+        The ids are bound as a single JSON array, so any number of rows is one
+        DELETE statement. Returns the YYYY-MM months that were touched.
+        """
+        id_list = json.dumps([int(row_id) for row_id in ids])
+        with self.pool.writer() as conn, conn:
+            touched = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT substr(date, 1, 7) FROM {table} WHERE id IN (SELECT value FROM json_each(?))",
+                (id_list,)
+            )]
+            descriptions = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT description_id FROM {table} WHERE id IN (SELECT value FROM json_each(?))",
+                (id_list,)
+            )]
+            conn.execute(f"DELETE FROM {table} WHERE id IN (SELECT value FROM json_each(?))", (id_list,))
+            # Deleted text should not linger in the file or the search index
+            prune_descriptions(conn, descriptions)
+        self.data_changed(table)
+        return touched
+    
+    def transaction_page(self, table, limit, after=None, backward=False, inclusive=False) -> list:
+        """Return up to `limit` Transactions next to the (date, id) cursor `after`, newest first.
+        
+        Each page is an index seek, so it costs the same however deep into the
+        history it lies. With backward=True the rows just before the cursor are
+        returned instead.
+        """
+        with self.pool.reader() as conn:
+            if after is None:
+                rows = conn.execute(transaction_page_sql(table), (limit,)).fetchall()
+            else:
+                seek = ">" if backward else "<=" if inclusive else "<"
+                rows = conn.execute(transaction_page_sql(table, seek), (*after, limit)).fetchall()
+        if backward and after is not None:
+            rows.reverse()
+        return [Transaction.from_row(row) for row in rows]
+    
+    def transaction_key_at(self, table, offset) -> Optional[tuple]:
+        """Return the (date, id) cursor of the row `offset` places from the newest, or None past the end.
+        
+        The month holding the row is found in the cached month counts, so the
+        OFFSET only walks the index within that one month.
+        """
+        months, newer = self.month_offsets(table)
+        index = bisect.bisect_right(newer, offset) - 1
+        if not 0 <= index < len(months):
+            return None
+        month = months[index]
+        with self.pool.reader() as conn:
+            return conn.execute(TRANSACTION_KEY_AT_SQL.format(table=table),
+                                (month, month_key_end(month), offset - newer[index])).fetchone()
+    
+    @cached("expenses", "income")
+    def month_offsets(self, table) -> tuple:
+        """Return the YYYY-MM months of `table`, newest first, and how many records are newer than each.
+        
+        The second list has one more entry, the number of records in the table.
+        """
+        months = []
+        newer = [0]
+        with self.pool.reader() as conn:
+            for month, count in conn.execute(MONTH_COUNTS_SQL, (table,)):
+                months.append(month)
+                newer.append(newer[-1] + count)
+        return months, newer
+    
+    def count_transactions(self, table) -> int:
+        """Return the number of rows in `table` from monthly_summary, without counting the table"""
+        with self.pool.reader() as conn:
+            return conn.execute(TRANSACTION_COUNT_SQL, (table,)).fetchone()[0]
+    
+    def transaction_totals(self, table) -> tuple:
+        """Return (record count, total cents) of `table` from monthly_summary"""
+        with self.pool.reader() as conn:
+            return conn.execute(TRANSACTION_TOTALS_SQL, (table,)).fetchone()
+    
+    def snapshot_rows(self, table, after_id, chunk_size):
+        """Yield lists of numeric snapshot rows of `table` with ids above after_id; see SNAPSHOT_ROWS_SQL"""
+        sql = SNAPSHOT_ROWS_SQL.format(table=table, label=TRANSACTION_LABELS[table])
+        with self.pool.reader() as conn:
+            cursor = conn.execute(sql, (after_id,))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+    
+    def transactions_by_id(self, table, ids) -> list:
+        """Return Transactions of `table` by id in the order given; ids that no longer exist are skipped"""
+        with self.pool.reader() as conn:
+            rows = conn.execute(
+                f"{transaction_select_sql(table)} WHERE t.id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(ids)),)
+            ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        return [Transaction.from_row(by_id[row_id]) for row_id in ids if row_id in by_id]
+    
+    def transactions(self, table, start_date=None, end_date=None, newest_first=False) -> list:
+        """Return every Transaction of `table` dated from start_date up to (not including) end_date"""
+        sql = transaction_select_sql(table)
+        bounds = [("t.date >= ?", start_date), ("t.date < ?", end_date)]
+        where = [clause for clause, value in bounds if value]
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY t.date DESC, t.id DESC" if newest_first else " ORDER BY t.date, t.id"
+        with self.pool.reader() as conn:
+            rows = conn.execute(sql, [value for _, value in bounds if value]).fetchall()
+        return [Transaction.from_row(row) for row in rows]
+    
+    def transaction_chunks(self, table, chunk_size, newest_first=False):
+        """Yield every Transaction of `table` in lists of up to `chunk_size`, oldest first by default.
+        
+        Rows are read from one cursor as they are consumed, so memory stays
+        bounded however large the table. A reader stays checked out until the
+        generator is exhausted or closed.
+        """
+        order = "DESC" if newest_first else "ASC"
+        with self.pool.reader() as conn:
+            cursor = conn.execute(f"{transaction_select_sql(table)} ORDER BY t.date {order}, t.id {order}")
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [Transaction.from_row(row) for row in rows]
+    
+    def search_transaction_ids(self, table, query, start_date=None, end_date=None, label=None,
+                               chunk_size=SEARCH_CHUNK_SIZE):
+        """Yield lists of ids of `table` rows whose description matches, best match first.
+        
+        query is an FTS5 query (see fts_query). The dates are inclusive YYYY-MM-DD
+        bounds and label filters on the category or source; any may be None.
+        A reader stays checked out until the generator is exhausted or closed.
+        """
+        params = [query] + [value for value in (start_date, end_date, label) if value]
+        with self.pool.reader() as conn:
+            cursor = conn.execute(search_transaction_sql(table, start_date, end_date, label), params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [row[0] for row in rows]
+    
+    def bulk_import(self, chunks, **options) -> dict:
+        """Load spreadsheet chunks into the transaction tables on the writer; see finance_db.bulk_import"""
+        try:
+            with self.pool.writer() as conn:
+                return bulk_import(conn, chunks, **options)
+        finally:
+            # Imported rows may bring categories and sources of their own
+            self._label_names.clear()
+            self.data_changed(*TRANSACTION_LABELS)
+    
+    # Settings
+    
+    @cached("settings")
+    def get_setting(self, key) -> Optional[str]:
+        with self.pool.reader() as conn:
+            result = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return result[0] if result else None
+    
+    def set_setting(self, key, value):
+        with self.pool.writer() as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+        self.data_changed("settings")
+    
+    def get_budget(self) -> Optional[Money]:
+        """Return the saved monthly budget, or None if not set"""
+        value = self.get_setting("monthly_budget")
+        return Money.parse(value) if value else None
+    
+    def set_budget(self, budget):
+        self.set_setting("monthly_budget", str(budget))
+    
+    def get_dashboard_snapshot(self) -> Optional[dict]:
+        """Return the dashboard figures saved at the end of the last session, or None"""
+        value = self.get_setting("dashboard_snapshot")
+        if value:
+            try:
+                return json.loads(value)
+            except ValueError:
+                return None
+        return None
+    
+    def save_dashboard_snapshot(self, snapshot):
+        """Save the dashboard figures so the next session can show them straight away"""
+        self.set_setting("dashboard_snapshot", json.dumps(snapshot))
+    
+    # Categories and sources
+    
+    def labels(self, table) -> list:
+        """Return every registered category (expenses) or source (income) as a Label, in the order added"""
+        with self.pool.reader() as conn:
+            rows = conn.execute(f"SELECT id, name, usage_count FROM {LABEL_TABLES[table]} ORDER BY id").fetchall()
+        return [Label(*row) for row in rows]
+    
+    def label_names(self, table) -> list:
+        """Return the category or source names to offer in the UI, in the order added.
+        
+        The list is cached until a label is added or deleted through this service.
+        """
+        names = self._label_names.get(table)
+        if names is None:
+            # Records imported without a label are filed under ''
+            names = [label.name for label in self.labels(table) if label.name]
+            self._label_names[table] = names
+        return list(names)
+    
+    def add_label(self, table, name) -> bool:
+        """Register a category or source; returns False if it already exists"""
+        with self.pool.writer() as conn, conn:
+            added = register_labels(conn, table, [name])
+        self._label_names.pop(table, None)
+        return bool(added)
+    
+    def delete_label(self, table, name) -> bool:
+        """Remove a category or source that no record uses; returns False if it is in use or unknown"""
+        with self.pool.writer() as conn, conn:
+            cursor = conn.execute(f"DELETE FROM {LABEL_TABLES[table]} WHERE name = ? AND usage_count = 0", (name,))
+        self._label_names.pop(table, None)
+        return cursor.rowcount > 0
+    
+    def count_label_uses(self, table, name) -> int:
+        """Return how many records of `table` are filed under the category or source `name`.
+        
+        The count is kept up to date by triggers, so this is a single-row lookup.
+        """
+        with self.pool.reader() as conn:
+            row = conn.execute(LABEL_USAGE_SQL.format(labels=LABEL_TABLES[table]), (name,)).fetchone()
+        return row[0] if row else 0
+    
+    # Aggregates
+    
+    @cached("expenses", "income")
+    def monthly_totals(self, start_year, start_month, count) -> MonthlyTotals:
+        """Sum expenses and income for `count` consecutive months in a single grouped query"""
+        months = [shift_month(start_year, start_month, i) for i in range(count)]
+        
+        # One pass over the summary rows of both tables, grouped by month
+        with self.pool.reader() as conn:
+            rows = conn.execute(
+                MONTHLY_TOTALS_SQL, (month_key(*months[0]), month_key(*shift_month(*months[-1], 1)))
+            ).fetchall()
+        
+        position = {month_key(year, month): i for i, (year, month) in enumerate(months)}
+        totals = {"expenses": [0] * count, "income": [0] * count}
+        for kind, month, cents in rows:
+            index = position.get(month)
+            if index is not None:
+                totals[kind][index] += cents or 0
+        
+        savings = [income - expense for income, expense in zip(totals["income"], totals["expenses"])]
+        return MonthlyTotals(months, totals["expenses"], totals["income"], savings)
+    
+    def recent_monthly_totals(self, count, today) -> MonthlyTotals:
+        """Return monthly totals for the `count` months ending with the month of `today`"""
+        return self.monthly_totals(*shift_month(today.year, today.month, -(count - 1)), count)
+    
+    @cached("expenses")
+    def expenses_by_category(self, year, month, count=1) -> list:
+        """Return a LabelTotal per expense category over `count` months from year/month"""
+        return self._label_totals(EXPENSE_CATEGORY_SQL, year, month, count)
+    
+    @cached("income")
+    def income_by_source(self, year, month, count=1) -> list:
+        """Return a LabelTotal per income source over `count` months from year/month"""
+        return self._label_totals(INCOME_SOURCE_SQL, year, month, count)
+    
+    def _label_totals(self, sql, year, month, count):
+        with self.pool.reader() as conn:
+            rows = conn.execute(sql, (month_key(year, month), month_key(*shift_month(year, month, count)))).fetchall()
+        return [LabelTotal(label, Money(cents or 0)) for label, cents in rows]
+    
+    @cached("expenses", "income")
+    def range_totals(self, start_date, end_date, granularity) -> RangeTotals:
+        """Total expenses and income per day, week, month or quarter from start_date to end_date inclusive.
+        
+        Dates are ISO strings. Each table is read with one grouped query of
+        daily totals per label id, rolled up here. Raises ValueError if a
+        record in the range has a date that is not a valid YYYY-MM-DD, rather
+        than leave its amount out; see invalid_dates.
+        """
+        def parse(text):
+            return datetime.strptime(text, "%Y-%m-%d").date()
+        
+        periods = range_periods(parse(start_date), parse(end_date), granularity)
+        position = {period: i for i, period in enumerate(periods)}
+        # Period index of each date seen; a date recurs once per label
+        day_index = {}
+        totals = {"expenses": [0] * len(periods), "income": [0] * len(periods)}
+        labels = {"expenses": {}, "income": {}}
+        with self.pool.reader() as conn:
+            for table, label in TRANSACTION_LABELS.items():
+                sql = RANGE_TOTALS_SQL.format(table=table, label=label)
+                for day, label_id, cents in conn.execute(sql, (start_date, end_date)):
+                    index = day_index.get(day)
+                    if index is None:
+                        try:
+                            index = day_index[day] = position[period_start(parse(day), granularity)]
+                        except (TypeError, ValueError):
+                            raise ValueError(f"Some {table} records are dated {day!r}, which is not a "
+                                             f"YYYY-MM-DD date, so they cannot be placed in a date range; "
+                                             f"Verify Summary lists them") from None
+                    totals[table][index] += cents
+                    labels[table][label_id] = labels[table].get(label_id, 0) + cents
+        
+        def label_totals(table):
+            names = {label.id: label.name for label in self.labels(table)}
+            ranked = sorted(labels[table].items(), key=lambda item: item[1], reverse=True)
+            return [LabelTotal(names[label_id], Money(cents)) for label_id, cents in ranked]
+        
+        savings = [income - expense for income, expense in zip(totals["income"], totals["expenses"])]
+        return RangeTotals(granularity, periods, totals["expenses"], totals["income"], savings,
+                           label_totals("expenses"), label_totals("income"))
+    
+    def monthly_report(self, month, year) -> MonthlyReport:
+        """Return the expense-by-category and income-by-source totals of one month"""
+        return MonthlyReport(self.expenses_by_category(year, month), self.income_by_source(year, month))
+    
+    def annual_report(self, year) -> MonthlyTotals:
+        """Return the monthly totals of one calendar year"""
+        return self.monthly_totals(year, 1, 12)
+    
+    def month_transactions(self, table, month, year) -> list:
+        """Return one month's Transactions of `table`, oldest first"""
+        return self.transactions(table, month_start(year, month), month_start(*shift_month(year, month, 1)))
+    
+    # Maintenance
+    
+    def schema_version(self) -> int:
+        with self.pool.reader() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    def explain_query_plans(self) -> list:
+        with self.pool.reader() as conn:
+            return explain_query_plans(conn)
+    
+    def verify_monthly_summary(self) -> list:
+        with self.pool.reader() as conn:
+            return verify_monthly_summary(conn)
+    
+    def invalid_dates(self) -> list:
+        """Return (table, id, date) of the records whose date is not a valid YYYY-MM-DD"""
+        with self.pool.reader() as conn:
+            return invalid_dates(conn)
+    
+    def rebuild_monthly_summary(self):
+        """Recompute monthly_summary and the category and source usage counts"""
+        with self.pool.writer() as conn, conn:
+            rebuild_monthly_summary(conn)
+        self.data_changed(*TRANSACTION_LABELS)
@@ -0,0 +1,206 @@
+"""Columnar snapshot of the transaction tables for analytical reads.
+
+The snapshot keeps the numeric columns of every expense and income record
+(id, month, day, cents and category or source id) as NumPy arrays in a
+directory next to the database, one .npy file per table, year and
+refresh. Files are memory-mapped when read, so an aggregate over years of
+history is a few vectorized bincounts over columns the OS pages in on
+demand, with no SQL and no Python object per record.
+
+refresh() appends only the records added since the last refresh. When the
+record counts and totals in monthly_summary show that records were deleted
+in the meantime, the table's snapshot is rebuilt instead. Descriptions are
+not kept; exports still read the database.
+
+Month- and category-level figures are cheaper to take from monthly_summary;
+the snapshot pays off for questions the summary cannot answer, such as
+totals by day or week over long ranges. `python finance_cli.py benchmark
+--snapshot` compares the three.
+"""
+import json
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+from finance_db import TRANSACTION_LABELS
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DTYPE = np.dtype([
+    ("id", "<i8"),
+    ("month", "<i4"),  # year * 12 + month - 1
+    ("day", "<i4"),    # days since 1970-01-01
+    ("cents", "<i8"),
+    ("label", "<i4"),  # category or source id
+])
+SNAPSHOT_CHUNK_SIZE = 50000
+# A year's refresh files are merged into one once it has more than this many
+MAX_YEAR_FILES = 8
+EPOCH = date(1970, 1, 1)
+META_FILE = "snapshot.json"
+
+
+def snapshot_directory(db_path):
+    """Return the default snapshot directory of the database at db_path"""
+    return f"{db_path}.snapshot"
+
+
+def empty_table_state():
+    return {"last_id": 0, "rows": 0, "cents": 0, "next_file": 1, "years": {}}
+
+
+class ColumnarSnapshot:
+    """Year-partitioned NumPy columns of the expenses and income tables in `directory`"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta = self.read_meta()
+    
+    def read_meta(self):
+        try:
+            with open(os.path.join(self.directory, META_FILE), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+        if not meta or meta.get("version") != SNAPSHOT_VERSION:
+            meta = {"version": SNAPSHOT_VERSION, "tables": {}}
+        for table in TRANSACTION_LABELS:
+            meta["tables"].setdefault(table, empty_table_state())
+        return meta
+    
+    def write_meta(self):
+        # Replaced in one step, so a crash mid-refresh leaves the previous snapshot usable
+        path = os.path.join(self.directory, META_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=1)
+        os.replace(path + ".tmp", path)
+    
+    # Refresh
+    
+    def refresh(self, service, rebuild=False) -> dict:
+        """Bring the snapshot up to date with the database; returns the records added per table"""
+        os.makedirs(self.directory, exist_ok=True)
+        added = {}
+        for table in TRANSACTION_LABELS:
+            if rebuild:
+                self.clear(table)
+            added[table] = self.append(service, table)
+            state = self.meta["tables"][table]
+            if (state["rows"], state["cents"]) != tuple(service.transaction_totals(table)):
+                # Records were deleted or changed since the last refresh
+                self.clear(table)
+                added[table] = self.append(service, table)
+        self.write_meta()
+        return added
+    
+    def append(self, service, table):
+        """Add the records of `table` newer than the snapshot, one file per year; returns how many"""
+        state = self.meta["tables"][table]
+        by_year = {}
+        added = 0
+        for rows in service.snapshot_rows(table, state["last_id"], SNAPSHOT_CHUNK_SIZE):
+            chunk = np.array(rows, dtype=SNAPSHOT_DTYPE)
+            # Records with unparseable dates have month -1 and land in year -1
+            years = np.floor_divide(chunk["month"], 12)
+            for year in np.unique(years):
+                by_year.setdefault(int(year), []).append(chunk[years == year])
+            state["last_id"] = int(chunk["id"][-1])
+            state["cents"] += int(chunk["cents"].sum())
+            added += len(chunk)
+        state["rows"] += added
+        
+        for year, parts in by_year.items():
+            files = state["years"].setdefault(str(year), [])
+            files.append(self.write_file(table, year, np.concatenate(parts)))
+            if len(files) > MAX_YEAR_FILES:
+                merged = np.concatenate([self.load(name) for name in files])
+                old_files, files[:] = list(files), [self.write_file(table, year, merged)]
+                for name in old_files:
+                    os.remove(os.path.join(self.directory, name))
+        return added
+    
+    def write_file(self, table, year, columns):
+        state = self.meta["tables"][table]
+        name = f"{table}_{year}_{state['next_file']}.npy"
+        state["next_file"] += 1
+        np.save(os.path.join(self.directory, name), columns)
+        return name
+    
+    def clear(self, table):
+        """Forget the snapshot of `table` and delete its files"""
+        for files in self.meta["tables"][table]["years"].values():
+            for name in files:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+        self.meta["tables"][table] = empty_table_state()
+    
+    # Reads
+    
+    def load(self, name):
+        return np.load(os.path.join(self.directory, name), mmap_mode="r")
+    
+    def columns(self, table, first_year=None, last_year=None):
+        """Yield the memory-mapped column arrays of `table` for the years in range"""
+        for year, files in self.meta["tables"][table]["years"].items():
+            year = int(year)
+            if year < 0 or (first_year is not None and year < first_year) or \
+                    (last_year is not None and year > last_year):
+                continue
+            for name in files:
+                yield self.load(name)
+    
+    def rows(self, table):
+        return self.meta["tables"][table]["rows"]
+    
+    def size(self):
+        """Return the bytes of column files on disk"""
+        return sum(
+            os.path.getsize(os.path.join(self.directory, name))
+            for state in self.meta["tables"].values()
+            for files in state["years"].values()
+            for name in files
+        )
+    
+    def totals_by(self, table, field, start, count, first_year=None, last_year=None):
+        """Sum cents per value of `field` ("month", "day" or "label") over start..start+count-1"""
+        totals = np.zeros(count, dtype=np.int64)
+        for columns in self.columns(table, first_year, last_year):
+            offset = columns[field] - start
+            inside = (offset >= 0) & (offset < count)
+            # bincount sums in float64, which is exact for totals below 2**53 cents
+            totals += np.rint(np.bincount(offset[inside], weights=columns["cents"][inside],
+                                          minlength=count)).astype(np.int64)
+        return totals
+    
+    def monthly_totals(self, table, year, month, count):
+        """Return cents per month for `count` months from year/month as an int64 array"""
+        start = year * 12 + month - 1
+        return self.totals_by(table, "month", start, count, start // 12, (start + count - 1) // 12)
+    
+    def daily_totals(self, table, first_day, count):
+        """Return cents per day for `count` days from first_day, a datetime.date"""
+        last_day = first_day + timedelta(days=count - 1)
+        return self.totals_by(table, "day", (first_day - EPOCH).days, count, first_day.year, last_day.year)
+    
+    def label_totals(self, table, year, month, count) -> dict:
+        """Return {label id: cents} over `count` months from year/month"""
+        start = year * 12 + month - 1
+        totals = {}
+        for columns in self.columns(table, start // 12, (start + count - 1) // 12):
+            inside = (columns["month"] >= start) & (columns["month"] < start + count)
+            labels = columns["label"][inside]
+            if not len(labels):
+                continue
+            sums = np.rint(np.bincount(labels, weights=columns["cents"][inside])).astype(np.int64)
+            for label in np.flatnonzero(np.bincount(labels)):
+                totals[int(label)] = totals.get(int(label), 0) + int(sums[label])
+        return totals
+    
+    def yearly_totals(self, table) -> dict:
+        """Return {year: cents} over every year in the snapshot"""
+        return {
+            year: int(sum(int(columns["cents"].sum()) for columns in self.columns(table, year, year)))
+            for year in sorted(int(year) for year in self.meta["tables"][table]["years"] if int(year) >= 0)
+        }
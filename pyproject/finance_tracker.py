@@ -1,24 +1,650 @@
-
+import time
+IMPORT_STARTED = time.perf_counter()
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
-from tkcalendar import DateEntry
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
 import sqlite3
 import os
+import queue
+import sys
+import threading
 from datetime import datetime
 import calendar
-import numpy as np
 from pathlib import Path
-from PIL import Image, ImageTk
 import webbrowser
+# matplotlib, numpy, tkcalendar and PIL are imported where they are first
+# used, so the window can appear before the slow ones have loaded
+from finance_config import add_database_arguments, database_from_args
+from finance_db import (
+    RANGE_GRANULARITIES,
+    Money,
+    fts_query,
+    iter_import_chunks,
+    month_key,
+    period_label,
+    shift_month,
+)
+from finance_export import (
+    EXPORT_FORMATS,
+    write_all_data,
+    write_annual_report,
+    write_monthly_report,
+    write_range_report,
+    write_table_export,
+)
+from finance_render import RenderCache, draw_annual_trend, draw_pie, draw_range_trend, render_cache_directory
+from finance_service import FinanceService
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
+
+# Time to first frame we aim to stay under, in milliseconds
+STARTUP_BUDGET_MS = 500
+
+# How often the Tk thread collects results from background tasks, in milliseconds
+TASK_POLL_MS = 50
+
+# Background worker threads, plus one that only runs scrollbar seeks so they
+# never wait behind an import; the pool has one more reader so the Tk thread
+# can always page the grids and draw the dashboard while they all run
+TASK_WORKERS = 2
+
+# Height of a Treeview row, in pixels
+TREEVIEW_ROW_HEIGHT = 25
+
+# Modifier bits of a Tk event's state
+SHIFT_MASK = 0x0001
+CONTROL_MASK = 0x0004
+
+# Width of report charts, in pixels, when the report display has not been laid out yet
+REPORT_CHART_WIDTH = 900
+
+# Dashboard views, the tables each one is drawn from and the months it shows:
+# "current" is this month only, "recent" is the six-month trend window
+DASHBOARD_VIEWS = {
+    "income_card": ({"income"}, "current"),
+    "expenses_card": ({"expenses"}, "current"),
+    "savings_card": ({"expenses", "income"}, "current"),
+    "budget_card": ({"expenses", "settings"}, "current"),
+    "expense_pie": ({"expenses"}, "current"),
+    "monthly_trend": ({"expenses"}, "recent"),
+    "income_vs_expense": ({"expenses", "income"}, "recent"),
+    "savings_trend": ({"expenses", "income"}, "recent"),
+}
+
+
+def stale_dashboard_views(changes, current_month, recent_months):
+    """Return the names of the DASHBOARD_VIEWS that depend on any of `changes`.
+
+    Each change is a (table, month) pair recorded by a write; month is a
+    YYYY-MM key, or None when the write may have touched any month. Every
+    view totals all categories and sources, so which ones a write touched
+    does not matter.
+    """
+    windows = {"current": {current_month}, "recent": set(recent_months)}
+    stale = set()
+    for view, (tables, window) in DASHBOARD_VIEWS.items():
+        for table, month in changes:
+            if table in tables and (month is None or month in windows[window]):
+                stale.add(view)
+                break
+    return stale
+
+
+class TaskCancelled(Exception):
+    """Raised inside a background task once it has been cancelled"""
+
+
+class Task:
+    """Handle for a unit of work submitted to a TaskExecutor"""
+    
+    def __init__(self, executor, func, on_done=None, on_error=None, on_progress=None):
+        self.executor = executor
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self._cancel_event = threading.Event()
+    
+    def cancel(self):
+        self._cancel_event.set()
+    
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+    
+    def check_cancelled(self):
+        """Raise TaskCancelled if the task has been cancelled; call from the worker"""
+        if self.cancelled:
+            raise TaskCancelled()
+    
+    def progress(self, message):
+        """Report progress from the worker thread; also a cancellation point"""
+        self.check_cancelled()
+        self.executor.results.put(("progress", self, message))
+
+
+class TaskExecutor:
+    """Runs database work on background threads.
+
+    Submitted functions are called as func(service, task) on a worker; the
+    shared FinanceService checks a pooled connection out for each query. Their
+    results, errors and progress messages are queued and delivered to the
+    task's callbacks by poll(), which the Tk thread calls from root.after.
+    """
+    
+    def __init__(self, service, workers=TASK_WORKERS):
+        self.service = service
+        self.tasks = queue.Queue()
+        self.results = queue.Queue()
+        self.active = set()  # Only touched from the Tk thread
+        self.threads = []
+        for index in range(workers):
+            thread = threading.Thread(target=self._work, name=f"finance-worker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+    
+    def submit(self, func, on_done=None, on_error=None, on_progress=None):
+        task = Task(self, func, on_done, on_error, on_progress)
+        self.active.add(task)
+        self.tasks.put(task)
+        return task
+    
+    def _work(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                break
+            try:
+                task.check_cancelled()
+                self.results.put(("done", task, task.func(self.service, task)))
+            except Exception as e:
+                self.results.put(("error", task, e))
+    
+    def poll(self):
+        """Deliver queued results to their callbacks; call from the Tk thread"""
+        while True:
+            try:
+                kind, task, value = self.results.get_nowait()
+            except queue.Empty:
+                return
+            
+            if kind == "progress":
+                if task.on_progress and not task.cancelled:
+                    task.on_progress(value)
+                continue
+            
+            self.active.discard(task)
+            if kind == "done" and task.cancelled:
+                # Finished before it noticed the cancel; drop the stale result
+                kind, value = "error", TaskCancelled()
+            callback = task.on_done if kind == "done" else task.on_error
+            if callback:
+                callback(value)
+    
+    def cancel_all(self):
+        for task in list(self.active):
+            task.cancel()
+    
+    def shutdown(self, timeout=2):
+        """Cancel outstanding work and stop the worker threads"""
+        self.cancel_all()
+        for _ in self.threads:
+            self.tasks.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
+
+
+class DashboardChart:
+    """A dashboard chart slot that keeps its Figure, canvas and toolbar for the whole session.
+
+    Subclasses draw their artists once and update them in place, so a refresh
+    only changes data and schedules a redraw with draw_idle.
+    """
+    
+    def __init__(self, parent, title, figsize=(5, 4), title_pad=None):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        
+        # Figure is created directly so pyplot's figure registry never holds it
+        self.figure = Figure(figsize=figsize)
+        self.ax = self.figure.add_subplot()
+        self.ax.set_title(title, pad=title_pad)
+        
+        # Add to frame
+        self.canvas = FigureCanvasTkAgg(self.figure, master=parent)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        
+        # Add toolbar
+        self.toolbar = NavigationToolbar2Tk(self.canvas, parent)
+        self.toolbar.update()
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+    
+    def redraw(self, *extra_points):
+        """Rescale the axes to the current artists and schedule a redraw"""
+        self.ax.relim()
+        if extra_points:
+            self.ax.update_datalim(extra_points)
+        self.ax.autoscale_view()
+        self.canvas.draw_idle()
+
+
+class CategoryPieChart(DashboardChart):
+    """Donut chart of amounts by label; wedges are reused while the labels stay the same"""
+    
+    def __init__(self, parent, title, empty_message):
+        super().__init__(parent, title, title_pad=20)
+        self.labels = None
+        self.wedges, self.texts, self.autotexts = [], [], []
+        self.empty_text = self.ax.text(0.5, 0.5, empty_message, ha='center', va='center',
+                                       transform=self.ax.transAxes, visible=False)
+        self.ax.axis('off')
+    
+    def update(self, labels, amounts):
+        import numpy as np
+        from matplotlib import colormaps
+        
+        total = sum(amounts)
+        if total <= 0:
+            # If no data, show message
+            for artist in self.wedges + self.texts + self.autotexts:
+                artist.set_visible(False)
+            self.empty_text.set_visible(True)
+            self.canvas.draw_idle()
+            return
+        
+        if labels != self.labels:
+            # Labels changed; replace the wedges but keep the figure and canvas
+            for artist in self.wedges + self.texts + self.autotexts:
+                artist.remove()
+            colors = colormaps["Pastel1"](np.linspace(0, 1, len(labels)))
+            self.wedges, self.texts, self.autotexts = self.ax.pie(
+                amounts,
+                labels=labels,
+                autopct='%1.1f%%',
+                startangle=90,
+                colors=colors,
+                wedgeprops=dict(width=0.4, edgecolor='w'),
+                pctdistance=0.85
+            )
+            
+            # Make labels smaller
+            for text in self.texts:
+                text.set_fontsize(8)
+            for text in self.autotexts:
+                text.set_fontsize(8)
+                text.set_fontweight("bold")
+            self.labels = list(labels)
+        else:
+            # Same labels; move the existing wedges and their labels
+            theta1 = 90
+            for wedge, text, autotext, amount in zip(self.wedges, self.texts, self.autotexts, amounts):
+                fraction = amount / total
+                theta2 = theta1 + 360 * fraction
+                wedge.set_theta1(theta1)
+                wedge.set_theta2(theta2)
+                
+                angle = np.deg2rad((theta1 + theta2) / 2)
+                x, y = np.cos(angle), np.sin(angle)
+                text.set_position((1.1 * x, 1.1 * y))
+                text.set_horizontalalignment('left' if x > 0 else 'right')
+                autotext.set_position((0.85 * x, 0.85 * y))
+                autotext.set_text(f'{fraction * 100:.1f}%')
+                theta1 = theta2
+            for artist in self.wedges + self.texts + self.autotexts:
+                artist.set_visible(True)
+        
+        self.empty_text.set_visible(False)
+        self.canvas.draw_idle()
+
+
+class MonthlyBarChart(DashboardChart):
+    """Bars per month for one or more series, with value labels on top"""
+    
+    def __init__(self, parent, title, series, count=6, width=0.8):
+        import numpy as np
+        
+        super().__init__(parent, title)
+        x = np.arange(count)
+        
+        # Create bars once with zero height; update() sets the real values
+        self.bars = []
+        self.value_labels = []
+        for index, (label, color) in enumerate(series):
+            offset = (index - (len(series) - 1) / 2) * width
+            bars = self.ax.bar(x + offset, np.zeros(count), width, label=label, color=color)
+            self.bars.append(bars)
+            self.value_labels.append([
+                self.ax.text(bar.get_x() + bar.get_width()/2., 0, '',
+                             ha='center', va='bottom', fontsize=8)
+                for bar in bars
+            ])
+        
+        # Add labels and legend
+        self.ax.set_xlabel('Month')
+        self.ax.set_ylabel('Amount ($)')
+        self.ax.set_xticks(x)
+        if len(series) > 1:
+            self.ax.legend()
+        
+        # Rotate x-axis labels
+        self.ax.tick_params(axis='x', labelrotation=45)
+    
+    def update(self, months, *values):
+        self.ax.set_xticklabels(months)
+        for bars, labels, series_values in zip(self.bars, self.value_labels, values):
+            for bar, label, height in zip(bars, labels, series_values):
+                bar.set_height(height)
+                label.set_y(height)
+                label.set_text(f'${height:,.0f}')
+        self.redraw()
+
+
+class SavingsLineChart(DashboardChart):
+    """Line chart with a shaded area down to zero and value labels on each point"""
+    
+    def __init__(self, parent, title, color, count=6):
+        import numpy as np
+        
+        super().__init__(parent, title)
+        self.color = color
+        self.x = np.arange(count)
+        self.line, = self.ax.plot(self.x, np.zeros(count), marker='o', color=color, linewidth=2)
+        self.fill = None
+        self.value_labels = [
+            self.ax.text(x, 0, '', ha='center', va='bottom', fontsize=8) for x in self.x
+        ]
+        
+        # Add labels
+        self.ax.set_xlabel('Month')
+        self.ax.set_ylabel('Amount ($)')
+        self.ax.set_xticks(self.x)
+        
+        # Rotate x-axis labels
+        self.ax.tick_params(axis='x', labelrotation=45)
+    
+    def update(self, months, values):
+        self.ax.set_xticklabels(months)
+        self.line.set_ydata(values)
+        for label, y in zip(self.value_labels, values):
+            label.set_y(y)
+            label.set_text(f'${y:,.0f}')
+        
+        # A fill_between collection can't be reshaped, so swap just that artist
+        if self.fill is not None:
+            self.fill.remove()
+        self.fill = self.ax.fill_between(self.x, values, color=self.color, alpha=0.2)
+        
+        # relim ignores collections; keep the zero baseline of the fill in view
+        self.redraw((self.x[0], 0))
+
+
+class TransactionGrid:
+    """Virtualized browser over a whole transaction table in a Treeview.
+
+    Only the rows that fit in the widget exist as Treeview items, keyed by id.
+    Scrolling moves a window through the table with keyset seeks on (date, id),
+    so memory and redraw time stay the same however many rows there are.
+    While search results are shown the window moves through their ids instead.
+    Dragging the scrollbar seeks on `executor`, off the Tk thread.
+    
+    The selection is kept as a set of ids, so rows stay selected while they
+    are scrolled out of the window. Ctrl-click and Shift-click add to it; a
+    plain click or arrow key starts a new one.
+    """
+    
+    def __init__(self, tree, scrollbar, service, table, executor, row_height=TREEVIEW_ROW_HEIGHT):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.service = service
+        self.table = table
+        self.executor = executor
+        self.row_height = row_height
+        self.page_size = int(tree.cget("height"))
+        self.rows = []  # Visible rows, newest first
+        self.position = 0  # Index of the first visible row within the table
+        self.total = 0
+        self.pending_jump = None
+        self.jump_task = None
+        self.selected_ids = set()
+        self.result_ids = None  # Matching ids, best first, while showing search results
+        
+        # The scrollbar reflects the whole table, not the items in the tree
+        scrollbar.config(command=self.on_scrollbar)
+        tree.bind("<Configure>", self.on_resize)
+        tree.bind("<MouseWheel>", self.on_mousewheel)
+        tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        tree.bind("<Button-5>", lambda event: self.scroll(3))
+        tree.bind("<Prior>", lambda event: self.scroll(-self.page_size))
+        tree.bind("<Next>", lambda event: self.scroll(self.page_size))
+        tree.bind("<Up>", self.on_arrow)
+        tree.bind("<Down>", self.on_arrow)
+        tree.bind("<ButtonPress-1>", self.on_click)
+        tree.bind("<<TreeviewSelect>>", self.on_select)
+        tree.bind("<Control-a>", self.select_all_results)
+    
+    def reload(self):
+        """Re-read the visible window, e.g. after rows were added or deleted"""
+        self.cancel_jump()
+        if self.result_ids is not None:
+            self.show_results_at(self.position)
+            return
+        
+        self.total = self.service.count_transactions(self.table)
+        # At the top, stay there so new transactions show up
+        anchor = self.rows[0].key if self.rows and self.position else None
+        self.load_from(anchor, self.position)
+    
+    def load_from(self, anchor, position):
+        """Show a full window starting at the (date, id) cursor `anchor`"""
+        rows = self.service.transaction_page(self.table, self.page_size, anchor, inclusive=True)
+        if anchor is not None and len(rows) < self.page_size:
+            # Near the end of the table; fill the window from above
+            before = self.service.transaction_page(self.table, self.page_size - len(rows),
+                                                   rows[0].key if rows else anchor, backward=True)
+            rows = before + rows
+            position -= len(before)
+        self.position = max(0, position) if anchor is not None else 0
+        self.show(rows)
+    
+    def scroll(self, count):
+        """Move the window `count` rows down (positive) or up (negative)"""
+        if not self.rows or not count:
+            return "break"
+        
+        self.cancel_jump()
+        if self.result_ids is not None:
+            self.show_results_at(self.position + count)
+            return "break"
+        
+        if count > 0:
+            fetched = self.service.transaction_page(self.table, count, self.rows[-1].key)
+            window = (self.rows + fetched)[len(fetched):]
+            self.position += len(fetched)
+        else:
+            fetched = self.service.transaction_page(self.table, -count, self.rows[0].key, backward=True)
+            window = (fetched + self.rows)[:self.page_size]
+            self.position = max(0, self.position - len(fetched))
+        
+        if fetched:
+            self.show(window)
+        return "break"
+    
+    def jump(self, fraction):
+        """Move the window to a relative position, as when the scrollbar is dragged"""
+        self.pending_jump = fraction
+        # Dragging fires many moveto events; only seek to the latest one
+        self.tree.after_idle(self.apply_jump)
+    
+    def apply_jump(self):
+        if self.pending_jump is None:
+            return
+        fraction, self.pending_jump = self.pending_jump, None
+        position = int(max(0.0, min(fraction, 1.0)) * self.total)
+        if self.result_ids is not None:
+            self.show_results_at(position)
+            return
+        
+        position = max(0, min(position, self.total - self.page_size))
+        self.cancel_jump()
+        if not position:
+            self.load_from(None, 0)
+            return
+        
+        # The seek walks the index through up to a month of records, so it
+        # runs on the seek worker; a newer jump or scroll cancels it
+        table = self.table
+        self.jump_task = self.executor.submit(
+            lambda service, task: service.transaction_key_at(table, position),
+            on_done=lambda anchor: self.finish_jump(anchor, position),
+        )
+    
+    def finish_jump(self, anchor, position):
+        self.jump_task = None
+        if anchor is None:
+            # Records were deleted since the jump began
+            self.reload()
+        else:
+            self.load_from(anchor, position)
+    
+    def cancel_jump(self):
+        if self.jump_task is not None:
+            self.jump_task.cancel()
+            self.jump_task = None
+    
+    def show(self, rows):
+        """Make the Treeview items match `rows`, reusing items that stay visible"""
+        self.rows = rows
+        visible = {str(row.id) for row in rows}
+        stale = [iid for iid in self.tree.get_children() if iid not in visible]
+        if stale:
+            self.tree.delete(*stale)
+        
+        for index, row in enumerate(rows):
+            iid = str(row.id)
+            values = (row.date, f"${row.amount}", row.label, row.description)
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=values)
+                self.tree.move(iid, "", index)
+            else:
+                self.tree.insert("", index, iid=iid, values=values)
+        
+        # Rows scrolled back into the window are still selected
+        self.tree.selection_set([str(row.id) for row in rows if row.id in self.selected_ids])
+        self.update_scrollbar()
+    
+    def update_scrollbar(self):
+        if self.total:
+            first = min(self.position / self.total, 1.0)
+            last = min((self.position + len(self.rows)) / self.total, 1.0)
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def start_results(self):
+        """Switch to showing search results, which then arrive through extend_results"""
+        self.selected_ids.clear()
+        self.result_ids = []
+        self.total = 0
+        self.position = 0
+        self.show([])
+    
+    def extend_results(self, ids):
+        """Append a streamed chunk of matching ids, filling the window if it isn't full yet"""
+        if self.result_ids is None:
+            return
+        self.result_ids.extend(ids)
+        self.total = len(self.result_ids)
+        if len(self.rows) < self.page_size:
+            self.show_results_at(self.position)
+        else:
+            self.update_scrollbar()
+    
+    def clear_results(self):
+        """Go back to browsing the whole table from the newest row"""
+        self.selected_ids.clear()
+        self.result_ids = None
+        self.rows = []
+        self.position = 0
+        self.reload()
+    
+    def show_results_at(self, position):
+        self.position = max(0, min(position, len(self.result_ids) - self.page_size))
+        ids = self.result_ids[self.position:self.position + self.page_size]
+        rows = self.service.transactions_by_id(self.table, ids)
+        if len(rows) < len(ids):
+            # Some matches were deleted since the search ran; drop them
+            found = {row.id for row in rows}
+            self.result_ids[self.position:self.position + len(ids)] = [row_id for row_id in ids if row_id in found]
+            self.total = len(self.result_ids)
+            self.show_results_at(position)
+            return
+        self.show(rows)
+    
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.jump(float(value))
+        elif unit == "pages":
+            self.scroll(int(value) * self.page_size)
+        else:
+            self.scroll(int(value))
+    
+    def on_click(self, event):
+        # A click without Ctrl or Shift replaces the selection, including the rows out of view
+        if not event.state & (SHIFT_MASK | CONTROL_MASK):
+            self.selected_ids.clear()
+    
+    def on_select(self, event):
+        # The Treeview only knows the selected rows in the window
+        visible = {row.id for row in self.rows}
+        self.selected_ids = (self.selected_ids - visible) | {int(iid) for iid in self.tree.selection()}
+    
+    def select_all_results(self, event):
+        """Select every search result, including those outside the window"""
+        if self.result_ids is None:
+            return None
+        self.selected_ids = set(self.result_ids)
+        self.tree.selection_set([str(row.id) for row in self.rows])
+        return "break"
+    
+    def on_mousewheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+    
+    def on_arrow(self, event):
+        # Scroll the window when the focus is already on its first or last row
+        children = self.tree.get_children()
+        if not children:
+            return None
+        if not event.state & SHIFT_MASK:
+            self.selected_ids.clear()
+        moving_up = event.keysym == "Up"
+        edge = children[0] if moving_up else children[-1]
+        if self.tree.focus() != edge:
+            return None  # Let the Treeview move the focus
+        
+        self.scroll(-1 if moving_up else 1)
+        children = self.tree.get_children()
+        edge = children[0] if moving_up else children[-1]
+        self.tree.focus(edge)
+        self.tree.selection_set(edge)
+        return "break"
+    
+    def on_resize(self, event):
+        # Keep exactly as many items as fit; the header takes about one row
+        page_size = max(1, event.height // self.row_height - 1)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            if self.result_ids is not None:
+                self.show_results_at(self.position)
+                return
+            self.load_from(self.rows[0].key if self.rows and self.position else None, self.position)
+
 
 class FinanceTracker:
-    def __init__(self, root):
+    def __init__(self, root, database, print_startup_metrics=False):
         self.root = root
-        self.root.title("Personal Finance Tracker")
+        self.database = database
+        self.print_startup_metrics = print_startup_metrics
+        self.root.title(window_title(database))
         self.root.geometry("1200x800")
         self.root.minsize(1000, 700)
         self.root.configure(bg="#f4f6f8")
@@ -96,9 +722,38 @@ class FinanceTracker:
                             background=self.colors["danger"],
                             foreground="white")
         
+        # Style the treeviews here, before any tab is built: TransactionGrid
+        # sizes its window from the row height
+        self.style.configure("Treeview", 
+                           background=self.colors["card"],
+                           foreground=self.colors["text"],
+                           rowheight=TREEVIEW_ROW_HEIGHT,
+                           fieldbackground=self.colors["card"])
+        
+        self.style.map("Treeview", background=[("selected", self.colors["primary"])])
+        
         # Initialize database
         self.init_database()
         
+        # Worker threads for long-running database work
+        self.executor = TaskExecutor(self.service)
+        self.seek_executor = TaskExecutor(self.service, workers=1)
+        self.report_task = None
+        self.search_tasks = {}
+        self.search_fields = {}
+        self.root.after(TASK_POLL_MS, self.poll_tasks)
+        
+        # Writes pending a dashboard refresh, flushed together from after_idle
+        self.dirty_changes = set()
+        self.dashboard_refresh_id = None
+        
+        # Transaction grids by table, once their tabs have been built
+        self.grids = {}
+        # Dashboard charts, built after the first frame by finish_startup
+        self.charts = {}
+        self.dashboard_snapshot = None
+        self.startup_metrics = {"imports": IMPORT_SECONDS}
+        
         # Create header
         self.create_header()
         
@@ -120,27 +775,65 @@ class FinanceTracker:
         self.notebook.add(self.reports_tab, text="📁 Reports")
         self.notebook.add(self.settings_tab, text="⚙️ Settings")
         
-        # Set up tabs
+        # Set up the dashboard now; the other tabs are built on first selection
         self.setup_dashboard()
-        self.setup_add_expense()
-        self.setup_add_income()
-        self.setup_reports()
-        self.setup_settings()
+        self.tab_builders = {
+            str(self.add_expense_tab): self.setup_add_expense,
+            str(self.add_income_tab): self.setup_add_income,
+            str(self.reports_tab): self.setup_reports,
+            str(self.settings_tab): self.setup_settings,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self.build_selected_tab)
         
         # Initialize budget
         self.budget = self.get_budget()
         # Status bar
+        status_frame = ttk.Frame(root)
+        status_frame.pack(side="bottom", fill="x")
         self.status_var = tk.StringVar()
-        self.status_bar = ttk.Label(root, textvariable=self.status_var, relief="sunken", anchor="w")
-        self.status_bar.pack(side="bottom", fill="x")
-        self.update_status("Ready")        
-        # Load data for dashboard
-        self.refresh_dashboard()
+        self.status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief="sunken", anchor="w")
+        self.status_bar.pack(side="left", fill="x", expand=True)
+        self.cancel_button = ttk.Button(status_frame, 
+                                       text="✖ Cancel", 
+                                       style="Danger.TButton",
+                                       state="disabled",
+                                       command=self.cancel_tasks)
+        self.cancel_button.pack(side="right")
+        self.update_status("Loading...")
+        # Show last session's numbers until finish_startup recomputes them
+        self.paint_cached_dashboard()
         
 
     
+    def build_selected_tab(self, event=None):
+        """Build a tab the first time it is selected"""
+        builder = self.tab_builders.pop(self.notebook.select(), None)
+        if builder:
+            builder()
+    
+    def finish_startup(self, started):
+        """Draw the dashboard charts once the first frame is up, and report startup times"""
+        charts_started = time.perf_counter()
+        self.create_dashboard_charts()
+        self.refresh_dashboard()
+        self.root.update_idletasks()
+        self.startup_metrics["charts"] = time.perf_counter() - charts_started
+        self.startup_metrics["total"] = time.perf_counter() - started
+        
+        metrics = self.startup_metrics
+        summary = (f"First frame in {metrics['first_frame'] * 1000:.0f} ms "
+                   f"(imports {metrics['imports'] * 1000:.0f} ms), "
+                   f"charts ready in {metrics['total'] * 1000:.0f} ms")
+        if metrics["first_frame"] * 1000 > STARTUP_BUDGET_MS:
+            summary += f" - over the {STARTUP_BUDGET_MS} ms startup budget"
+        self.update_status(summary)
+        if self.print_startup_metrics:
+            print(summary, file=sys.stderr)
+    
     def create_header(self):
         """Create a modern header with app title and quick actions"""
+        from PIL import Image, ImageTk
+        
         header_frame = ttk.Frame(self.root, style="Card.TFrame")
         header_frame.pack(fill="x", padx=20, pady=(20, 0))
         # 🔥 Logo on the left
@@ -171,44 +864,53 @@ class FinanceTracker:
     def update_status(self, message):
         """Update the status bar message"""
         self.status_var.set(f"Status: {message}")
-        self.root.update_idletasks()
+    
+    def poll_tasks(self):
+        """Deliver background task results on the Tk thread"""
+        try:
+            self.executor.poll()
+            self.seek_executor.poll()
+        finally:
+            self.root.after(TASK_POLL_MS, self.poll_tasks)
+    
+    def run_in_background(self, description, func, on_done=None, on_progress=None):
+        """Run func(service, task) on a worker thread and call on_done(result) on the Tk thread.
+
+        Progress reported by the task goes to on_progress, or to the status bar.
+        """
+        def finished(result):
+            self.update_cancel_button()
+            if on_done:
+                on_done(result)
+        
+        def failed(error):
+            self.update_cancel_button()
+            if isinstance(error, TaskCancelled):
+                self.update_status(f"{description} cancelled")
+            else:
+                self.update_status(f"{description} failed")
+                messagebox.showerror("Error", f"An error occurred: {str(error)}")
+        
+        self.update_status(f"{description}...")
+        task = self.executor.submit(func, on_done=finished, on_error=failed,
+                                    on_progress=on_progress or self.update_status)
+        self.update_cancel_button()
+        return task
+    
+    def update_cancel_button(self):
+        self.cancel_button.config(state="normal" if self.executor.active else "disabled")
+    
+    def cancel_tasks(self):
+        """Cancel all running background work"""
+        self.executor.cancel_all()
+        self.update_status("Cancelling...")
     
     def init_database(self):
-        # Create SQLite database
-        self.conn = sqlite3.connect('finance_tracker.db')
-        self.cursor = self.conn.cursor()
-        
-        # Create expenses table if not exists
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT,
-                amount REAL,
-                category TEXT,
-                description TEXT
-            )
-        ''')
-        
-        # Create income table if not exists
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS income (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT,
-                amount REAL,
-                source TEXT,
-                description TEXT
-            )
-        ''')
-        
-        # Create settings table if not exists
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        ''')
-        
-        self.conn.commit()
+        # Open the configured database, creating it unless it is read-only
+        self.db_path = self.database.path
+        self.service = FinanceService.from_config(self.database, readers=TASK_WORKERS + 2)
+        # Rendered report charts, kept on disk next to the database
+        self.render_cache = RenderCache(render_cache_directory(self.db_path))
     
     def setup_dashboard(self):
         # Main container frame
@@ -277,7 +979,6 @@ class FinanceTracker:
         # Bottom charts
         self.chart_frames["income_vs_expense"].pack(in_=bottom_charts_frame, side="left", fill="both", expand=True, padx=10)
         self.chart_frames["savings_trend"].pack(in_=bottom_charts_frame, side="left", fill="both", expand=True, padx=10)
-
         
         # Button to refresh dashboard
         refresh_btn = ttk.Button(self.scrollable_frame, 
@@ -289,6 +990,25 @@ class FinanceTracker:
         # Add some padding at the bottom
         ttk.Frame(self.scrollable_frame, height=20).pack()
     
+    def create_dashboard_charts(self):
+        """Build the dashboard charts; refreshes then update them in place"""
+        self.charts = {
+            "expense_pie": CategoryPieChart(self.chart_frames["expense_pie"],
+                                            "Expenses by Category",
+                                            "No expense data for current month"),
+            "monthly_trend": MonthlyBarChart(self.chart_frames["monthly_trend"],
+                                             "Monthly Expenses Trend",
+                                             [("Expenses", self.colors["chart3"])]),
+            "income_vs_expense": MonthlyBarChart(self.chart_frames["income_vs_expense"],
+                                                 "Income vs Expenses",
+                                                 [("Income", self.colors["chart1"]),
+                                                  ("Expenses", self.colors["chart3"])],
+                                                 width=0.35),
+            "savings_trend": SavingsLineChart(self.chart_frames["savings_trend"],
+                                              "Monthly Savings Trend",
+                                              self.colors["chart4"]),
+        }
+    
     def create_summary_card(self, parent, title, value, color):
         """Create a modern summary card with icon and value"""
         card = ttk.Frame(parent, style="Card.TFrame", padding=10)
@@ -328,6 +1048,8 @@ class FinanceTracker:
         return card
     
     def setup_add_expense(self):
+        from tkcalendar import DateEntry
+        
         # Main container with padding
         container = ttk.Frame(self.add_expense_tab)
         container.pack(fill="both", expand=True, padx=20, pady=20)
@@ -377,9 +1099,9 @@ class FinanceTracker:
         
         # Category
         ttk.Label(fields_frame, text="Category:").grid(row=2, column=0, pady=5, sticky="w")
-        self.expense_categories = ["Food", "Housing", "Transportation", "Entertainment", 
-                                 "Utilities", "Shopping", "Health", "Education", "Personal", "Other"]
-        self.expense_category = ttk.Combobox(fields_frame, values=self.expense_categories, width=27)
+        self.expense_category = ttk.Combobox(fields_frame, values=self.service.label_names("expenses"), width=27,
+                                             postcommand=lambda: self.expense_category.configure(
+                                                 values=self.service.label_names("expenses")))
         self.expense_category.grid(row=2, column=1, pady=5, padx=5, sticky="w")
         self.expense_category.current(0)
         
@@ -402,13 +1124,13 @@ class FinanceTracker:
                   style="Secondary.TButton",
                   command=lambda: self.export_to_excel("expenses")).pack(side="left", padx=5)
         
-        # Recent Expenses (Right)
+        # Expense History (Right)
         recent_card = ttk.Frame(right_frame, style="Card.TFrame", padding=15)
         recent_card.pack(fill="both", expand=True)
         
         # Card header
         ttk.Label(recent_card, 
-                 text="🧾 Recent Expenses", 
+                 text="🧾 Expense History", 
                  style="CardHeader.TLabel").pack(fill="x", pady=(0, 15))
         
         # Treeview with scrollbar
@@ -429,23 +1151,12 @@ class FinanceTracker:
             columns=("Date", "Amount", "Category", "Description"),
             show="headings",
             height=15,
-            yscrollcommand=tree_scroll.set,
             xscrollcommand=tree_scroll_x.set
         )
         
-        # Configure scrollbars
-        tree_scroll.config(command=self.expenses_tree.yview)
+        # Configure scrollbars; the vertical one is driven by the grid below
         tree_scroll_x.config(command=self.expenses_tree.xview)
         
-        # Style the treeview
-        self.style.configure("Treeview", 
-                           background=self.colors["card"],
-                           foreground=self.colors["text"],
-                           rowheight=25,
-                           fieldbackground=self.colors["card"])
-        
-        self.style.map("Treeview", background=[("selected", self.colors["primary"])])
-        
         # Set column headings
         self.expenses_tree.heading("Date", text="Date")
         self.expenses_tree.heading("Amount", text="Amount")
@@ -466,10 +1177,17 @@ class FinanceTracker:
                   style="Danger.TButton",
                   command=self.delete_selected_expense).pack(pady=(10, 0))
         
-        # Populate recent expenses
-        self.load_recent_expenses()
+        # Page through all expenses, keeping only the visible rows in the tree
+        grid = TransactionGrid(self.expenses_tree, tree_scroll, self.service, "expenses", self.seek_executor)
+        grid.reload()
+        self.grids["expenses"] = grid
+        
+        # Description search above the grid
+        self.create_search_bar(recent_card, self.grids["expenses"], before=tree_frame)
     
     def setup_add_income(self):
+        from tkcalendar import DateEntry
+        
         # Main container with padding
         container = ttk.Frame(self.add_income_tab)
         container.pack(fill="both", expand=True, padx=20, pady=20)
@@ -519,8 +1237,9 @@ class FinanceTracker:
         
         # Source
         ttk.Label(fields_frame, text="Source:").grid(row=2, column=0, pady=5, sticky="w")
-        self.income_sources = ["Salary", "Freelance", "Investments", "Gift", "Refund", "Other"]
-        self.income_source = ttk.Combobox(fields_frame, values=self.income_sources, width=27)
+        self.income_source = ttk.Combobox(fields_frame, values=self.service.label_names("income"), width=27,
+                                          postcommand=lambda: self.income_source.configure(
+                                              values=self.service.label_names("income")))
         self.income_source.grid(row=2, column=1, pady=5, padx=5, sticky="w")
         self.income_source.current(0)
         
@@ -543,13 +1262,13 @@ class FinanceTracker:
                   style="Secondary.TButton",
                   command=lambda: self.export_to_excel("income")).pack(side="left", padx=5)
         
-        # Recent Income (Right)
+        # Income History (Right)
         recent_card = ttk.Frame(right_frame, style="Card.TFrame", padding=15)
         recent_card.pack(fill="both", expand=True)
         
         # Card header
         ttk.Label(recent_card, 
-                 text="🧾 Recent Income", 
+                 text="🧾 Income History", 
                  style="CardHeader.TLabel").pack(fill="x", pady=(0, 15))
         
         # Treeview with scrollbar
@@ -570,12 +1289,10 @@ class FinanceTracker:
             columns=("Date", "Amount", "Source", "Description"),
             show="headings",
             height=15,
-            yscrollcommand=tree_scroll.set,
             xscrollcommand=tree_scroll_x.set
         )
         
-        # Configure scrollbars
-        tree_scroll.config(command=self.income_tree.yview)
+        # Configure scrollbars; the vertical one is driven by the grid below
         tree_scroll_x.config(command=self.income_tree.xview)
         
         # Set column headings
@@ -598,8 +1315,13 @@ class FinanceTracker:
                   style="Danger.TButton",
                   command=self.delete_selected_income).pack(pady=(10, 0))
         
-        # Populate recent income
-        self.load_recent_income()
+        # Page through all income, keeping only the visible rows in the tree
+        grid = TransactionGrid(self.income_tree, tree_scroll, self.service, "income", self.seek_executor)
+        grid.reload()
+        self.grids["income"] = grid
+        
+        # Description search above the grid
+        self.create_search_bar(recent_card, self.grids["income"], before=tree_frame)
     
     def setup_reports(self):
         # Main container with padding
@@ -624,7 +1346,7 @@ class FinanceTracker:
         
         # Report type
         ttk.Label(controls_card, text="Report Type:").pack(anchor="w", pady=(5, 0))
-        self.report_types = ["Monthly", "Annual"]
+        self.report_types = ["Monthly", "Annual", "Custom"]
         self.report_type = ttk.Combobox(controls_card, values=self.report_types, width=20)
         self.report_type.pack(fill="x", pady=5)
         self.report_type.current(0)
@@ -650,6 +1372,26 @@ class FinanceTracker:
         self.selected_year.pack(side="left", fill="x", expand=True)
         self.selected_year.current(len(self.years) - 1)  # Set to current year
         
+        # Date range and period length for custom reports
+        range_frame = ttk.Frame(controls_card)
+        range_frame.pack(fill="x", pady=5)
+        
+        ttk.Label(range_frame, text="From:").grid(row=0, column=0, pady=2, sticky="w")
+        self.report_start = ttk.Entry(range_frame, width=12)
+        self.report_start.grid(row=0, column=1, pady=2, padx=(5, 0), sticky="ew")
+        self.report_start.insert(0, f"{current_year}-01-01")
+        
+        ttk.Label(range_frame, text="To:").grid(row=1, column=0, pady=2, sticky="w")
+        self.report_end = ttk.Entry(range_frame, width=12)
+        self.report_end.grid(row=1, column=1, pady=2, padx=(5, 0), sticky="ew")
+        self.report_end.insert(0, datetime.now().strftime("%Y-%m-%d"))
+        
+        ttk.Label(range_frame, text="By:").grid(row=2, column=0, pady=2, sticky="w")
+        self.report_granularity = ttk.Combobox(range_frame, values=RANGE_GRANULARITIES, state="readonly", width=10)
+        self.report_granularity.grid(row=2, column=1, pady=2, padx=(5, 0), sticky="ew")
+        self.report_granularity.set("month")
+        range_frame.columnconfigure(1, weight=1)
+        
         # Generate report button
         ttk.Button(controls_card, 
                   text="🔄 Generate Report", 
@@ -767,7 +1509,7 @@ class FinanceTracker:
         )
         
         # Add existing categories
-        for category in self.expense_categories:
+        for category in self.service.label_names("expenses"):
             self.category_listbox.insert(tk.END, category)
         
         self.category_listbox.pack(fill="both", expand=True, pady=5)
@@ -797,12 +1539,22 @@ class FinanceTracker:
                   text="📤 Export All Data", 
                   style="Secondary.TButton",
                   command=self.export_all_data).pack(fill="x", pady=5)
+        
+        ttk.Button(data_card, 
+                  text="🔍 Check Query Plans", 
+                  style="Secondary.TButton",
+                  command=self.show_query_plans).pack(fill="x", pady=5)
+        
+        ttk.Button(data_card, 
+                  text="🧮 Verify Monthly Summary", 
+                  style="Secondary.TButton",
+                  command=self.verify_summary).pack(fill="x", pady=5)
     
     def add_expense(self):
         try:
             # Get values from form
             date = self.expense_date.get()
-            amount = float(self.expense_amount.get())
+            amount = Money.parse(self.expense_amount.get())
             category = self.expense_category.get()
             description = self.expense_description.get()
             
@@ -814,19 +1566,15 @@ class FinanceTracker:
                 return
             
             # Insert into database
-            self.cursor.execute(
-                "INSERT INTO expenses (date, amount, category, description) VALUES (?, ?, ?, ?)",
-                (date, amount, category, description)
-            )
-            self.conn.commit()
+            self.service.add_transaction("expenses", date, amount, category, description)
             
             # Clear form
             self.expense_amount.delete(0, "end")
             self.expense_description.delete(0, "end")
             
-            # Refresh expense list and dashboard
-            self.load_recent_expenses()
-            self.refresh_dashboard()
+            # Refresh expense list and the dashboard views that use this month
+            self.grids["expenses"].reload()
+            self.mark_dirty("expenses", date[:7])
             
             # Check budget
             self.check_budget()
@@ -842,7 +1590,7 @@ class FinanceTracker:
         try:
             # Get values from form
             date = self.income_date.get()
-            amount = float(self.income_amount.get())
+            amount = Money.parse(self.income_amount.get())
             source = self.income_source.get()
             description = self.income_description.get()
             
@@ -854,19 +1602,15 @@ class FinanceTracker:
                 return
             
             # Insert into database
-            self.cursor.execute(
-                "INSERT INTO income (date, amount, source, description) VALUES (?, ?, ?, ?)",
-                (date, amount, source, description)
-            )
-            self.conn.commit()
+            self.service.add_transaction("income", date, amount, source, description)
             
             # Clear form
             self.income_amount.delete(0, "end")
             self.income_description.delete(0, "end")
             
-            # Refresh income list and dashboard
-            self.load_recent_income()
-            self.refresh_dashboard()
+            # Refresh income list and the dashboard views that use this month
+            self.grids["income"].reload()
+            self.mark_dirty("income", date[:7])
             
             self.update_status("Income added successfully")
             messagebox.showinfo("Success", "Income added successfully!")
@@ -875,66 +1619,145 @@ class FinanceTracker:
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
-    def delete_selected_expense(self):
-        selected = self.expenses_tree.selection()
-        if not selected:
-            messagebox.showwarning("Warning", "Please select an expense to delete")
+    def create_search_bar(self, parent, grid, before):
+        """Add a description search with date and category/source filters for a transaction grid"""
+        table = grid.table
+        search_frame = ttk.Frame(parent)
+        search_frame.pack(fill="x", pady=(0, 10), before=before)
+        
+        # Search text and buttons
+        query_row = ttk.Frame(search_frame)
+        query_row.pack(fill="x")
+        
+        query_entry = ttk.Entry(query_row)
+        query_entry.pack(side="left", fill="x", expand=True, padx=(0, 5))
+        query_entry.bind("<Return>", lambda event: self.run_search(table))
+        
+        ttk.Button(query_row, 
+                  text="🔍 Search", 
+                  style="TButton",
+                  command=lambda: self.run_search(table)).pack(side="left", padx=5)
+        
+        ttk.Button(query_row, 
+                  text="✖ Clear", 
+                  style="Secondary.TButton",
+                  command=lambda: self.clear_search(table)).pack(side="left")
+        
+        # Filters; blank dates and "All" mean no limit
+        filter_row = ttk.Frame(search_frame)
+        filter_row.pack(fill="x", pady=(5, 0))
+        
+        ttk.Label(filter_row, text="From").pack(side="left")
+        start_entry = ttk.Entry(filter_row, width=11)
+        start_entry.pack(side="left", padx=5)
+        
+        ttk.Label(filter_row, text="To").pack(side="left")
+        end_entry = ttk.Entry(filter_row, width=11)
+        end_entry.pack(side="left", padx=5)
+        
+        label_combo = ttk.Combobox(filter_row, values=["All"] + self.service.label_names(table),
+                                   state="readonly", width=15)
+        label_combo.configure(postcommand=lambda: label_combo.configure(
+            values=["All"] + self.service.label_names(table)))
+        label_combo.set("All")
+        label_combo.pack(side="left", padx=5)
+        
+        self.search_fields[table] = {
+            "grid": grid,
+            "query": query_entry,
+            "start": start_entry,
+            "end": end_entry,
+            "label": label_combo,
+        }
+    
+    def run_search(self, table):
+        fields = self.search_fields[table]
+        query = fts_query(fields["query"].get())
+        if not query:
+            self.clear_search(table)
             return
-            confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete the selected expense?")
-            if not confirm:
-                return
-            
-            # Get the ID of the selected expense
-            item = self.expenses_tree.item(selected[0])
-            date = item['values'][0]
-            amount = item['values'][1]
-            category = item['values'][2]
-            description = item['values'][3]
-            
-            # Delete from database
-            self.cursor.execute(
-                "DELETE FROM expenses WHERE date=? AND amount=? AND category=? AND description=?",
-                (date, float(amount[1:]), category, description)
-            )
-            self.conn.commit()
-            
-            # Refresh the treeview
-            self.load_recent_expenses()
-            self.refresh_dashboard()
-            
-            self.update_status("Expense deleted successfully")
-            messagebox.showinfo("Success", "Expense deleted successfully!")
+        
+        # Validate the optional date range
+        dates = []
+        for name in ("start", "end"):
+            value = fields[name].get().strip()
+            if value:
+                try:
+                    datetime.strptime(value, "%Y-%m-%d")
+                except ValueError:
+                    messagebox.showerror("Invalid Date", "Please enter date in YYYY-MM-DD format")
+                    return
+            dates.append(value or None)
+        label = fields["label"].get()
+        label = label if label and label != "All" else None
+        
+        # A new search supersedes one still streaming its results
+        if self.search_tasks.get(table):
+            self.search_tasks[table].cancel()
+        
+        grid = fields["grid"]
+        grid.start_results()
+        
+        def search(service, task):
+            # Hand each chunk of ids to the grid as soon as it is read
+            count = 0
+            for ids in service.search_transaction_ids(table, query, dates[0], dates[1], label):
+                task.progress(ids)
+                count += len(ids)
+            return count
+        
+        self.search_tasks[table] = self.run_in_background(
+            "Searching",
+            search,
+            on_done=lambda count: self.finish_search(table, count),
+            on_progress=grid.extend_results
+        )
+    
+    def finish_search(self, table, count):
+        self.search_tasks.pop(table, None)
+        self.update_status(f"Found {count:,} matching {'expense' if table == 'expenses' else 'income'} records")
+    
+    def clear_search(self, table):
+        fields = self.search_fields[table]
+        task = self.search_tasks.pop(table, None)
+        if task:
+            task.cancel()
+        fields["query"].delete(0, "end")
+        fields["grid"].clear_results()
+        self.update_status("Search cleared")
+    
+    def delete_selected_expense(self):
+        self.delete_selected_transactions("expenses", self.grids["expenses"], "expense")
     
     def delete_selected_income(self):
-        selected = self.income_tree.selection()
+        self.delete_selected_transactions("income", self.grids["income"], "income")
+    
+    def delete_selected_transactions(self, table, grid, noun):
+        """Delete every selected row of a transaction grid, in view or not, in one statement"""
+        selected = sorted(grid.selected_ids)
         if not selected:
-            messagebox.showwarning("Warning", "Please select an income to delete")
+            messagebox.showwarning("Warning", f"Please select an {noun} to delete")
             return
         
-        confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete the selected income?")
+        what = f"the selected {noun}" if len(selected) == 1 else f"the {len(selected):,} selected {noun} records"
+        confirm = messagebox.askyesno("Confirm", f"Are you sure you want to delete {what}?")
         if not confirm:
             return
         
-        # Get the ID of the selected income
-        item = self.income_tree.item(selected[0])
-        date = item['values'][0]
-        amount = item['values'][1]
-        source = item['values'][2]
-        description = item['values'][3]
-        
-        # Delete from database
-        self.cursor.execute(
-            "DELETE FROM income WHERE date=? AND amount=? AND source=? AND description=?",
-            (date, float(amount[1:]), source, description)
-        )
-        self.conn.commit()
-        
-        # Refresh the treeview
-        self.load_recent_income()
-        self.refresh_dashboard()
+        def finished(touched):
+            # Refresh the grid and the dashboard views for the affected months
+            grid.selected_ids.difference_update(selected)
+            grid.reload()
+            for month in touched:
+                self.mark_dirty(table, month)
+            
+            done = f"{noun.capitalize()} deleted" if len(selected) == 1 else f"Deleted {len(selected):,} {noun} records"
+            self.update_status(f"{done} successfully")
+            messagebox.showinfo("Success", f"{done} successfully!")
         
-        self.update_status("Income deleted successfully")
-        messagebox.showinfo("Success", "Income deleted successfully!")
+        self.run_in_background(f"Deleting {what}",
+                               lambda service, task: service.delete_transactions(table, selected),
+                               on_done=finished)
     
     def add_category(self):
         new_category = self.new_category_entry.get().strip()
@@ -942,13 +1765,17 @@ class FinanceTracker:
             messagebox.showwarning("Warning", "Please enter a category name")
             return
         
-        if new_category in self.expense_categories:
+        try:
+            added = self.service.add_label("expenses", new_category)
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Could not add the category: {e}")
+            return
+        
+        if not added:
             messagebox.showwarning("Warning", "This category already exists")
             return
         
-        # Add to the list and update the combobox
-        self.expense_categories.append(new_category)
-        self.expense_category['values'] = self.expense_categories
+        # Saved in the database; the expense combobox reads it when opened
         self.category_listbox.insert(tk.END, new_category)
         
         # Clear the entry
@@ -965,87 +1792,112 @@ class FinanceTracker:
         category = self.category_listbox.get(selected[0])
         
         # Check if category is in use
-        self.cursor.execute("SELECT COUNT(*) FROM expenses WHERE category=?", (category,))
-        count = self.cursor.fetchone()[0]
+        count = self.service.count_label_uses("expenses", category)
         
         if count > 0:
             messagebox.showwarning("Warning", f"Cannot delete '{category}' as it has {count} associated expenses")
             return
         
-        # Remove from the list and update the combobox
-        self.expense_categories.remove(category)
-        self.expense_category['values'] = self.expense_categories
+        try:
+            self.service.delete_label("expenses", category)
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Could not delete the category: {e}")
+            return
+        
+        # Removed from the database; the expense combobox reads it when opened
         self.category_listbox.delete(selected[0])
         
         self.update_status(f"Category '{category}' deleted")
     
-    def load_recent_expenses(self):
-        # Clear current items
-        for item in self.expenses_tree.get_children():
-            self.expenses_tree.delete(item)
-        
-        # Fetch recent expenses
-        self.cursor.execute("SELECT date, amount, category, description FROM expenses ORDER BY date DESC LIMIT 100")
-        expenses = self.cursor.fetchall()
-        
-        # Insert into treeview
-        for expense in expenses:
-            self.expenses_tree.insert("", "end", values=(expense[0], f"${expense[1]:.2f}", expense[2], expense[3]))
+    def mark_dirty(self, table, month=None):
+        """Record that a write touched `table` and schedule one coalesced dashboard refresh.
+
+        Pass the YYYY-MM month when it is known; leave it as None when any
+        month may have changed.
+        """
+        self.dirty_changes.add((table, month))
+        if self.dashboard_refresh_id is None:
+            self.dashboard_refresh_id = self.root.after_idle(self.flush_dashboard_changes)
     
-    def load_recent_income(self):
-        # Clear current items
-        for item in self.income_tree.get_children():
-            self.income_tree.delete(item)
+    def flush_dashboard_changes(self):
+        """Refresh only the dashboard views that depend on the writes recorded since the last pass"""
+        self.dashboard_refresh_id = None
+        changes, self.dirty_changes = self.dirty_changes, set()
         
-        # Fetch recent income
-        self.cursor.execute("SELECT date, amount, source, description FROM income ORDER BY date DESC LIMIT 100")
-        incomes = self.cursor.fetchall()
+        current_date = datetime.now()
+        current_month = month_key(current_date.year, current_date.month)
+        recent_months = [month_key(*shift_month(current_date.year, current_date.month, -offset))
+                         for offset in range(6)]
         
-        # Insert into treeview
-        for income in incomes:
-            self.income_tree.insert("", "end", values=(income[0], f"${income[1]:.2f}", income[2], income[3]))
+        views = stale_dashboard_views(changes, current_month, recent_months)
+        if views:
+            self.refresh_dashboard(views)
     
-    def refresh_dashboard(self):
+    def refresh_dashboard(self, views=None):
+        """Recompute the given DASHBOARD_VIEWS, or all of them"""
+        if views is None:
+            views = set(DASHBOARD_VIEWS)
         self.update_status("Refreshing dashboard...")
         
-        # Get current month and year
-        current_date = datetime.now()
-        current_month = current_date.month
-        current_year = current_date.year
+        # Get totals for the last 6 months (current month last) in one query
+        totals = self.get_recent_monthly_totals() if views - {"expense_pie"} else None
         
-        # Calculate start and end date for current month
-        start_date = f"{current_year}-{current_month:02d}-01"
+        if totals is not None:
+            # Current month figures
+            monthly_expenses = Money(totals.expenses[-1])
+            monthly_income = Money(totals.income[-1])
+            self.update_summary_cards(monthly_income, monthly_expenses, views)
+            
+            # Kept for the next session's first frame
+            self.dashboard_snapshot = {
+                "month": month_key(*totals.months[-1]),
+                "income": monthly_income.cents,
+                "expenses": monthly_expenses.cents,
+            }
         
-        # Get number of days in current month
-        last_day = calendar.monthrange(current_year, current_month)[1]
-        end_date = f"{current_year}-{current_month:02d}-{last_day}"
+        # Charts exist once finish_startup has built them
+        if not self.charts:
+            views = views - {"expense_pie", "monthly_trend", "income_vs_expense", "savings_trend"}
         
-        # Get monthly expenses
-        self.cursor.execute(
-            "SELECT SUM(amount) FROM expenses WHERE date BETWEEN ? AND ?",
-            (start_date, end_date)
-        )
-        monthly_expenses = self.cursor.fetchone()[0] or 0
-        
-        # Get monthly income
-        self.cursor.execute(
-            "SELECT SUM(amount) FROM income WHERE date BETWEEN ? AND ?",
-            (start_date, end_date)
-        )
-        monthly_income = self.cursor.fetchone()[0] or 0
+        # Update the charts in place
+        if "expense_pie" in views:
+            self.update_expense_category_chart()
+        if "monthly_trend" in views:
+            self.update_monthly_trend_chart(totals)
+        if "income_vs_expense" in views:
+            self.update_income_vs_expense_chart(totals)
+        if "savings_trend" in views:
+            self.update_savings_trend_chart(totals)
         
+        self.update_status("Dashboard refreshed")
+    
+    def update_summary_cards(self, monthly_income, monthly_expenses, views=DASHBOARD_VIEWS):
         # Calculate savings
         savings = monthly_income - monthly_expenses
         
         # Update dashboard summary
-        self.total_income_label.config(text=f"${monthly_income:,.2f}")
-        self.total_expenses_label.config(text=f"${monthly_expenses:,.2f}")
-        self.savings_label.config(text=f"${savings:,.2f}")
-        
+        if "income_card" in views:
+            self.total_income_label.config(text=f"${monthly_income:,.2f}")
+        if "expenses_card" in views:
+            self.total_expenses_label.config(text=f"${monthly_expenses:,.2f}")
+        if "savings_card" in views:
+            self.savings_label.config(text=f"${savings:,.2f}")
+        
+        if "budget_card" in views:
+            self.update_budget_card(monthly_expenses)
+    
+    def paint_cached_dashboard(self):
+        """Fill the summary cards from the last session's figures if they are for this month"""
+        snapshot = self.service.get_dashboard_snapshot()
+        current_date = datetime.now()
+        if snapshot and snapshot.get("month") == month_key(current_date.year, current_date.month):
+            self.update_summary_cards(Money(snapshot["income"]), Money(snapshot["expenses"]))
+    
+    def update_budget_card(self, monthly_expenses):
         # Check budget status
         budget = self.get_budget()
         if budget:
-            budget_percentage = (monthly_expenses / budget) * 100
+            budget_percentage = (monthly_expenses.cents / budget.cents) * 100
             if budget_percentage >= 100:
                 status = f"Exceeded: {budget_percentage:.1f}%"
                 self.budget_label.config(text=status, foreground=self.colors["danger"])
@@ -1057,348 +1909,64 @@ class FinanceTracker:
                 self.budget_label.config(text=status, foreground=self.colors["success"])
         else:
             self.budget_label.config(text="No budget set", foreground=self.colors["text"])
-        
-        # Clear previous charts
-        for widget in self.chart_frames["expense_pie"].winfo_children():
-            widget.destroy()
-        for widget in self.chart_frames["monthly_trend"].winfo_children():
-            widget.destroy()
-        for widget in self.chart_frames["income_vs_expense"].winfo_children():
-            widget.destroy()
-        for widget in self.chart_frames["savings_trend"].winfo_children():
-            widget.destroy()
-        
-        # Create expense by category chart (pie chart)
-        self.create_expense_category_chart()
-        
-        # Create monthly trend chart (bar chart)
-        self.create_monthly_trend_chart()
-        
-        # Create income vs expense chart
-        self.create_income_vs_expense_chart()
-        
-        # Create savings trend chart
-        self.create_savings_trend_chart()
-        
-        self.update_status("Dashboard refreshed")
     
-    def create_expense_category_chart(self):
-        # Get current month and year
+    def update_expense_category_chart(self):
+        # Get this month's expenses by category
         current_date = datetime.now()
-        current_month = current_date.month
-        current_year = current_date.year
-        
-        # Calculate start and end date for current month
-        start_date = f"{current_year}-{current_month:02d}-01"
-        
-        # Get number of days in current month
-        last_day = calendar.monthrange(current_year, current_month)[1]
-        end_date = f"{current_year}-{current_month:02d}-{last_day}"
-        
-        # Get expense data by category
-        self.cursor.execute(
-            "SELECT category, SUM(amount) FROM expenses WHERE date BETWEEN ? AND ? GROUP BY category",
-            (start_date, end_date)
-        )
-        category_data = self.cursor.fetchall()
-        
-        if not category_data:
-            # If no data, show message
-            ttk.Label(self.chart_frames["expense_pie"], 
-                     text="No expense data for current month",
-                     style="TLabel").pack(pady=20)
-            return
-        
-        # Create pie chart
-        fig, ax = plt.subplots(figsize=(5, 4))
-        categories = [item[0] for item in category_data]
-        amounts = [item[1] for item in category_data]
-        
-        # Create beautiful colors
-        colors = plt.cm.Pastel1(np.linspace(0, 1, len(categories)))
-        
-        # Create pie chart
-        wedges, texts, autotexts = ax.pie(
-            amounts, 
-            labels=categories, 
-            autopct='%1.1f%%', 
-            startangle=90, 
-            colors=colors,
-            wedgeprops=dict(width=0.4, edgecolor='w'),
-            pctdistance=0.85
-        )
-        
-        # Make labels smaller
-        plt.setp(texts, size=8)
-        plt.setp(autotexts, size=8, weight="bold")
+        category_data = self.service.expenses_by_category(current_date.year, current_date.month)
         
-        ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
-        plt.title('Expenses by Category', pad=20)
-        
-        # Add to frame
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frames["expense_pie"])
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-        
-        # Add toolbar
-        toolbar = NavigationToolbar2Tk(canvas, self.chart_frames["expense_pie"])
-        toolbar.update()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        categories = [item.label for item in category_data]
+        amounts = [float(item.amount) for item in category_data]
+        self.charts["expense_pie"].update(categories, amounts)
+    
+    def get_recent_monthly_totals(self, count=6):
+        """Return monthly totals for the last `count` months, ending with the current month"""
+        return self.service.recent_monthly_totals(count, datetime.now())
     
-    def create_monthly_trend_chart(self):
+    def update_monthly_trend_chart(self, totals=None):
         # Get the last 6 months of data
-        current_date = datetime.now()
-        
-        # Store month names and expense data
-        months = []
-        expenses = []
-        
-        # Get data for each of the last 6 months
-        for i in range(5, -1, -1):
-            # Calculate month and year
-            month = current_date.month - i
-            year = current_date.year
-            
-            # Adjust for previous year
-            while month <= 0:
-                month += 12
-                year -= 1
-            
-            # Calculate start and end date for the month
-            start_date = f"{year}-{month:02d}-01"
-            last_day = calendar.monthrange(year, month)[1]
-            end_date = f"{year}-{month:02d}-{last_day}"
-            
-            # Month name
-            month_name = calendar.month_abbr[month]
-            months.append(month_name)
-            
-            # Get expenses for the month
-            self.cursor.execute(
-                "SELECT SUM(amount) FROM expenses WHERE date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            monthly_expense = self.cursor.fetchone()[0] or 0
-            expenses.append(monthly_expense)
-        
-        # Create figure
-        fig, ax = plt.subplots(figsize=(5, 4))
-        
-        # Create bar chart
-        bars = ax.bar(months, expenses, color=self.colors["chart3"])
-        
-        # Add value labels on top of bars
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                    f'${height:,.0f}',
-                    ha='center', va='bottom', fontsize=8)
-        
-        # Add labels and title
-        ax.set_xlabel('Month')
-        ax.set_ylabel('Amount ($)')
-        ax.set_title('Monthly Expenses Trend')
-        
-        # Rotate x-axis labels
-        plt.xticks(rotation=45)
+        if totals is None:
+            totals = self.get_recent_monthly_totals()
         
-        # Add to frame
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frames["monthly_trend"])
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-        
-        # Add toolbar
-        toolbar = NavigationToolbar2Tk(canvas, self.chart_frames["monthly_trend"])
-        toolbar.update()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        months = [calendar.month_abbr[month] for _, month in totals.months]
+        expenses = [cents / 100 for cents in totals.expenses]
+        self.charts["monthly_trend"].update(months, expenses)
     
-    def create_income_vs_expense_chart(self):
+    def update_income_vs_expense_chart(self, totals=None):
         # Get the last 6 months of data
-        current_date = datetime.now()
-        
-        # Store month names and data
-        months = []
-        incomes = []
-        expenses = []
-        
-        # Get data for each of the last 6 months
-        for i in range(5, -1, -1):
-            # Calculate month and year
-            month = current_date.month - i
-            year = current_date.year
-            
-            # Adjust for previous year
-            while month <= 0:
-                month += 12
-                year -= 1
-            
-            # Calculate start and end date for the month
-            start_date = f"{year}-{month:02d}-01"
-            last_day = calendar.monthrange(year, month)[1]
-            end_date = f"{year}-{month:02d}-{last_day}"
-            
-            # Month name
-            month_name = calendar.month_abbr[month]
-            months.append(month_name)
-            
-            # Get income for the month
-            self.cursor.execute(
-                "SELECT SUM(amount) FROM income WHERE date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            monthly_income = self.cursor.fetchone()[0] or 0
-            incomes.append(monthly_income)
-            
-            # Get expenses for the month
-            self.cursor.execute(
-                "SELECT SUM(amount) FROM expenses WHERE date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            monthly_expense = self.cursor.fetchone()[0] or 0
-            expenses.append(monthly_expense)
-        
-        # Create figure
-        fig, ax = plt.subplots(figsize=(5, 4))
-        
-        # Create bar positions
-        x = np.arange(len(months))
-        width = 0.35
-        
-        # Create bars
-        income_bars = ax.bar(x - width/2, incomes, width, label='Income', color=self.colors["chart1"])
-        expense_bars = ax.bar(x + width/2, expenses, width, label='Expenses', color=self.colors["chart3"])
-        
-        # Add value labels on top of bars
-        for bars in [income_bars, expense_bars]:
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                        f'${height:,.0f}',
-                        ha='center', va='bottom', fontsize=8)
-        
-        # Add labels and legend
-        ax.set_xlabel('Month')
-        ax.set_ylabel('Amount ($)')
-        ax.set_title('Income vs Expenses')
-        ax.set_xticks(x)
-        ax.set_xticklabels(months)
-        ax.legend()
-        
-        # Rotate x-axis labels
-        plt.xticks(rotation=45)
+        if totals is None:
+            totals = self.get_recent_monthly_totals()
         
-        # Add to frame
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frames["income_vs_expense"])
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-        
-        # Add toolbar
-        toolbar = NavigationToolbar2Tk(canvas, self.chart_frames["income_vs_expense"])
-        toolbar.update()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        months = [calendar.month_abbr[month] for _, month in totals.months]
+        incomes = [cents / 100 for cents in totals.income]
+        expenses = [cents / 100 for cents in totals.expenses]
+        self.charts["income_vs_expense"].update(months, incomes, expenses)
     
-    def create_savings_trend_chart(self):
+    def update_savings_trend_chart(self, totals=None):
         # Get the last 6 months of data
-        current_date = datetime.now()
-        
-        # Store month names and savings data
-        months = []
-        savings = []
-        
-        # Get data for each of the last 6 months
-        for i in range(5, -1, -1):
-            # Calculate month and year
-            month = current_date.month - i
-            year = current_date.year
-            
-            # Adjust for previous year
-            while month <= 0:
-                month += 12
-                year -= 1
-            
-            # Calculate start and end date for the month
-            start_date = f"{year}-{month:02d}-01"
-            last_day = calendar.monthrange(year, month)[1]
-            end_date = f"{year}-{month:02d}-{last_day}"
-            
-            # Month name
-            month_name = calendar.month_abbr[month]
-            months.append(month_name)
-            
-            # Get income for the month
-            self.cursor.execute(
-                "SELECT SUM(amount) FROM income WHERE date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            monthly_income = self.cursor.fetchone()[0] or 0
-            
-            # Get expenses for the month
-            self.cursor.execute(
-                "SELECT SUM(amount) FROM expenses WHERE date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            monthly_expense = self.cursor.fetchone()[0] or 0
-            
-            # Calculate savings
-            monthly_savings = monthly_income - monthly_expense
-            savings.append(monthly_savings)
+        if totals is None:
+            totals = self.get_recent_monthly_totals()
         
-        # Create figure
-        fig, ax = plt.subplots(figsize=(5, 4))
-        
-        # Create line chart
-        line, = ax.plot(months, savings, marker='o', color=self.colors["chart4"], linewidth=2)
-        
-        # Add value labels on data points
-        for x, y in zip(months, savings):
-            ax.text(x, y, f'${y:,.0f}', ha='center', va='bottom', fontsize=8)
-        
-        # Add labels and title
-        ax.set_xlabel('Month')
-        ax.set_ylabel('Amount ($)')
-        ax.set_title('Monthly Savings Trend')
-        
-        # Fill under the line
-        ax.fill_between(months, savings, color=self.colors["chart4"], alpha=0.2)
-        
-        # Rotate x-axis labels
-        plt.xticks(rotation=45)
-        
-        # Add to frame
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frames["savings_trend"])
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-        
-        # Add toolbar
-        toolbar = NavigationToolbar2Tk(canvas, self.chart_frames["savings_trend"])
-        toolbar.update()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        months = [calendar.month_abbr[month] for _, month in totals.months]
+        savings = [cents / 100 for cents in totals.savings]
+        self.charts["savings_trend"].update(months, savings)
     
     def get_budget(self):
         # Get budget from settings
-        self.cursor.execute("SELECT value FROM settings WHERE key = 'monthly_budget'")
-        result = self.cursor.fetchone()
-        
-        if result and result[0]:
-            return float(result[0])
-        return None
+        return self.service.get_budget()
     
     def save_settings(self):
         try:
             # Get budget value
-            budget = float(self.budget_entry.get()) if self.budget_entry.get() else None
+            budget = Money.parse(self.budget_entry.get()) if self.budget_entry.get() else None
             
             # Save to database
             if budget:
-                self.cursor.execute(
-                    "INSERT OR REPLACE INTO settings (key, value) VALUES ('monthly_budget', ?)",
-                    (str(budget),)
-                )
-                self.conn.commit()
+                self.service.set_budget(budget)
                 self.budget = budget
                 
                 # Refresh dashboard to update budget status
-                self.refresh_dashboard()
+                self.mark_dirty("settings")
                 
                 self.update_status("Budget settings saved")
                 messagebox.showinfo("Success", "Budget settings saved successfully!")
@@ -1410,80 +1978,156 @@ class FinanceTracker:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
     def check_budget(self):
-        # Get current month's expenses
-        current_date = datetime.now()
-        current_month = current_date.month
-        current_year = current_date.year
-        
-        # Calculate start and end date for current month
-        start_date = f"{current_year}-{current_month:02d}-01"
-        last_day = calendar.monthrange(current_year, current_month)[1]
-        end_date = f"{current_year}-{current_month:02d}-{last_day}"
-        
-        # Get monthly expenses
-        self.cursor.execute(
-            "SELECT SUM(amount) FROM expenses WHERE date BETWEEN ? AND ?",
-            (start_date, end_date)
-        )
-        monthly_expenses = self.cursor.fetchone()[0] or 0
+        # Current month's expenses; the same totals the dashboard reads, so
+        # usually straight from the service's cache
+        totals = self.get_recent_monthly_totals()
+        monthly_expenses = Money(totals.expenses[-1])
         
         # Check against budget
         budget = self.get_budget()
         if budget:
             if monthly_expenses > budget:
                 messagebox.showwarning("Budget Alert", f"You have exceeded your monthly budget of ${budget:,.2f}!")
-            elif monthly_expenses > (budget * 0.8):
-                messagebox.showwarning("Budget Alert", f"You have used {(monthly_expenses/budget)*100:.1f}% of your monthly budget!")
+            elif monthly_expenses.cents * 5 > budget.cents * 4:
+                messagebox.showwarning("Budget Alert", f"You have used {(monthly_expenses.cents/budget.cents)*100:.1f}% of your monthly budget!")
     
     def generate_report(self):
-        self.update_status("Generating report...")
+        report_type = self.report_type.get()
         
-        # Clear previous report
-        for widget in self.report_content_frame.winfo_children():
-            widget.destroy()
+        # A newer request supersedes any report still loading
+        if self.report_task:
+            self.report_task.cancel()
         
-        report_type = self.report_type.get()
+        # Charts are rendered to fit the report display as it is now
+        width = self.report_chart_width()
         
         if report_type == "Monthly":
             month_index = self.months.index(self.selected_month.get()) + 1
             year = int(self.selected_year.get())
             
-            # Generate monthly report
-            self.generate_monthly_report(month_index, year)
+            def load(service, task):
+                report = service.monthly_report(month_index, year)
+                return report, self.render_monthly_charts(month_index, year, report, width)
+            
+            # Load the data and render the charts in the background, then show the monthly report
+            self.report_task = self.run_in_background(
+                "Generating report",
+                load,
+                on_done=lambda result: self.show_report(self.generate_monthly_report, month_index, year, *result)
+            )
         elif report_type == "Annual":
             year = int(self.selected_year.get())
             
-            # Generate annual report
-            self.generate_annual_report(year)
+            def load(service, task):
+                totals = service.annual_report(year)
+                return totals, self.render_annual_chart(year, totals, width)
+            
+            # Load the data and render the chart in the background, then show the annual report
+            self.report_task = self.run_in_background(
+                "Generating report",
+                load,
+                on_done=lambda result: self.show_report(self.generate_annual_report, year, *result)
+            )
         else:
-            # Custom date range - not implemented in this version
-            messagebox.showinfo("Info", "Custom date range reports will be available in future updates")
-        
-        self.update_status("Report generated")
+            report_range = self.selected_report_range()
+            if not report_range:
+                return
+            start, end, _ = report_range
+            
+            def load(service, task):
+                totals = service.range_totals(*report_range)
+                return totals, self.render_range_chart(start, end, totals, width)
+            
+            # Load the data and render the chart in the background, then show the custom range report
+            self.report_task = self.run_in_background(
+                "Generating report",
+                load,
+                on_done=lambda result: self.show_report(self.generate_range_report, start, end, *result)
+            )
     
-    def generate_monthly_report(self, month, year):
-        # Calculate start and end date
-        start_date = f"{year}-{month:02d}-01"
-        last_day = calendar.monthrange(year, month)[1]
-        end_date = f"{year}-{month:02d}-{last_day}"
-        
-        # Get expenses
-        self.cursor.execute(
-            "SELECT category, SUM(amount) FROM expenses WHERE date BETWEEN ? AND ? GROUP BY category",
-            (start_date, end_date)
-        )
-        expense_data = self.cursor.fetchall()
+    def selected_report_range(self):
+        """Return the custom report's (start, end, granularity), or None after telling the user what is wrong"""
+        start, end = self.report_start.get().strip(), self.report_end.get().strip()
+        try:
+            datetime.strptime(start, "%Y-%m-%d")
+            datetime.strptime(end, "%Y-%m-%d")
+        except ValueError:
+            messagebox.showerror("Invalid Date", "Please enter dates in YYYY-MM-DD format")
+            return None
+        if start > end:
+            messagebox.showerror("Invalid Range", "The start date must not be after the end date")
+            return None
+        return start, end, self.report_granularity.get()
+    
+    def report_chart_width(self):
+        """Pixel width of a full-width report chart"""
+        width = self.report_canvas.winfo_width() - 20
+        # Not laid out yet: assume the default window size
+        return width if width >= 400 else REPORT_CHART_WIDTH
+    
+    def show_report(self, render, *args):
+        """Replace the report display with a freshly rendered report"""
+        self.report_task = None
         
-        # Get income
-        self.cursor.execute(
-            "SELECT source, SUM(amount) FROM income WHERE date BETWEEN ? AND ? GROUP BY source",
-            (start_date, end_date)
-        )
-        income_data = self.cursor.fetchall()
+        # Clear previous report
+        for widget in self.report_content_frame.winfo_children():
+            widget.destroy()
         
+        render(*args)
+        self.update_status("Report generated")
+    
+    def show_chart(self, parent, png, **pack):
+        """Show a rendered chart's PNG bytes as an image in `parent`"""
+        import base64
+        
+        image = tk.PhotoImage(data=base64.b64encode(png).decode("ascii"))
+        label = ttk.Label(parent, image=image)
+        label.image = image  # Tk does not keep a reference to the image
+        label.pack(**pack)
+    
+    # Report charts are rendered on a worker thread through the render cache,
+    # so a report shown before comes back without drawing anything
+    
+    def render_monthly_charts(self, month, year, report, width):
+        """Return the PNGs of a monthly report's expense and income pies; None where there is no data"""
+        month_name = calendar.month_name[month]
+        size = (width // 2, width * 2 // 5)
+        charts = []
+        for items, colormap, title in ((report.expenses, "Pastel1", f'Expenses by Category: {month_name} {year}'),
+                                       (report.income, "Pastel2", f'Income by Source: {month_name} {year}')):
+            if items:
+                labels = [item.label for item in items]
+                sizes = [item.amount.cents for item in items]
+                charts.append(self.render_cache.render(draw_pie, (labels, sizes, colormap, title), *size))
+            else:
+                charts.append(None)
+        return charts
+    
+    def render_annual_chart(self, year, totals, width):
+        months = [calendar.month_abbr[month] for _, month in totals.months]
+        series = [
+            ('Income', [cents / 100 for cents in totals.income], self.colors["chart1"]),
+            ('Expenses', [cents / 100 for cents in totals.expenses], self.colors["chart3"]),
+            ('Savings', [cents / 100 for cents in totals.savings], self.colors["chart4"]),
+        ]
+        return self.render_cache.render(draw_annual_trend, (months, series, f'Monthly Financial Trend: {year}'),
+                                        width, width // 2)
+    
+    def render_range_chart(self, start, end, totals, width):
+        granularity = totals.granularity
+        periods = [period_label(period, granularity) for period in totals.periods]
+        series = [
+            ("Income", [cents / 100 for cents in totals.income], self.colors["chart1"]),
+            ("Expenses", [cents / 100 for cents in totals.expenses], self.colors["chart3"]),
+            ("Savings", [cents / 100 for cents in totals.savings], self.colors["chart4"]),
+        ]
+        title = f'Financial Trend by {granularity.capitalize()}: {start} to {end}'
+        return self.render_cache.render(draw_range_trend, (periods, series, title), width, width // 2)
+    
+    def generate_monthly_report(self, month, year, report, charts):
         # Calculate totals
-        total_expense = sum(item[1] for item in expense_data) if expense_data else 0
-        total_income = sum(item[1] for item in income_data) if income_data else 0
+        total_expense = report.total_expenses
+        total_income = report.total_income
         savings = total_income - total_expense
         
         # Create report title
@@ -1509,91 +2153,19 @@ class FinanceTracker:
         charts_frame = ttk.Frame(self.report_content_frame)
         charts_frame.pack(fill="both", expand=True, pady=10)
         
-        # Create expense pie chart
-        if expense_data:
-            fig1, ax1 = plt.subplots(figsize=(5, 4))
-            labels = [item[0] for item in expense_data]
-            sizes = [item[1] for item in expense_data]
-            
-            # Create beautiful colors
-            colors = plt.cm.Pastel1(np.linspace(0, 1, len(labels)))
-            
-            ax1.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-            ax1.axis('equal')
-            plt.title(f'Expenses by Category: {month_name} {year}')
-            
-            chart_frame1 = ttk.Frame(charts_frame)
-            chart_frame1.pack(side="left", fill="both", expand=True)
-            
-            canvas1 = FigureCanvasTkAgg(fig1, master=chart_frame1)
-            canvas1.draw()
-            canvas1.get_tk_widget().pack(fill="both", expand=True)
-        
-        # Create income pie chart
-        if income_data:
-            fig2, ax2 = plt.subplots(figsize=(5, 4))
-            labels = [item[0] for item in income_data]
-            sizes = [item[1] for item in income_data]
-            
-            # Create beautiful colors
-            colors = plt.cm.Pastel2(np.linspace(0, 1, len(labels)))
-            
-            ax2.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-            ax2.axis('equal')
-            plt.title(f'Income by Source: {month_name} {year}')
-            
-            chart_frame2 = ttk.Frame(charts_frame)
-            chart_frame2.pack(side="right", fill="both", expand=True)
-            
-            canvas2 = FigureCanvasTkAgg(fig2, master=chart_frame2)
-            canvas2.draw()
-            canvas2.get_tk_widget().pack(fill="both", expand=True)
+        # Expense pie on the left, income pie on the right
+        for png, side in zip(charts, ("left", "right")):
+            if png:
+                self.show_chart(charts_frame, png, side=side, fill="both", expand=True)
     
-    def generate_annual_report(self, year):
+    def generate_annual_report(self, year, totals, chart):
         # Create report title
         self.report_title_label.config(text=f"Annual Report: {year}")
         
-        # Store monthly data
-        months = []
-        expenses = []
-        incomes = []
-        savings = []
-        
-        # Get data for each month
-        for month in range(1, 13):
-            # Calculate start and end date for the month
-            start_date = f"{year}-{month:02d}-01"
-            last_day = calendar.monthrange(year, month)[1]
-            end_date = f"{year}-{month:02d}-{last_day}"
-            
-            # Month name
-            month_name = calendar.month_abbr[month]
-            months.append(month_name)
-            
-            # Get expenses for the month
-            self.cursor.execute(
-                "SELECT SUM(amount) FROM expenses WHERE date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            monthly_expense = self.cursor.fetchone()[0] or 0
-            expenses.append(monthly_expense)
-            
-            # Get income for the month
-            self.cursor.execute(
-                "SELECT SUM(amount) FROM income WHERE date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            monthly_income = self.cursor.fetchone()[0] or 0
-            incomes.append(monthly_income)
-            
-            # Calculate savings
-            monthly_savings = monthly_income - monthly_expense
-            savings.append(monthly_savings)
-        
         # Calculate annual totals
-        annual_income = sum(incomes)
-        annual_expenses = sum(expenses)
-        annual_savings = sum(savings)
+        annual_income = Money(sum(totals.income))
+        annual_expenses = Money(sum(totals.expenses))
+        annual_savings = Money(sum(totals.savings))
         
         # Create summary frame
         summary_frame = ttk.Frame(self.report_content_frame)
@@ -1610,44 +2182,41 @@ class FinanceTracker:
                  text=f"Annual Savings: ${annual_savings:,.2f}", 
                  font=("Segoe UI", 11, "bold")).pack(anchor="w", pady=2)
         
-        # Create trend chart
-        fig, ax = plt.subplots(figsize=(10, 5))
-        
-        # Create bar positions
-        x = np.arange(len(months))
-        width = 0.3
-        
-        # Create bars
-        income_bars = ax.bar(x - width, incomes, width, label='Income', color=self.colors["chart1"])
-        expense_bars = ax.bar(x, expenses, width, label='Expenses', color=self.colors["chart3"])
-        savings_bars = ax.bar(x + width, savings, width, label='Savings', color=self.colors["chart4"])
-        
-        # Add value labels on top of bars
-        for bars in [income_bars, expense_bars, savings_bars]:
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                        f'${height:,.0f}',
-                        ha='center', va='bottom', fontsize=8)
+        # Monthly trend chart
+        self.show_chart(self.report_content_frame, chart, fill="both", expand=True, pady=10)
+    
+    def generate_range_report(self, start, end, totals, chart):
+        self.report_title_label.config(text=f"Report: {start} to {end} by {totals.granularity}")
         
-        # Add labels and legend
-        ax.set_xlabel('Month')
-        ax.set_ylabel('Amount ($)')
-        ax.set_title(f'Monthly Financial Trend: {year}')
-        ax.set_xticks(x)
-        ax.set_xticklabels(months)
-        ax.legend()
+        total_income = Money(sum(totals.income))
+        total_expenses = Money(sum(totals.expenses))
         
-        # Rotate x-axis labels
-        plt.xticks(rotation=45)
+        # Create summary frame
+        summary_frame = ttk.Frame(self.report_content_frame)
+        summary_frame.pack(fill="x", pady=10)
         
-        # Add to frame
-        chart_frame = ttk.Frame(self.report_content_frame)
-        chart_frame.pack(fill="both", expand=True, pady=10)
+        ttk.Label(summary_frame, 
+                 text=f"Total Income: ${total_income:,.2f}", 
+                 font=("Segoe UI", 11)).pack(anchor="w", pady=2)
+        ttk.Label(summary_frame, 
+                 text=f"Total Expenses: ${total_expenses:,.2f}", 
+                 font=("Segoe UI", 11)).pack(anchor="w", pady=2)
+        ttk.Label(summary_frame, 
+                 text=f"Net Savings: ${total_income - total_expenses:,.2f}", 
+                 font=("Segoe UI", 11, "bold")).pack(anchor="w", pady=2)
         
-        canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        # Trend chart
+        self.show_chart(self.report_content_frame, chart, fill="both", expand=True, pady=10)
+        
+        # Category and source breakdown over the whole range
+        for title, items in (("Expenses by Category", totals.expenses_by_category),
+                             ("Income by Source", totals.income_by_source)):
+            if items:
+                ttk.Label(self.report_content_frame, text=title,
+                          font=("Segoe UI", 11, "bold")).pack(anchor="w", pady=(10, 2))
+                for item in items:
+                    ttk.Label(self.report_content_frame,
+                              text=f"{item.label}: ${item.amount:,.2f}").pack(anchor="w")
     
     def export_report(self):
         try:
@@ -1657,6 +2226,11 @@ class FinanceTracker:
                 month_name = self.selected_month.get()
                 year = self.selected_year.get()
                 filename = f"Report_{month_name}_{year}.xlsx"
+            elif report_type == "Custom":
+                report_range = self.selected_report_range()
+                if not report_range:
+                    return
+                filename = f"Report_{report_range[0]}_to_{report_range[1]}.xlsx"
             else:
                 year = self.selected_year.get()
                 filename = f"Annual_Report_{year}.xlsx"
@@ -1677,6 +2251,8 @@ class FinanceTracker:
                 
                 # Export monthly report
                 self.export_monthly_report(month_index, year, file_path)
+            elif report_type == "Custom":
+                self.export_range_report(*report_range, file_path)
             else:
                 year = int(self.selected_year.get())
                 
@@ -1686,146 +2262,57 @@ class FinanceTracker:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
     def export_monthly_report(self, month, year, file_path):
-        # Calculate start and end date
-        start_date = f"{year}-{month:02d}-01"
-        last_day = calendar.monthrange(year, month)[1]
-        end_date = f"{year}-{month:02d}-{last_day}"
-        
-        # Get expenses
-        self.cursor.execute(
-            "SELECT date, category, amount, description FROM expenses WHERE date BETWEEN ? AND ? ORDER BY date",
-            (start_date, end_date)
+        self.run_in_background(
+            "Exporting report",
+            lambda service, task: write_monthly_report(service, month, year, file_path),
+            on_done=lambda _: self.finish_export("Report exported", f"Report exported to {file_path}")
         )
-        expenses = self.cursor.fetchall()
-        
-        # Get income
-        self.cursor.execute(
-            "SELECT date, source, amount, description FROM income WHERE date BETWEEN ? AND ? ORDER BY date",
-            (start_date, end_date)
-        )
-        incomes = self.cursor.fetchall()
-        
-        # Create Excel writer
-        with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-            # Create summary sheet
-            summary_data = {
-                'Metric': ['Total Income', 'Total Expenses', 'Net Savings'],
-                'Amount': [
-                    sum(income[2] for income in incomes) if incomes else 0,
-                    sum(expense[2] for expense in expenses) if expenses else 0,
-                    sum(income[2] for income in incomes) - sum(expense[2] for expense in expenses) if incomes or expenses else 0
-                ]
-            }
-            
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-            
-            # Create expenses sheet
-            if expenses:
-                expense_df = pd.DataFrame(expenses, columns=['Date', 'Category', 'Amount', 'Description'])
-                expense_df.to_excel(writer, sheet_name='Expenses', index=False)
-            
-            # Create income sheet
-            if incomes:
-                income_df = pd.DataFrame(incomes, columns=['Date', 'Source', 'Amount', 'Description'])
-                income_df.to_excel(writer, sheet_name='Income', index=False)
-        
-        messagebox.showinfo("Export Successful", f"Report exported to {file_path}")
     
     def export_annual_report(self, year, file_path):
-        # Create Excel writer
-        with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-            # Create monthly summary sheet
-            monthly_data = []
-            
-            for month in range(1, 13):
-                # Calculate start and end date for the month
-                start_date = f"{year}-{month:02d}-01"
-                last_day = calendar.monthrange(year, month)[1]
-                end_date = f"{year}-{month:02d}-{last_day}"
-                
-                # Month name
-                month_name = calendar.month_name[month]
-                
-                # Get expenses for the month
-                self.cursor.execute(
-                    "SELECT SUM(amount) FROM expenses WHERE date BETWEEN ? AND ?",
-                    (start_date, end_date)
-                )
-                monthly_expense = self.cursor.fetchone()[0] or 0
-                
-                # Get income for the month
-                self.cursor.execute(
-                    "SELECT SUM(amount) FROM income WHERE date BETWEEN ? AND ?",
-                    (start_date, end_date)
-                )
-                monthly_income = self.cursor.fetchone()[0] or 0
-                
-                # Calculate savings
-                monthly_savings = monthly_income - monthly_expense
-                
-                monthly_data.append([month_name, monthly_income, monthly_expense, monthly_savings])
-            
-            # Create monthly summary dataframe
-            monthly_df = pd.DataFrame(monthly_data, columns=['Month', 'Income', 'Expenses', 'Savings'])
-            monthly_df.to_excel(writer, sheet_name='Monthly Summary', index=False)
-            
-            # Create expense categories sheet
-            self.cursor.execute(
-                "SELECT category, SUM(amount) FROM expenses WHERE date LIKE ? GROUP BY category",
-                (f"{year}%",)
-            )
-            category_data = self.cursor.fetchall()
-            
-            if category_data:
-                category_df = pd.DataFrame(category_data, columns=['Category', 'Total Amount'])
-                category_df.to_excel(writer, sheet_name='Expense Categories', index=False)
-            
-            # Create income sources sheet
-            self.cursor.execute(
-                "SELECT source, SUM(amount) FROM income WHERE date LIKE ? GROUP BY source",
-                (f"{year}%",)
-            )
-            source_data = self.cursor.fetchall()
-            
-            if source_data:
-                source_df = pd.DataFrame(source_data, columns=['Source', 'Total Amount'])
-                source_df.to_excel(writer, sheet_name='Income Sources', index=False)
-        
-        messagebox.showinfo("Export Successful", f"Annual report exported to {file_path}")
+        self.run_in_background(
+            "Exporting report",
+            lambda service, task: write_annual_report(service, year, file_path),
+            on_done=lambda _: self.finish_export("Annual report exported", f"Annual report exported to {file_path}")
+        )
+    
+    def export_range_report(self, start, end, granularity, file_path):
+        self.run_in_background(
+            "Exporting report",
+            lambda service, task: write_range_report(service, start, end, granularity, file_path),
+            on_done=lambda _: self.finish_export("Report exported", f"Report exported to {file_path}")
+        )
+    
+    def finish_export(self, status, message, stats=None):
+        if stats is not None:
+            status = f"{status}: {stats.describe()}"
+        self.update_status(status)
+        messagebox.showinfo("Export Successful", message)
     
     def export_to_excel(self, data_type):
         try:
             # Default filename
             default_filename = f"{data_type}_{datetime.now().strftime('%Y%m%d')}.xlsx"
-            # Ask user for save location
+            # Ask user for save location; the extension picks the format
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
+                filetypes=[(f"{name}s", f"*{extension}") for extension, name in EXPORT_FORMATS.items()],
                 initialfile=default_filename
             )
             
             if not file_path:
                 return
             
-            # Get data from database
-            if data_type == "expenses":
-                self.cursor.execute("SELECT date, amount, category, description FROM expenses ORDER BY date DESC")
-                data = self.cursor.fetchall()
-                columns = ['Date', 'Amount', 'Category', 'Description']
-            else:  # income
-                self.cursor.execute("SELECT date, amount, source, description FROM income ORDER BY date DESC")
-                data = self.cursor.fetchall()
-                columns = ['Date', 'Amount', 'Source', 'Description']
-            
-            # Create DataFrame
-            df = pd.DataFrame(data, columns=columns)
-            
-            # Save to Excel
-            df.to_excel(file_path, index=False)
-            
-            self.update_status(f"{data_type.capitalize()} data exported to Excel")
-            messagebox.showinfo("Export Successful", f"{data_type.capitalize()} data exported to {file_path}")
+            # Stream the file in the background
+            self.run_in_background(
+                f"Exporting {data_type}",
+                lambda service, task: write_table_export(
+                    service, data_type, file_path,
+                    progress=lambda table, done: task.progress(f"Exporting {table}... {done:,} rows")
+                ),
+                on_done=lambda stats: self.finish_export(f"{data_type.capitalize()} data exported",
+                                                         f"{data_type.capitalize()} data exported to {file_path}",
+                                                         stats)
+            )
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
@@ -1834,45 +2321,26 @@ class FinanceTracker:
             # Default filename
             default_filename = f"finance_data_{datetime.now().strftime('%Y%m%d')}.xlsx"
             
-            # Ask user for save location
+            # Ask user for save location; CSV and Parquet write one file per table
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
+                filetypes=[(f"{name}s", f"*{extension}") for extension, name in EXPORT_FORMATS.items()],
                 initialfile=default_filename
             )
             
             if not file_path:
                 return
             
-            # Get data from database
-            self.cursor.execute("SELECT date, amount, category, description FROM expenses ORDER BY date DESC")
-            expenses = self.cursor.fetchall()
-            
-            self.cursor.execute("SELECT date, amount, source, description FROM income ORDER BY date DESC")
-            incomes = self.cursor.fetchall()
-            
-            # Get budget setting
-            budget = self.get_budget()
-            
-            # Create Excel writer
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                # Create expenses sheet
-                if expenses:
-                    expense_df = pd.DataFrame(expenses, columns=['Date', 'Amount', 'Category', 'Description'])
-                    expense_df.to_excel(writer, sheet_name='Expenses', index=False)
-                
-                # Create income sheet
-                if incomes:
-                    income_df = pd.DataFrame(incomes, columns=['Date', 'Amount', 'Source', 'Description'])
-                    income_df.to_excel(writer, sheet_name='Income', index=False)
-                
-                # Create settings sheet
-                settings_data = [['Monthly Budget', budget if budget else 'Not set']]
-                settings_df = pd.DataFrame(settings_data, columns=['Setting', 'Value'])
-                settings_df.to_excel(writer, sheet_name='Settings', index=False)
-            
-            self.update_status("All data exported to Excel")
-            messagebox.showinfo("Export Successful", f"All data exported to {file_path}")
+            # Stream the file in the background
+            self.run_in_background(
+                "Exporting all data",
+                lambda service, task: write_all_data(
+                    service, file_path,
+                    progress=lambda table, done: task.progress(f"Exporting {table}... {done:,} rows")
+                ),
+                on_done=lambda stats: self.finish_export("All data exported", f"All data exported to {file_path}",
+                                                         stats)
+            )
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
@@ -1880,113 +2348,153 @@ class FinanceTracker:
         try:
             # Ask user for file
             file_path = filedialog.askopenfilename(
-                filetypes=[("Excel files", "*.xlsx;*.xls")]
+                filetypes=[("Excel or CSV files", "*.xlsx;*.xls;*.csv"),
+                           ("Excel files", "*.xlsx;*.xls"),
+                           ("CSV files", "*.csv")]
             )
             
             if not file_path:
                 return
             
-            # Read Excel file
-            xls = pd.ExcelFile(file_path)
-            sheet_names = xls.sheet_names
-            
-            imported_data = False
+            def run_import(service, task):
+                # Stream the file in bounded chunks straight into the database;
+                # reporting progress also lets a cancel roll the import back
+                return service.bulk_import(
+                    iter_import_chunks(file_path),
+                    progress=lambda table, done: task.progress(f"Importing {table}... {done:,} rows")
+                )
             
-            # Check for expenses sheet
-            if 'Expenses' in sheet_names:
-                expense_df = pd.read_excel(file_path, sheet_name='Expenses')
-                
-                # Validate columns
-                required_columns = ['Date', 'Amount', 'Category', 'Description']
-                if all(col in expense_df.columns for col in required_columns):
-                    # Import data
-                    for _, row in expense_df.iterrows():
-                        self.cursor.execute(
-                            "INSERT INTO expenses (date, amount, category, description) VALUES (?, ?, ?, ?)",
-                            (str(row['Date']), float(row['Amount']), str(row['Category']), str(row['Description']))
-                        )
-                    
-                    self.conn.commit()
-                    imported_data = True
-                    self.update_status(f"Imported {len(expense_df)} expense records")
-                    messagebox.showinfo("Import Successful", f"Imported {len(expense_df)} expense records")
+            self.run_in_background("Importing", run_import, on_done=self.finish_import)
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+    
+    def finish_import(self, result):
+        if not result["imported"]:
+            self.update_status("Nothing imported")
+            messagebox.showwarning("Import Failed", "No valid data found in file")
+            return
+        
+        imported = result["imported"]
+        summary = (f"Imported {imported.get('expenses', 0):,} expense and {imported.get('income', 0):,} income records "
+                   f"in {result['seconds']:.2f}s ({result['rows_per_sec']:,.0f} rows/sec)")
+        
+        # Refresh data; an import can touch any month of the tables it loaded
+        for grid in self.grids.values():
+            grid.reload()
+        for table in imported:
+            self.mark_dirty(table)
+        self.update_status(summary)
+        
+        errors = result["errors"]
+        if errors:
+            details = "\n".join(f"{table} row {row_number}: {message}" for table, row_number, message in errors[:10])
+            if result["error_count"] > 10:
+                details += f"\n... and {result['error_count'] - 10:,} more"
+            messagebox.showwarning("Import Completed With Errors",
+                                   f"{summary}\n\nSkipped {result['error_count']:,} rows:\n{details}")
+        else:
+            messagebox.showinfo("Import Successful", summary)
+
+    def show_query_plans(self):
+        """Show how SQLite executes the dashboard queries and flag full table and index scans"""
+        try:
+            lines = []
+            full_scans = 0
+            for name, details, full_scan in self.service.explain_query_plans():
+                full_scans += full_scan
+                lines.append(f"{'⚠' if full_scan else '✔'} {name}")
+                lines.extend(f"    {detail}" for detail in details)
+            
+            version = self.service.schema_version()
+            lines.insert(0, f"Schema version {version}, {full_scans} full table or index scan(s)\n")
+            lines.append(f"\nAggregate cache: {self.service.cache_stats().describe()}")
+            lines.append(f"Chart cache: {self.render_cache.describe()}")
+            
+            self.update_status("Query plans checked")
+            messagebox.showinfo("Query Plans", "\n".join(lines))
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+    
+    def verify_summary(self):
+        """Check monthly_summary against the raw transactions and offer to rebuild it"""
+        try:
+            self.report_invalid_dates()
+            drift = self.service.verify_monthly_summary()
+            if not drift:
+                self.update_status("Monthly summary verified")
+                messagebox.showinfo("Monthly Summary", "Monthly summary matches all transactions")
+                return
             
-            # Check for income sheet
-            if 'Income' in sheet_names:
-                income_df = pd.read_excel(file_path, sheet_name='Income')
-                
-                # Validate columns
-                required_columns = ['Date', 'Amount', 'Source', 'Description']
-                if all(col in income_df.columns for col in required_columns):
-                    # Import data
-                    for _, row in income_df.iterrows():
-                        self.cursor.execute(
-                            "INSERT INTO income (date, amount, source, description) VALUES (?, ?, ?, ?)",
-                            (str(row['Date']), float(row['Amount']), str(row['Source']), str(row['Description']))
-                        )
-                    
-                    self.conn.commit()
-                    imported_data = True
-                    self.update_status(f"Imported {len(income_df)} income records")
-                    messagebox.showinfo("Import Successful", f"Imported {len(income_df)} income records")
+            lines = [f"{month} {kind} '{label}': stored {stored}, actual {actual}"
+                     for month, kind, label, stored, actual in drift[:20]]
+            if len(drift) > 20:
+                lines.append(f"... and {len(drift) - 20} more")
             
-            if not imported_data:
-                messagebox.showwarning("Import Failed", "No valid data found in Excel file")
-            else:
-                # Refresh data
-                self.load_recent_expenses()
-                self.load_recent_income()
+            if messagebox.askyesno("Monthly Summary",
+                                   f"Found {len(drift)} out-of-date summary rows:\n\n" + "\n".join(lines) +
+                                   "\n\nRebuild the summary now?"):
+                self.service.rebuild_monthly_summary()
                 self.refresh_dashboard()
+                self.update_status("Monthly summary rebuilt")
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
-
+    
+    def report_invalid_dates(self):
+        """Warn about records whose date the migrations could not normalize"""
+        invalid = self.service.invalid_dates()
+        if not invalid:
+            return
+        lines = [f"{table} #{row_id}: {date!r}" for table, row_id, date in invalid[:20]]
+        if len(invalid) > 20:
+            lines.append(f"... and {len(invalid) - 20} more")
+        messagebox.showwarning("Invalid Dates",
+                               f"Found {len(invalid)} records whose date is not YYYY-MM-DD:\n\n" +
+                               "\n".join(lines) +
+                               "\n\nMonthly reports count them by their first seven characters, "
+                               "but date range reports cannot include them. Delete and re-enter them "
+                               "with a valid date.")
+    
     def on_closing(self):
         """Handle window closing event"""
         if messagebox.askokcancel("Quit", "Do you want to quit?"):
-            self.conn.close()
+            self.executor.shutdown()
+            self.seek_executor.shutdown()
+            if self.dashboard_snapshot:
+                try:
+                    self.service.save_dashboard_snapshot(self.dashboard_snapshot)
+                except sqlite3.Error:
+                    pass  # Only a startup shortcut; the next session recomputes it
+            # Connections a straggling worker still holds close when it returns them
+            self.service.close()
             self.root.destroy()
 
-def main():
-    root = tk.Tk()
+def window_title(database):
+    """Window title naming the profile and read-only mode, if any"""
+    title = "Personal Finance Tracker"
+    if database.profile:
+        title += f" - {database.profile}"
+    if database.read_only:
+        title += " (read-only)"
+    return title
 
+
+def main():
+    started = time.perf_counter()
+    parser = argparse.ArgumentParser(description="Personal Finance Tracker")
+    add_database_arguments(parser)
+    parser.add_argument("--startup-metrics", action="store_true", help="print startup timings to stderr")
+    args = parser.parse_args()
     
-    # Add splash screen
-    splash = tk.Toplevel(root)
-    splash.title("Loading...")
-    splash.geometry("300x200")
-    splash.overrideredirect(True)  # Remove window decorations
-    
-    # Center the splash screen
-    window_width = 300
-    window_height = 200
-    screen_width = root.winfo_screenwidth()
-    screen_height = root.winfo_screenheight()
-    x = (screen_width // 2) - (window_width // 2)
-    y = (screen_height // 2) - (window_height // 2)
-    splash.geometry(f"{window_width}x{window_height}+{x}+{y}")
-    
-    # Add splash content
-    ttk.Label(splash, 
-             text="Personal Finance Tracker", 
-             font=("Segoe UI", 16, "bold"),
-             foreground="#0f4c81").pack(pady=20)
-    
-    ttk.Label(splash, 
-             text="Loading...", 
-             font=("Segoe UI", 10)).pack()
-    
-    progress = ttk.Progressbar(splash, orient="horizontal", length=200, mode="indeterminate")
-    progress.pack(pady=20)
-    progress.start()
-    
-    # Update the splash screen
-    splash.update()
+    root = tk.Tk()
     
     # Create the main app
-    app = FinanceTracker(root)
-    
-    # Close splash screen after a delay
-    splash.after(2000, splash.destroy)
+    try:
+        app = FinanceTracker(root, database_from_args(args), args.startup_metrics)
+    except (ValueError, sqlite3.Error) as e:
+        root.withdraw()
+        messagebox.showerror("Cannot Open Database", str(e))
+        root.destroy()
+        sys.exit(1)
     
     # Set window icon
     try:
@@ -1997,10 +2505,12 @@ def main():
     # Set closing handler
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     
+    # Paint the first frame, then load matplotlib and draw the charts
+    root.update()
+    app.startup_metrics["first_frame"] = time.perf_counter() - started
+    root.after_idle(app.finish_startup, started)
     
     root.mainloop()
 
 if __name__ == "__main__":
     main()
-            
-        
\ No newline at end of file
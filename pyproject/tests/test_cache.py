@@ -0,0 +1,30 @@
+"""The aggregate cache is keyed by data versions that writes from any thread bump"""
+import threading
+
+from conftest import add
+
+
+def test_cached_results_follow_writes(service):
+    add(service, "expenses", "2024-01-05", "10")
+    assert service.monthly_totals(2024, 1, 1).expenses == [1000]
+    assert service.monthly_totals(2024, 1, 1).expenses == [1000]
+    assert service.cache_stats().hits >= 1
+    
+    # A write from a worker thread, as an import would make
+    worker = threading.Thread(target=add, args=(service, "expenses", "2024-01-06", "5"))
+    worker.start()
+    worker.join()
+    assert service.monthly_totals(2024, 1, 1).expenses == [1500]
+
+
+def test_concurrent_bumps_are_all_counted(service):
+    def bump():
+        for _ in range(20000):
+            service.data_changed("expenses", "income")
+    
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert service.data_version("expenses", "income", "settings") == (80000, 80000, 0)
@@ -0,0 +1,29 @@
+import sqlite3
+
+import pytest
+
+from conftest import add
+from finance_service import FinanceService
+
+
+@pytest.mark.parametrize("name", ["plain.db", "what?.db", "#1.db", "100%.db", "with space.db"])
+def test_read_only_opens_any_path(tmp_path, name):
+    path = str(tmp_path / name)
+    service = FinanceService.open(path)
+    add(service, "expenses", "2024-01-05", "10")
+    service.close()
+    
+    archive = FinanceService.open(path, read_only=True)
+    try:
+        assert archive.read_only
+        assert archive.transaction_totals("expenses") == (1, 1000)
+        with pytest.raises(sqlite3.OperationalError):
+            add(archive, "expenses", "2024-01-06", "5")
+    finally:
+        archive.close()
+
+
+def test_read_only_never_creates_the_file(tmp_path):
+    with pytest.raises(sqlite3.OperationalError):
+        FinanceService.open(str(tmp_path / "missing.db"), read_only=True)
+    assert not (tmp_path / "missing.db").exists()
@@ -0,0 +1,73 @@
+import math
+
+import pandas as pd
+import pytest
+
+from finance_db import prepare_import_frame
+
+
+def frame(*rows):
+    return pd.DataFrame(list(rows), columns=["Date", "Amount", "Category", "Description"])
+
+
+def test_valid_rows_are_coerced():
+    rows, row_numbers, errors = prepare_import_frame(frame(
+        ("2024-01-05", 12.5, " Food ", "Lunch"),
+        ("2024-01-06", "7", "Other", None),
+    ), "expenses")
+    assert rows == [("2024-01-05", 1250, "Food", "Lunch"), ("2024-01-06", 700, "Other", "")]
+    assert row_numbers == [2, 3]
+    assert errors == []
+
+
+@pytest.mark.parametrize("amount, cents", [(0.285, 29), (1.005, 101), (-1.005, -101), (0.1 + 0.2, 30), (1e6, 10 ** 8)])
+def test_amounts_round_half_away_from_zero(amount, cents):
+    rows, _, _ = prepare_import_frame(frame(("2024-01-05", amount, "Food", "")), "expenses")
+    assert rows[0][1] == cents
+
+
+def test_bad_rows_are_reported_by_spreadsheet_row():
+    rows, row_numbers, errors = prepare_import_frame(frame(
+        ("2024-01-05", 1, "Food", ""),
+        ("not a date", 1, "Food", ""),
+        ("2024-01-07", "lots", "Food", ""),
+        ("2024-13-45", math.inf, "Food", ""),
+    ), "expenses", first_row=10)
+    assert row_numbers == [10]
+    assert errors == [(11, "invalid date"), (12, "invalid amount"), (13, "invalid date, invalid amount")]
+
+
+def test_each_date_is_read_in_its_own_format():
+    rows, _, errors = prepare_import_frame(frame(
+        ("2026-10-03", 1, "Food", ""),
+        ("2026/10/04", 1, "Food", ""),
+        ("10/05/2026", 1, "Food", ""),
+        ("2026-10-06 00:00:00", 1, "Food", ""),
+        ("Oct 7, 2026", 1, "Food", ""),
+        (pd.Timestamp("2026-10-08"), 1, "Food", ""),
+        (45000, 1, "Food", ""),
+    ), "expenses")
+    assert [row[0] for row in rows] == [f"2026-10-0{day}" for day in range(3, 9)]
+    assert errors == [(8, "invalid date")]
+
+
+def test_blank_rows_are_ignored():
+    rows, _, errors = prepare_import_frame(frame(
+        ("2024-01-05", 1, "Food", ""),
+        (None, None, None, None),
+    ), "expenses")
+    assert len(rows) == 1
+    assert errors == []
+
+
+def test_bulk_import_keeps_the_summary_in_step(service):
+    result = service.bulk_import([
+        ("expenses", frame(("2024-01-05", 10, "Food", "a"), ("2024-02-05", 20, "Brand new", "b"))),
+        ("income", pd.DataFrame([("2024-01-31", 100, "Salary", "")],
+                                columns=["Date", "Amount", "Source", "Description"])),
+    ])
+    assert result["imported"] == {"expenses": 2, "income": 1}
+    assert result["error_count"] == 0
+    assert service.verify_monthly_summary() == []
+    assert "Brand new" in service.label_names("expenses")
+    assert service.monthly_totals(2024, 1, 2).expenses == [1000, 2000]
@@ -0,0 +1,131 @@
+import sqlite3
+
+import pytest
+
+from finance_db import (
+    MIGRATIONS,
+    create_tables,
+    invalid_dates,
+    migrate_database,
+    migrate_normalize_timestamps,
+    open_database,
+    verify_monthly_summary,
+)
+from finance_service import FinanceService
+
+DATE_PATTERN = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+
+
+def legacy_totals(path):
+    """(row count, total cents, labels) of each table of a schema 0 database"""
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+        return {
+            table: (
+                *conn.execute(f"SELECT COUNT(*), CAST(ROUND(SUM(amount) * 100) AS INTEGER) FROM {table}").fetchone(),
+                {row[0] for row in conn.execute(f"SELECT DISTINCT {label} FROM {table}")},
+            )
+            for table, label in (("expenses", "category"), ("income", "source"))
+        }
+    finally:
+        conn.close()
+
+
+def migrated_totals(conn):
+    return {
+        table: (
+            *conn.execute(f"SELECT COUNT(*), SUM(amount_cents) FROM {table}").fetchone(),
+            {row[0] for row in conn.execute(
+                f"SELECT DISTINCT l.name FROM {table} AS t JOIN {labels} AS l ON l.id = t.{label}_id"
+            )},
+        )
+        for table, label, labels in (("expenses", "category", "categories"), ("income", "source", "sources"))
+    }
+
+
+def test_sample_database_migrates_to_latest_schema(sample_path):
+    before = legacy_totals(sample_path)
+    conn = open_database(sample_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+        assert migrated_totals(conn) == before
+        assert verify_monthly_summary(conn) == []
+        for table in ("expenses", "income"):
+            assert conn.execute(f"SELECT COUNT(*) FROM {table} WHERE date NOT GLOB ?",
+                                (DATE_PATTERN,)).fetchone()[0] == 0
+        # The sample has records dated 2025-04-9
+        assert conn.execute("SELECT COUNT(*) FROM expenses WHERE date = '2025-04-09'").fetchone()[0] == 2
+        assert conn.execute("SELECT value FROM settings WHERE key = 'monthly_budget'").fetchone() == ("30000.0",)
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("stop", range(1, len(MIGRATIONS)))
+def test_migrations_resume_from_every_version(sample_path, stop):
+    before = legacy_totals(sample_path)
+    conn = sqlite3.connect(sample_path)
+    try:
+        create_tables(conn)
+        assert migrate_database(conn, target=stop) == stop
+        assert migrate_database(conn) == len(MIGRATIONS)
+        assert migrated_totals(conn) == before
+        assert verify_monthly_summary(conn) == []
+    finally:
+        conn.close()
+
+
+def test_new_database_starts_at_latest_schema(service):
+    assert service.schema_version() == len(MIGRATIONS)
+    assert service.verify_monthly_summary() == []
+
+
+# Dates as older versions of the app stored them, and what migrating makes of them
+LEGACY_DATES = [
+    ("2025-04-20 00:00:00", "2025-04-20"),  # An Excel date cell saved with str()
+    ("2025-04-21T08:30:00", "2025-04-21"),
+    ("2025-4-22", "2025-04-22"),
+    ("2025/04/23", "2025-04-23"),
+    ("04/24/2025", "2025-04-24"),
+]
+
+
+def test_legacy_dates_are_normalized(sample_path):
+    conn = sqlite3.connect(sample_path)
+    with conn:
+        conn.executemany("INSERT INTO expenses (date, amount, category, description) VALUES (?, 100, 'Food', '')",
+                         [(legacy,) for legacy, _ in LEGACY_DATES])
+        conn.execute("INSERT INTO expenses (date, amount, category, description) VALUES ('someday', 5, 'Food', '')")
+    conn.close()
+    
+    conn = open_database(sample_path)
+    try:
+        dates = [row[0] for row in conn.execute("SELECT date FROM expenses WHERE amount_cents = 10000 ORDER BY id")]
+        assert dates == [normalized for _, normalized in LEGACY_DATES]
+        # Dates that cannot be read are kept, and reported
+        assert [(table, date) for table, _, date in invalid_dates(conn)] == [("expenses", "someday")]
+        assert verify_monthly_summary(conn) == []
+    finally:
+        conn.close()
+
+
+def test_timestamps_left_by_schema_1_are_normalized(sample_path):
+    service = FinanceService.open(sample_path, cache_size=0)
+    try:
+        # Rows that the first version of migrate_normalize_dates would have left behind
+        with service.pool.writer() as conn, conn:
+            conn.execute("UPDATE expenses SET date = date || ' 00:00:00' WHERE date = '2025-04-15'")
+            conn.execute("UPDATE expenses SET date = '2025-05-31 00:00:00' WHERE date = '2025-05-10'")
+            conn.execute(f"PRAGMA user_version = {MIGRATIONS.index(migrate_normalize_timestamps)}")
+        assert len(service.invalid_dates()) == 4
+        with service.pool.writer() as conn:
+            assert migrate_database(conn) == len(MIGRATIONS)
+        
+        assert service.invalid_dates() == []
+        assert service.verify_monthly_summary() == []
+        april = service.monthly_totals(2025, 4, 1).expenses[0]
+        assert service.range_totals("2025-04-01", "2025-04-30", "month").expenses == [april]
+        assert service.range_totals("2025-04-15", "2025-04-15", "day").expenses[0] > 0
+        assert service.range_totals("2025-05-31", "2025-05-31", "day").expenses[0] > 0
+    finally:
+        service.close()
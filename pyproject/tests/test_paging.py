@@ -0,0 +1,49 @@
+"""Keyset paging through the transaction browser's (date, id) order"""
+import pytest
+
+from conftest import add
+
+
+@pytest.fixture
+def records(service):
+    """Ids newest first: 3 records on 2024-03-02, 20 sharing 2024-03-01 and 3 on 2024-02-28"""
+    ids = [add(service, "expenses", "2024-03-01", "1") for _ in range(20)]
+    ids += [add(service, "expenses", "2024-03-02", "1") for _ in range(3)]
+    ids += [add(service, "expenses", "2024-02-28", "1") for _ in range(3)]
+    with service.pool.reader() as conn:
+        return [row[0] for row in conn.execute("SELECT id FROM expenses ORDER BY date DESC, id DESC")]
+
+
+@pytest.mark.parametrize("page_size", [1, 6, 7, 20, 50])
+def test_pages_forward_cover_every_record_once(service, records, page_size):
+    seen = []
+    page = service.transaction_page("expenses", page_size)
+    while page:
+        seen += [row.id for row in page]
+        page = service.transaction_page("expenses", page_size, page[-1].key)
+    assert seen == records
+
+
+@pytest.mark.parametrize("page_size", [1, 6, 7, 20, 50])
+def test_pages_backward_cover_every_record_once(service, records, page_size):
+    oldest = service.transaction_page("expenses", len(records))[-1]
+    seen = [oldest.id]
+    page = service.transaction_page("expenses", page_size, oldest.key, backward=True)
+    while page:
+        seen = [row.id for row in page] + seen
+        page = service.transaction_page("expenses", page_size, page[0].key, backward=True)
+    assert seen == records
+
+
+def test_inclusive_page_starts_at_the_cursor(service, records):
+    rows = service.transaction_page("expenses", len(records))
+    middle = rows[10]  # Inside the run of equal dates
+    page = service.transaction_page("expenses", 5, middle.key, inclusive=True)
+    assert [row.id for row in page] == records[10:15]
+
+
+def test_key_at_every_offset(service, records):
+    rows = service.transaction_page("expenses", len(records))
+    for offset, row in enumerate(rows):
+        assert service.transaction_key_at("expenses", offset) == row.key
+    assert service.transaction_key_at("expenses", len(records)) is None
@@ -0,0 +1,61 @@
+"""Range reports read the records and monthly reports read monthly_summary; they must agree"""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import add
+from finance_db import shift_month, transaction_insert_sql
+
+
+@pytest.fixture
+def history(service):
+    generator = random.Random(7)
+    for _ in range(400):
+        day = date(2023, 1, 1) + timedelta(days=generator.randrange(730))
+        table = generator.choice(["expenses", "income"])
+        label = generator.choice(["Food", "Housing", "Other"] if table == "expenses" else ["Salary", "Gift"])
+        add(service, table, day.isoformat(), f"{generator.randrange(1, 50000) / 100:.2f}", label)
+    return service
+
+
+def test_month_ranges_match_monthly_totals(history):
+    monthly = history.monthly_totals(2023, 1, 24)
+    by_range = history.range_totals("2023-01-01", "2024-12-31", "month")
+    assert by_range.periods == [date(*month, 1) for month in monthly.months]
+    assert by_range.expenses == monthly.expenses
+    assert by_range.income == monthly.income
+    assert by_range.savings == monthly.savings
+
+
+@pytest.mark.parametrize("granularity", ["day", "week", "quarter"])
+def test_every_granularity_adds_up_to_the_same_totals(history, granularity):
+    monthly = history.monthly_totals(2023, 1, 24)
+    by_range = history.range_totals("2023-01-01", "2024-12-31", granularity)
+    assert sum(by_range.expenses) == sum(monthly.expenses)
+    assert sum(by_range.income) == sum(monthly.income)
+
+
+def test_single_months_match_the_monthly_report(history):
+    for offset in range(24):
+        year, month = shift_month(2023, 1, offset)
+        last_day = date(*shift_month(year, month, 1), 1) - timedelta(days=1)
+        by_range = history.range_totals(f"{year}-{month:02d}-01", last_day.isoformat(), "day")
+        report = history.monthly_report(month, year)
+        assert sum(by_range.expenses) == report.total_expenses.cents
+        assert sum(by_range.income) == report.total_income.cents
+        assert sorted(by_range.expenses_by_category) == sorted(report.expenses)
+        assert sorted(by_range.income_by_source) == sorted(report.income)
+
+
+def test_unreadable_dates_in_the_range_are_an_error(service):
+    add(service, "expenses", "2024-04-02", "10", "Food")
+    with service.pool.writer() as conn, conn:
+        conn.execute(transaction_insert_sql("expenses"), ("2024-04-1x", 500, "Food", ""))
+    service.data_changed("expenses")
+    
+    # The monthly figures count it, so a range report must not quietly leave it out
+    assert service.monthly_totals(2024, 4, 1).expenses == [1500]
+    with pytest.raises(ValueError, match="2024-04-1x"):
+        service.range_totals("2024-04-01", "2024-04-30", "month")
+    assert service.range_totals("2024-04-01", "2024-04-09", "month").expenses == [1000]
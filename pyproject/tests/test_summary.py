@@ -0,0 +1,58 @@
+"""monthly_summary and the label usage counts are kept by triggers; check them against the records"""
+from conftest import add
+
+
+def test_summary_follows_inserts(service):
+    add(service, "expenses", "2024-01-05", "10.50", "Food")
+    add(service, "expenses", "2024-01-20", "4.25", "Food")
+    add(service, "expenses", "2024-02-01", "100", "Housing")
+    add(service, "income", "2024-01-31", "2500", "Salary")
+    
+    assert service.verify_monthly_summary() == []
+    totals = service.monthly_totals(2024, 1, 2)
+    assert totals.expenses == [1475, 10000]
+    assert totals.income == [250000, 0]
+    assert service.transaction_totals("expenses") == (3, 11475)
+    assert service.count_label_uses("expenses", "Food") == 2
+
+
+def test_summary_follows_updates(service):
+    moved = add(service, "expenses", "2024-01-05", "10.50", "Food")
+    add(service, "expenses", "2024-01-06", "1", "Food")
+    
+    with service.pool.writer() as conn, conn:
+        # Another month, amount and category at once
+        conn.execute(
+            "UPDATE expenses SET date = '2024-03-01', amount_cents = 999, "
+            "category_id = (SELECT id FROM categories WHERE name = 'Health') WHERE id = ?", (moved,)
+        )
+    service.data_changed("expenses")
+    
+    assert service.verify_monthly_summary() == []
+    assert service.monthly_totals(2024, 1, 3).expenses == [100, 0, 999]
+    assert service.count_label_uses("expenses", "Food") == 1
+    assert service.count_label_uses("expenses", "Health") == 1
+
+
+def test_summary_follows_deletes(service):
+    kept = add(service, "expenses", "2024-01-05", "10", "Food")
+    gone = [add(service, "expenses", f"2024-02-0{day}", "5", "Food") for day in range(1, 4)]
+    
+    assert service.delete_transactions("expenses", gone) == ["2024-02"]
+    assert service.verify_monthly_summary() == []
+    assert service.monthly_totals(2024, 1, 2).expenses == [1000, 0]
+    assert service.transaction_totals("expenses") == (1, 1000)
+    with service.pool.reader() as conn:
+        # Emptied months leave no summary rows behind
+        assert conn.execute("SELECT COUNT(*) FROM monthly_summary WHERE month = '2024-02'").fetchone()[0] == 0
+    assert [row.id for row in service.transaction_page("expenses", 10)] == [kept]
+
+
+def test_rebuild_repairs_drift(service):
+    add(service, "expenses", "2024-01-05", "10", "Food")
+    with service.pool.writer() as conn, conn:
+        conn.execute("UPDATE monthly_summary SET total_cents = 1")
+    
+    assert service.verify_monthly_summary() != []
+    service.rebuild_monthly_summary()
+    assert service.verify_monthly_summary() == []